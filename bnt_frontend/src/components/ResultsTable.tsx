@@ -89,7 +89,7 @@ export default function ResultsTable({ results, meta, onPageChange }: ResultsTab
       records={records}
       totalRecords={meta.total_songs}
       recordsPerPage={meta.page_size}
-      page={meta.page}
+      page={meta.page ?? 1}
       onPageChange={onPageChange}
       noRecordsText="No results found."
       rowExpansion={{
@@ -77,6 +77,7 @@ const BASE_META: SearchMeta = {
   total_songs: 1,
   total_lines: 3,
   writers_in_results: ['Robert Pollard'],
+  section_type_counts: {},
   page: 1,
   page_size: 20,
   previous_page_url: null,
@@ -10,12 +10,20 @@ export interface SearchFormValues {
 export interface WordData {
   id: number | null
   text: string
+  // The words a wildcard pattern, a fuzzy search or a phonetic search expanded to
+  terms?: string[]
+  // Known words close to an unknown search word
+  suggestions?: string[]
+  // The rhyme key a rhyme search matched line endings on
+  rhyme?: string
 }
 
 export interface LineResult {
   id: number
   order: number
   lyric: string
+  // Present only with ?context=: false for the lines around a match
+  match?: boolean
 }
 
 export interface SectionResult {
@@ -42,10 +50,15 @@ export interface SearchMeta {
   total_songs: number
   total_lines: number
   writers_in_results: string[]
-  page: number
+  // Lines matched in each section type, e.g. { VERSE: 12, CHORUS: 30 }
+  section_type_counts: Record<string, number>
+  // null on cursor-paginated responses, which have no page numbers
+  page: number | null
   page_size: number
   previous_page_url: string | null
   next_page_url: string | null
+  // Present only on cursor-paginated responses (?cursor=)
+  next_cursor?: string | null
 }
 
 export interface SearchResponse {
@@ -64,4 +77,6 @@ export interface SearchParams {
   co_writer?: string[]
   page?: number
   page_size?: number
+  // Lines either side of each match to include
+  context?: number
 }
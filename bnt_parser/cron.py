@@ -1,7 +1,12 @@
+from django.db import transaction
+
 from bnt_parser.clients.genius_client import GeniusClient
 from bnt_parser.services.song_service import SongService
 from bnt_parser.services.table_service import TableService
 
+# Lines whose word pairs count_word_pairs counts per transaction.
+PAIR_BATCH_SIZE = 500
+
 
 def add_song():
     """
@@ -16,8 +21,38 @@ def add_song():
     song_service.select_song()
     line_count = len(song_service.lyrics)
     print(f"Parsing {song_service.title} by {song_service.artist}; found {line_count} lines.")
-    song_service.save_song()
-    song_service.save_lyrics()
+    # One unit, as in SubmitPageView, and recorded as a corpus change so searches
+    # see the new song.
+    with transaction.atomic():
+        song_service.save_song()
+        song_service.save_lyrics()
+        SongService.corpus_changed(table_service, song=song_service.song_object)
 
     # Here you would implement the logic to add a song, e.g., fetching from an API
     print("Cron job executed: add_song function called.")
+
+
+def count_word_pairs():
+    """
+    Count the word pairs of every line saved since the last run.
+    This function is intended to be called by a cron job.
+
+    Saving lyrics leaves this to be done here, off the request that saves them. Each
+    batch commits on its own and moves the pair version, so a run stopped part-way
+    keeps the batches it finished and the next run picks up where it stopped.
+    """
+    table_service = TableService()
+    table = table_service.get_table("word_pair")
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            counted = table.count_pending(limit=PAIR_BATCH_SIZE)
+            if counted:
+                # Not a corpus change: only the word neighbours endpoint reads pairs.
+                table_service.get_table("corpus_version").bump("pair_version")
+        total += counted
+        if counted < PAIR_BATCH_SIZE:
+            break
+
+    print(f"Counted word pairs for {total} lines.")
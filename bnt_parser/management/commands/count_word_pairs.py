@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from bnt_parser.cron import count_word_pairs
+
+
+class Command(BaseCommand):
+    help = "Count the word pairs of lines saved since the last count."
+
+    def handle(self, *args, **options):
+        count_word_pairs()
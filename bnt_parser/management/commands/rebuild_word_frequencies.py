@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bnt_parser.services.song_service import SongService
+from bnt_parser.services.table_service import TableService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the word frequency and co-occurrence tables from scratch. Saving "
+        "lyrics and the count_word_pairs cron job keep them up to date; run this "
+        "after changing words or links by other means."
+    )
+
+    def handle(self, *args, **options):
+        # One transaction, so searches never see the tables half rebuilt.
+        with transaction.atomic():
+            table_service = TableService()
+            words = table_service.get_table("word_frequency").rebuild()
+            pairs = table_service.get_table("word_pair").rebuild()
+            SongService.corpus_changed(table_service)
+
+        self.stdout.write(f"Counted frequencies for {words} words and {pairs} word pairs.")
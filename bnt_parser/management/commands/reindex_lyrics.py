@@ -0,0 +1,135 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from bnt_parser.models import Line, Word, WordPosition
+from bnt_parser.services.song_service import SongService
+from bnt_parser.services.table_service import TableService
+from bnt_parser.utils.phonetic import phonetic_key
+from bnt_parser.utils.rhyme import line_rhyme
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in search data derived from lyrics for lines saved before it existed. "
+        "Runs every step unless one or more are named."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--positions",
+            action="store_true",
+            help="Record word positions, used by phrase search.",
+        )
+        parser.add_argument(
+            "--phonetic",
+            action="store_true",
+            help="Record each word's phonetic key, used by sound-alike search.",
+        )
+        parser.add_argument(
+            "--rhymes",
+            action="store_true",
+            help="Record each line's rhyme key, used by rhyme search.",
+        )
+        parser.add_argument(
+            "--search-vectors",
+            action="store_true",
+            help="Fill in full-text search vectors, used by the postgres search engine.",
+        )
+
+    def handle(self, *args, **options):
+        steps = {
+            "positions": self.index_positions,
+            "phonetic": self.index_phonetic,
+            "rhymes": self.index_rhymes,
+            "search_vectors": self.index_search_vectors,
+        }
+        chosen = [name for name in steps if options[name]] or list(steps)
+
+        for name in chosen:
+            steps[name]()
+
+    def index_positions(self):
+        """Record word positions for every line that has none."""
+        table_service = TableService()
+        table = table_service.get_table("word_position")
+        lines = Line.objects.filter(
+            ~Exists(WordPosition.objects.filter(line_id=OuterRef("pk")))
+        ).only("id", "lyrics")
+
+        count = 0
+        for batch in self._batches(lines):
+            with transaction.atomic():
+                table.save_all([(line, SongService.parse_tokens(line.lyrics)) for line in batch])
+                SongService.corpus_changed(table_service)
+            count += len(batch)
+
+        self.stdout.write(f"Recorded word positions for {count} lines.")
+
+    def index_phonetic(self):
+        """Record the phonetic key of every word that has none."""
+        words = Word.objects.filter(phonetic="").only("id", "text")
+
+        count = 0
+        for batch in self._batches(words):
+            for word in batch:
+                word.phonetic = phonetic_key(word.text)
+            with transaction.atomic():
+                Word.objects.bulk_update(batch, ["phonetic"])
+                SongService.corpus_changed(TableService())
+            count += len(batch)
+
+        self.stdout.write(f"Recorded phonetic keys for {count} words.")
+
+    def index_rhymes(self):
+        """Record the rhyme key of every line that has none."""
+        lines = Line.objects.filter(rhyme="").only("id", "lyrics")
+
+        count = 0
+        for batch in self._batches(lines):
+            for line in batch:
+                line.rhyme = line_rhyme(SongService.parse_tokens(line.lyrics))
+            with transaction.atomic():
+                Line.objects.bulk_update(batch, ["rhyme"])
+                SongService.corpus_changed(TableService())
+            count += len(batch)
+
+        self.stdout.write(f"Recorded rhymes for {count} lines.")
+
+    def index_search_vectors(self):
+        """Fill in the search vector of every line that has none. Postgres only."""
+        if connection.vendor != "postgresql":
+            self.stdout.write("Skipped search vectors: they need Postgres.")
+            return
+
+        table_service = TableService()
+        table = table_service.get_table("line")
+        lines = Line.objects.filter(search_vector__isnull=True).only("id")
+
+        count = 0
+        for batch in self._batches(lines):
+            with transaction.atomic():
+                table.save_search_vectors(batch)
+                SongService.corpus_changed(table_service)
+            count += len(batch)
+
+        self.stdout.write(f"Filled in search vectors for {count} lines.")
+
+    def _batches(self, rows):
+        """
+        Yield *rows* in batches, paging by primary key.
+
+        Paging by key rather than holding one cursor open keeps each batch's writes
+        clear of the read, and a run stopped part-way resumes where it left off.
+        Each batch is written as its own corpus change, so searches see the batches
+        written so far even if the run stops part-way.
+        """
+        last_pk = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk).order_by("pk")[:BATCH_SIZE])
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
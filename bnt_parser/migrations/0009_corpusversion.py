@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0008_remove_rejectedtrack_bnt_parser_rejectedtrack_reason_reasonenum_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorpusVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Corpus Version',
+                'verbose_name_plural': 'Corpus Versions',
+            },
+        ),
+    ]
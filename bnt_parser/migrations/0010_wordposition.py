@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0009_corpusversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_positions', to='bnt_parser.line')),
+                ('word', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='bnt_parser.word')),
+            ],
+            options={
+                'verbose_name': 'Word Position',
+                'verbose_name_plural': 'Word Positions',
+                'indexes': [models.Index(fields=['line', 'position'], name='word_position_line_idx')],
+            },
+        ),
+    ]
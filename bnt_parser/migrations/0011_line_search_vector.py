@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:09
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Created by hand rather than as a Meta index: GIN is Postgres-only, and the test
+# suite also runs on SQLite, which would reject the index.
+INDEX_NAME = 'line_search_vector_gin_idx'
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {INDEX_NAME} ON bnt_parser_line USING gin (search_vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0010_wordposition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='line',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_gin_index, reverse_code=drop_gin_index),
+    ]
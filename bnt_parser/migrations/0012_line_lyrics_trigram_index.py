@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Postgres-only, like the search vector index in 0011. Built on UPPER(lyrics)
+# because that is the expression Django's icontains compares on Postgres; an index
+# on the bare column would never be used for it.
+INDEX_NAME = 'line_lyrics_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX {INDEX_NAME} ON bnt_parser_line USING gin (UPPER(lyrics) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0011_line_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, reverse_code=drop_trigram_index),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:14
+
+import django.db.models.deletion
+import django_enum.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0012_line_lyrics_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=63, unique=True)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('song_count', models.PositiveIntegerField(default=0)),
+                ('writer_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Word Frequency',
+                'verbose_name_plural': 'Word Frequencies',
+            },
+        ),
+        migrations.CreateModel(
+            name='WordSectionFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section_type', django_enum.fields.EnumCharField(choices=[('INTRO', 'Intro'), ('VERSE', 'Verse'), ('PRECHORUS', 'Pre-Chorus'), ('CHORUS', 'Chorus'), ('POSTCHORUS', 'Post-Chorus'), ('BRIDGE', 'Bridge'), ('BREAKDOWN', 'Breakdown'), ('SPOKEN', 'Spoken'), ('CODA', 'Coda'), ('OUTRO', 'Outro'), ('OTHER', 'Other')], max_length=10)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('song_count', models.PositiveIntegerField(default=0)),
+                ('frequency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='by_section_type', to='bnt_parser.wordfrequency')),
+            ],
+            options={
+                'verbose_name': 'Word Section Frequency',
+                'verbose_name_plural': 'Word Section Frequencies',
+                'constraints': [models.UniqueConstraint(fields=('frequency', 'section_type'), name='word_section_frequency_unique'), models.CheckConstraint(condition=models.Q(('section_type__in', ['INTRO', 'VERSE', 'PRECHORUS', 'CHORUS', 'POSTCHORUS', 'BRIDGE', 'BREAKDOWN', 'SPOKEN', 'CODA', 'OUTRO', 'OTHER'])), name='bnt_parser_WordSectionFrequency_section_type_SectionTypeEnum')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WordWriterFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('song_count', models.PositiveIntegerField(default=0)),
+                ('frequency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='by_writer', to='bnt_parser.wordfrequency')),
+                ('writer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_frequencies', to='bnt_parser.writer')),
+            ],
+            options={
+                'verbose_name': 'Word Writer Frequency',
+                'verbose_name_plural': 'Word Writer Frequencies',
+                'constraints': [models.UniqueConstraint(fields=('frequency', 'writer'), name='word_writer_frequency_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0013_wordfrequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('neighbour', models.CharField(max_length=63)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('frequency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='bnt_parser.wordfrequency')),
+            ],
+            options={
+                'verbose_name': 'Word Pair',
+                'verbose_name_plural': 'Word Pairs',
+                'indexes': [models.Index(fields=['frequency', '-line_count'], name='word_pair_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('frequency', 'neighbour'), name='word_pair_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WordWriterPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('neighbour', models.CharField(max_length=63)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('frequency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='bnt_parser.wordwriterfrequency')),
+            ],
+            options={
+                'verbose_name': 'Word Writer Pair',
+                'verbose_name_plural': 'Word Writer Pairs',
+                'indexes': [models.Index(fields=['frequency', '-line_count'], name='word_writer_pair_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('frequency', 'neighbour'), name='word_writer_pair_unique')],
+            },
+        ),
+    ]
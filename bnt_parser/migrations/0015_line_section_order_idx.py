@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0014_wordpair'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='line',
+            index=models.Index(fields=['section', 'order'], name='line_section_order_idx'),
+        ),
+    ]
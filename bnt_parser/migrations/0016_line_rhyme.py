@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0015_line_section_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='line',
+            name='rhyme',
+            field=models.CharField(blank=True, db_index=True, max_length=63),
+        ),
+    ]
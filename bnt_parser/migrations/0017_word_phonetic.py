@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0016_line_rhyme'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='phonetic',
+            field=models.CharField(blank=True, db_index=True, max_length=63),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0017_word_phonetic'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='word',
+            name='text',
+            field=models.CharField(db_index=True, max_length=63),
+        ),
+        migrations.AddIndex(
+            model_name='externalsource',
+            index=models.Index(fields=['source', 'external_id'], name='external_source_id_idx'),
+        ),
+    ]
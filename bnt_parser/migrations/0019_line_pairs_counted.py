@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0018_lookup_indexes'),
+    ]
+
+    operations = [
+        # Lines saved so far had their pairs counted as they were saved, so they
+        # start out counted; only lines saved from now on are left to the cron job.
+        migrations.AddField(
+            model_name='line',
+            name='pairs_counted',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='line',
+            name='pairs_counted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='line',
+            index=models.Index(condition=models.Q(('pairs_counted', False)), fields=['id'], name='line_pairs_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bnt_parser', '0019_line_pairs_counted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corpusversion',
+            name='pair_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django_enum import EnumField
 
@@ -20,11 +21,40 @@ class ExternalSource(models.Model):
     class Meta:
         verbose_name = "External Source"
         verbose_name_plural = "External Sources"
+        # Every track offered for ingest is checked against the saved songs by id.
+        indexes = [
+            models.Index(fields=["source", "external_id"], name="external_source_id_idx"),
+        ]
 
     def __str__(self):
         return self.endpoint
 
 
+class CorpusVersion(models.Model):
+    """
+    Model to hold a counter that moves whenever the searchable corpus changes.
+
+    A single row. Anything derived from the corpus — cached search responses, the
+    in-memory search indexes, ETags — records the version it was built from and is
+    stale once the counter has moved. Kept in the database rather than in memory so
+    every server worker sees a bump made by any one of them.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    # Moves when the count_word_pairs cron job counts more pairs. Kept apart from
+    # version, which it would otherwise move on every run, staling every search
+    # cache and index for a change only the word neighbours endpoint reads.
+    pair_version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Corpus Version"
+        verbose_name_plural = "Corpus Versions"
+
+    def __str__(self):
+        return f"Corpus version {self.version}"
+
+
 class RejectedTrack(models.Model):
     """
     Model to record a track that was inspected and deliberately not stored.
@@ -173,9 +203,19 @@ class Line(models.Model):
     Model to represent a line of lyrics within a section.
     """
 
+    # Trigram-indexed on Postgres by migration 0012, for substring search.
     lyrics = models.TextField(blank=False)
     order = models.PositiveIntegerField(blank=False)
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="lines")
+    # Postgres full-text form of the lyrics, for the "postgres" search engine. Filled
+    # in by LineTable on Postgres only, and GIN-indexed there by migration 0011; on
+    # any other database it stays empty.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # The rhyme key of the line's final word (see utils.rhyme), for rhyme search.
+    rhyme = models.CharField(max_length=63, blank=True, db_index=True)
+    # Whether the line's word pairs are in the co-occurrence counts. Saving lyrics
+    # leaves it False; the count_word_pairs cron job counts the line and sets it.
+    pairs_counted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -186,6 +226,16 @@ class Line(models.Model):
             "section__order",
             "order",
         ]  # Ensure lines are ordered by section and then by their order
+        # Search results read the lines around a match by range on (section, order).
+        # The pending index holds only lines still to count, so it stays small.
+        indexes = [
+            models.Index(fields=["section", "order"], name="line_section_order_idx"),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(pairs_counted=False),
+                name="line_pairs_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.lyrics
@@ -196,7 +246,10 @@ class Word(models.Model):
     Model to represent a word used in lyrics.
     """
 
-    text = models.CharField(max_length=63, blank=False)
+    # Indexed for the by-text lookups every word search and save makes.
+    text = models.CharField(max_length=63, blank=False, db_index=True)
+    # The Metaphone key of the text (see utils.phonetic), for sound-alike search.
+    phonetic = models.CharField(max_length=63, blank=True, db_index=True)
     line = models.ManyToManyField(Line, related_name="words", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -208,3 +261,156 @@ class Word(models.Model):
 
     def __str__(self):
         return self.text
+
+
+class WordPosition(models.Model):
+    """
+    Model to record where in a line a word appears.
+
+    Word.line only says that a word is somewhere on a line. Phrase search needs the
+    order too, so each occurrence is kept here with its 0-based word position.
+    Forms split off a word (a possessive's base, a hyphenated word's parts) share
+    the position of the word they came from.
+    """
+
+    word = models.ForeignKey(Word, on_delete=models.CASCADE, related_name="positions")
+    line = models.ForeignKey(Line, on_delete=models.CASCADE, related_name="word_positions")
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = "Word Position"
+        verbose_name_plural = "Word Positions"
+        # Phrase search looks up each candidate word by (line, position); the word
+        # foreign key already has its own index for finding a word's occurrences.
+        indexes = [
+            models.Index(fields=["line", "position"], name="word_position_line_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.word} at {self.position} in line {self.line_id}"
+
+
+class WordFrequency(models.Model):
+    """
+    Model to hold how often a word text is used across the corpus.
+
+    Kept up to date as lyrics are saved, so word counts can be read without
+    touching the Word.line join table. Keyed by text rather than by Word, since a
+    search is by text and text is not unique among words. Broken down further by
+    WordWriterFrequency and WordSectionFrequency.
+    """
+
+    text = models.CharField(max_length=63, unique=True)
+    line_count = models.PositiveIntegerField(default=0)
+    song_count = models.PositiveIntegerField(default=0)
+    writer_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Word Frequency"
+        verbose_name_plural = "Word Frequencies"
+
+    def __str__(self):
+        return f"{self.text}: {self.line_count} lines in {self.song_count} songs"
+
+
+class WordWriterFrequency(models.Model):
+    """
+    Model to hold how often one writer's songs use a word text.
+    """
+
+    frequency = models.ForeignKey(WordFrequency, on_delete=models.CASCADE, related_name="by_writer")
+    writer = models.ForeignKey(Writer, on_delete=models.CASCADE, related_name="word_frequencies")
+    line_count = models.PositiveIntegerField(default=0)
+    song_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Word Writer Frequency"
+        verbose_name_plural = "Word Writer Frequencies"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["frequency", "writer"], name="word_writer_frequency_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency.text} by {self.writer}: {self.line_count} lines"
+
+
+class WordSectionFrequency(models.Model):
+    """
+    Model to hold how often a word text is used in one type of section.
+    """
+
+    frequency = models.ForeignKey(
+        WordFrequency, on_delete=models.CASCADE, related_name="by_section_type"
+    )
+    section_type = EnumField(Section.SectionTypeEnum, blank=False)
+    line_count = models.PositiveIntegerField(default=0)
+    song_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Word Section Frequency"
+        verbose_name_plural = "Word Section Frequencies"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["frequency", "section_type"], name="word_section_frequency_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency.text} in {self.section_type}: {self.line_count} lines"
+
+
+class WordPair(models.Model):
+    """
+    Model to hold how many lines use a word text together with another.
+
+    Each pair is stored both ways round, so a word's neighbours are read from its
+    own rows, busiest first, without a self-join on the Word.line join table.
+    """
+
+    frequency = models.ForeignKey(WordFrequency, on_delete=models.CASCADE, related_name="pairs")
+    neighbour = models.CharField(max_length=63)
+    line_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Word Pair"
+        verbose_name_plural = "Word Pairs"
+        constraints = [
+            models.UniqueConstraint(fields=["frequency", "neighbour"], name="word_pair_unique"),
+        ]
+        # Top neighbours are read in descending line count.
+        indexes = [
+            models.Index(fields=["frequency", "-line_count"], name="word_pair_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency.text} with {self.neighbour}: {self.line_count} lines"
+
+
+class WordWriterPair(models.Model):
+    """
+    Model to hold how many lines of one writer's songs use a word text together
+    with another.
+    """
+
+    frequency = models.ForeignKey(
+        WordWriterFrequency, on_delete=models.CASCADE, related_name="pairs"
+    )
+    neighbour = models.CharField(max_length=63)
+    line_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Word Writer Pair"
+        verbose_name_plural = "Word Writer Pairs"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["frequency", "neighbour"], name="word_writer_pair_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["frequency", "-line_count"], name="word_writer_pair_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency} with {self.neighbour}: {self.line_count} lines"
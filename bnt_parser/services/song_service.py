@@ -3,10 +3,15 @@ import re
 from functools import reduce
 from re import Pattern
 
+from django.db import transaction
+
 from bnt_parser.clients.genius_client import GeniusClient
 from bnt_parser.models import ExternalSource, Line, RejectedTrack
 from bnt_parser.services.table_service import TableService
+from bnt_parser.signals import song_saved
 from bnt_parser.utils.genius_page import GeniusPage
+from bnt_parser.utils.rhyme import line_rhyme
+from bnt_parser.utils.timing import span
 
 # HTTP statuses from a Genius page fetch that are a verdict about the track rather
 # than about the machine asking. 403 is bot detection and 5xx is an outage: both are
@@ -53,6 +58,24 @@ class SongService:
             for relationship in genius_record.get("song_relationships", [])
         )
 
+    @staticmethod
+    def corpus_changed(table_service: TableService, song=None) -> None:
+        """
+        Record a change to searchable data. Call it inside the transaction making it.
+
+        Every path that writes the corpus goes through here. The version is bumped
+        in the same transaction, so search caches never see a new version without
+        the change that caused it, or the change without the new version. song_saved
+        follows the commit, with *song* when the change is one song's; it is sent
+        robustly, since the change is committed by then and must not be reported
+        as failed because a receiver was.
+        """
+        table_service.get_table("corpus_version").bump()
+        transaction.on_commit(
+            lambda: song_saved.send(sender=SongService, song=song),
+            robust=True,
+        )
+
     def reject_track(self, track_data: dict, reason: RejectedTrack.ReasonEnum) -> None:
         """
         Record a track as rejected so later runs skip it without re-fetching.
@@ -322,10 +345,15 @@ class SongService:
             "lines": [],
         }
 
-    def parse_words(self, line: str) -> list[str]:
+    @staticmethod
+    def parse_tokens(line: str) -> list[list[str]]:
         """
-        Parse a line into individual words.
-        This is a simple implementation and can be enhanced as needed.
+        Parse a line into its words in order, one entry per word position.
+
+        Each entry lists the forms indexed at that position, the word itself first.
+        A possessive adds its base word and a hyphenated word adds each part, all at
+        the position of the word they came from, so a phrase search for "test line"
+        does not match "test-line" but one for "app" still finds "app's".
         """
         split_pattern: Pattern[str] = re.compile(r"[ /&]")
         words = split_pattern.split(line)
@@ -333,20 +361,21 @@ class SongService:
         strip_pattern: Pattern[str] = re.compile(r"(^\W+|\W+$)")
         possessive_pattern: Pattern[str] = re.compile(r"('s)$")
         hyphen_pattern: Pattern[str] = re.compile(r"(^\w+-\w+$)")
-        stripped_words = set()
+        tokens = []
 
         for word in words:
             # Strip punctuation from start and end of the word; save word
             word = strip_pattern.sub("", word)
-            if word:
-                stripped_words.add(word.lower())
+            if not word:
+                continue
+            forms = [word.lower()]
 
             # Detect possessives; save the base word in addition to the possessive form
             possessive = possessive_pattern.search(word)
             if possessive:
                 base_word = possessive_pattern.sub("", word)
                 if base_word:
-                    stripped_words.add(base_word.lower())
+                    forms.append(base_word.lower())
 
             # Detect hyphenated words; save each part separately
             hyphenated = hyphen_pattern.match(word)
@@ -354,9 +383,18 @@ class SongService:
                 parts = word.split("-")
                 for part in parts:
                     if part:
-                        stripped_words.add(part.lower())
+                        forms.append(part.lower())
+
+            tokens.append(list(dict.fromkeys(forms)))
 
-        return sorted(list(stripped_words))
+        return tokens
+
+    def parse_words(self, line: str) -> list[str]:
+        """
+        Parse a line into individual words.
+        This is a simple implementation and can be enhanced as needed.
+        """
+        return sorted({form for forms in self.parse_tokens(line) for form in forms})
 
     def save_lyrics(self):
         """
@@ -378,6 +416,7 @@ class SongService:
         section_table = self.table_service.get_table("section")
         line_table = self.table_service.get_table("line")
         line_words: list[tuple[Line, list[str]]] = []
+        line_tokens: list[tuple[Line, list[list[str]]]] = []
 
         for section in self.sections:
             section_object = section_table.save(
@@ -387,13 +426,21 @@ class SongService:
             )
 
             for line_order, line in enumerate(section["lines"], start=1):
+                tokens = self.parse_tokens(line)
                 line_object = line_table.save(
                     lyrics=line,
                     order=line_order,
                     section=section_object,
+                    rhyme=line_rhyme(tokens),
                 )
 
                 line_words.append((line_object, self.parse_words(line)))
+                line_tokens.append((line_object, tokens))
 
         # Batched rather than saved per word; see WordTable.save_all.
-        self.table_service.get_table("word").save_all(line_words)
+        with span("words"):
+            self.table_service.get_table("word").save_all(line_words)
+        with span("word_positions"):
+            self.table_service.get_table("word_position").save_all(line_tokens)
+        with span("search_vectors"):
+            line_table.save_search_vectors([line for line, _ in line_tokens])
@@ -1,15 +1,20 @@
+from bnt_parser.tables.corpus_version_table import CorpusVersionTable
 from bnt_parser.tables.external_source_table import ExternalSourceTable
 from bnt_parser.tables.line_table import LineTable
 from bnt_parser.tables.rejected_track_table import RejectedTrackTable
 from bnt_parser.tables.release_table import ReleaseTable
 from bnt_parser.tables.section_table import SectionTable
 from bnt_parser.tables.song_table import SongTable
+from bnt_parser.tables.word_frequency_table import WordFrequencyTable
+from bnt_parser.tables.word_pair_table import WordPairTable
+from bnt_parser.tables.word_position_table import WordPositionTable
 from bnt_parser.tables.word_table import WordTable
 from bnt_parser.tables.writer_table import WriterTable
 
 
 class TableService:
     TABLE_NAMES = {
+        "corpus_version": CorpusVersionTable,
         "external_source": ExternalSourceTable,
         "line": LineTable,
         "rejected_track": RejectedTrackTable,
@@ -17,6 +22,9 @@ class TableService:
         "section": SectionTable,
         "song": SongTable,
         "word": WordTable,
+        "word_frequency": WordFrequencyTable,
+        "word_pair": WordPairTable,
+        "word_position": WordPositionTable,
         "writer": WriterTable,
     }
     TABLES = {}
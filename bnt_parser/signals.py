@@ -0,0 +1,13 @@
+from django.dispatch import Signal
+
+# Sent once a change to the corpus has been committed, with the saved Song as
+# "song", or None for a change not confined to one song (a recount or reindex).
+# Anything derived from the corpus listens for this to refresh itself. Sent by
+# SongService.corpus_changed, never directly.
+# Always sent after the commit, never inside the transaction: a receiver reading
+# the corpus mid-transaction would see the song, then keep it after a rollback.
+song_saved = Signal()
+
+# Sent once new Word rows have been committed, with their texts as "texts". Lets
+# vocabulary structures take in the new words without rereading every word.
+words_added = Signal()
@@ -0,0 +1,39 @@
+from django.db.models import F
+
+from bnt_parser.models import CorpusVersion
+
+# The counter lives in one row with a fixed key.
+_ROW_ID = 1
+
+
+class CorpusVersionTable:
+    """
+    Class representing the corpus version counter in the database.
+    This class is responsible for reading and advancing it.
+    """
+
+    def current(self, counter: str = "version") -> int:
+        """
+        Read the current corpus version.
+
+        :param counter: The counter to read: "version", or "pair_version" for the
+            word pair counts.
+        :return: The version, or 0 if the corpus has never changed.
+        """
+        version = CorpusVersion.objects.filter(pk=_ROW_ID).values_list(counter, flat=True)
+
+        return version.first() or 0
+
+    def bump(self, counter: str = "version") -> None:
+        """
+        Advance the corpus version by one.
+
+        Called inside the transaction that changes the corpus, so the new version
+        commits or rolls back with the change it marks. The increment is done in the
+        database, so two concurrent bumps cannot both read the same old value.
+
+        :param counter: The counter to advance, as for current().
+        """
+        updated = CorpusVersion.objects.filter(pk=_ROW_ID).update(**{counter: F(counter) + 1})
+        if not updated:
+            CorpusVersion.objects.get_or_create(pk=_ROW_ID, defaults={counter: 1})
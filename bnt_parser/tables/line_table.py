@@ -1,20 +1,42 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+
 from bnt_parser.models import Line, Section
 
 
 class LineTable:
-    def save(self, lyrics: str, order: int, section: Section) -> Line:
+    def save(self, lyrics: str, order: int, section: Section, rhyme: str = "") -> Line:
         """
         Save a new line record in the DB.
 
         :param lyrics: The lyrics of the line.
         :param order: The order of the line within the section.
         :param section: The Section object the line belongs to.
+        :param rhyme: The rhyme key of the line's final word.
         """
         line = Line(
             lyrics=lyrics,
             order=order,
             section=section,
+            rhyme=rhyme,
         )
         line.save()
 
         return line
+
+    def save_search_vectors(self, lines: list[Line]) -> None:
+        """
+        Fill in the full-text search vector of the given lines in one query.
+
+        The vector is computed by Postgres from the saved lyrics, so this does
+        nothing on any other database.
+
+        :param lines: Saved Line objects.
+        """
+        if connection.vendor != "postgresql" or not lines:
+            return
+
+        Line.objects.filter(pk__in=[line.pk for line in lines]).update(
+            search_vector=SearchVector("lyrics", config=settings.SEARCH_FTS_CONFIG)
+        )
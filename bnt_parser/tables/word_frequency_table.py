@@ -0,0 +1,255 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+
+from bnt_parser.models import (
+    Line,
+    Word,
+    WordFrequency,
+    WordSectionFrequency,
+    WordWriterFrequency,
+    Writer,
+)
+
+_CHUNK_SIZE = 2000
+# The most rows one increment UPDATE names, to stay inside SQLite's parameter limit.
+_UPDATE_CHUNK_SIZE = 10_000
+
+
+def increment_counts(model, increments: dict[int, tuple[tuple[str, int], ...]]) -> None:
+    """
+    Add to the count fields of rows, by primary key, with F() increments.
+
+    Rows due the same increments share one UPDATE, so the query count follows the
+    number of distinct increments, which stays small, rather than the number of
+    rows. bulk_update() with an F() per row builds a CASE branch for every row,
+    which costs seconds of query compilation once thousands of rows change.
+
+    :param increments: Each row's primary key, mapped to (field, amount) pairs.
+    """
+    rows_by_increment = defaultdict(list)
+    for pk, amounts in increments.items():
+        rows_by_increment[amounts].append(pk)
+
+    for amounts, pks in rows_by_increment.items():
+        for start in range(0, len(pks), _UPDATE_CHUNK_SIZE):
+            model.objects.filter(pk__in=pks[start : start + _UPDATE_CHUNK_SIZE]).update(
+                **{field: F(field) + amount for field, amount in amounts}
+            )
+
+
+class WordFrequencyTable:
+    """
+    Class representing the word frequency tables in the database.
+    This class is responsible for keeping per-word usage counts up to date.
+    """
+
+    def record(self, line_words: list[tuple[Line, list[str]]]) -> None:
+        """
+        Add the words of the given lines to the frequency counts.
+
+        Must run before the lines are linked to their words, and after the song's
+        writers are linked to it, as save_song() does before save_lyrics(). A word already linked
+        to a line, or already used in a song, is not counted again, so re-saving
+        lines leaves the counts as they were. Counts are raised with F() increments
+        rather than overwritten, and the query count follows the number of distinct
+        increments (see increment_counts), not the number of lines or words.
+
+        :param line_words: Pairs of a saved Line and the words parsed from it.
+        """
+        line_ids = {line.pk for line, words in line_words if words}
+        if not line_ids:
+            return
+        texts = {text for _, words in line_words for text in words}
+
+        placement = {
+            line_id: (song_id, section_type)
+            for line_id, song_id, section_type in Line.objects.filter(pk__in=line_ids)
+            .order_by()
+            .values_list("id", "section__song_id", "section__type")
+        }
+        song_ids = {song_id for song_id, _ in placement.values()}
+        writers_by_song = defaultdict(list)
+        authorship = Writer.songs.through.objects.filter(song_id__in=song_ids)
+        for song_id, writer_id in authorship.values_list("song_id", "writer_id"):
+            writers_by_song[song_id].append(writer_id)
+
+        # What these songs already hold, so that only new uses are counted.
+        seen_lines, seen_songs, seen_sections = set(), set(), set()
+        existing = Word.line.through.objects.filter(
+            word__text__in=texts, line__section__song_id__in=song_ids
+        ).values_list("word__text", "line_id", "line__section__song_id", "line__section__type")
+        for text, line_id, song_id, section_type in existing:
+            seen_lines.add((text, line_id))
+            seen_songs.add((text, song_id))
+            seen_sections.add((text, song_id, section_type))
+
+        lines, songs = Counter(), Counter()
+        writer_lines, writer_songs = Counter(), Counter()
+        section_lines, section_songs = Counter(), Counter()
+        for line, words in line_words:
+            if not words:
+                continue
+            song_id, section_type = placement[line.pk]
+            writer_ids = writers_by_song[song_id]
+            for text in set(words):
+                if (text, line.pk) in seen_lines:
+                    continue
+                seen_lines.add((text, line.pk))
+                lines[text] += 1
+                section_lines[text, section_type] += 1
+                for writer_id in writer_ids:
+                    writer_lines[text, writer_id] += 1
+
+                if (text, song_id) not in seen_songs:
+                    seen_songs.add((text, song_id))
+                    songs[text] += 1
+                    for writer_id in writer_ids:
+                        writer_songs[text, writer_id] += 1
+                if (text, song_id, section_type) not in seen_sections:
+                    seen_sections.add((text, song_id, section_type))
+                    section_songs[text, section_type] += 1
+
+        if not lines:
+            return
+
+        frequencies = self._find_or_create(set(lines))
+        new_writers = self._add_counts(
+            WordWriterFrequency, "writer_id", frequencies, writer_lines, writer_songs
+        )
+        self._add_counts(
+            WordSectionFrequency, "section_type", frequencies, section_lines, section_songs
+        )
+
+        increment_counts(
+            WordFrequency,
+            {
+                frequency.pk: (
+                    ("line_count", lines[text]),
+                    ("song_count", songs[text]),
+                    ("writer_count", new_writers[text]),
+                )
+                for text, frequency in frequencies.items()
+            },
+        )
+
+    def _find_or_create(self, texts: set[str]) -> dict[str, WordFrequency]:
+        """Return the WordFrequency row of each text, creating any that are missing."""
+        frequencies = {f.text: f for f in WordFrequency.objects.filter(text__in=texts)}
+        missing = texts - frequencies.keys()
+        if missing:
+            WordFrequency.objects.bulk_create([WordFrequency(text=text) for text in missing])
+            frequencies = {f.text: f for f in WordFrequency.objects.filter(text__in=texts)}
+        return frequencies
+
+    def _add_counts(
+        self,
+        model,
+        key_field: str,
+        frequencies: dict[str, WordFrequency],
+        line_counts: Counter,
+        song_counts: Counter,
+    ) -> Counter:
+        """
+        Add counts to one breakdown table, keyed by (text, key_field value).
+
+        :return: How many breakdown rows were created for each text.
+        """
+        if not line_counts:
+            return Counter()
+
+        rows = model.objects.filter(
+            frequency__in=frequencies.values(),
+            **{f"{key_field}__in": {key for _, key in line_counts}},
+        ).values_list("frequency_id", key_field, "id")
+        existing = {(frequency_id, key): pk for frequency_id, key, pk in rows}
+
+        created, updated = [], {}
+        new_per_text = Counter()
+        for (text, key), line_count in line_counts.items():
+            song_count = song_counts[text, key]
+            pk = existing.get((frequencies[text].pk, key))
+            if pk is None:
+                created.append(
+                    model(
+                        frequency=frequencies[text],
+                        line_count=line_count,
+                        song_count=song_count,
+                        **{key_field: key},
+                    )
+                )
+                new_per_text[text] += 1
+            else:
+                updated[pk] = (("line_count", line_count), ("song_count", song_count))
+
+        model.objects.bulk_create(created)
+        increment_counts(model, updated)
+        return new_per_text
+
+    def rebuild(self) -> int:
+        """
+        Recount every word from the Word.line join table, replacing all counts.
+
+        :return: The number of word texts counted.
+        """
+        WordFrequency.objects.all().delete()
+
+        links = Word.line.through.objects.order_by()
+        totals = links.values("word__text").annotate(
+            lines=Count("line_id", distinct=True),
+            songs=Count("line__section__song_id", distinct=True),
+            writers=Count("line__section__song__writers", distinct=True),
+        )
+        WordFrequency.objects.bulk_create(
+            (
+                WordFrequency(
+                    text=row["word__text"],
+                    line_count=row["lines"],
+                    song_count=row["songs"],
+                    writer_count=row["writers"],
+                )
+                for row in totals.iterator(chunk_size=_CHUNK_SIZE)
+            ),
+            batch_size=_CHUNK_SIZE,
+        )
+        frequency_ids = dict(WordFrequency.objects.values_list("text", "id"))
+
+        by_writer = (
+            links.filter(line__section__song__writers__isnull=False)
+            .values("word__text", "line__section__song__writers")
+            .annotate(
+                lines=Count("line_id", distinct=True),
+                songs=Count("line__section__song_id", distinct=True),
+            )
+        )
+        WordWriterFrequency.objects.bulk_create(
+            (
+                WordWriterFrequency(
+                    frequency_id=frequency_ids[row["word__text"]],
+                    writer_id=row["line__section__song__writers"],
+                    line_count=row["lines"],
+                    song_count=row["songs"],
+                )
+                for row in by_writer.iterator(chunk_size=_CHUNK_SIZE)
+            ),
+            batch_size=_CHUNK_SIZE,
+        )
+
+        by_section_type = links.values("word__text", "line__section__type").annotate(
+            lines=Count("line_id", distinct=True),
+            songs=Count("line__section__song_id", distinct=True),
+        )
+        WordSectionFrequency.objects.bulk_create(
+            (
+                WordSectionFrequency(
+                    frequency_id=frequency_ids[row["word__text"]],
+                    section_type=row["line__section__type"],
+                    line_count=row["lines"],
+                    song_count=row["songs"],
+                )
+                for row in by_section_type.iterator(chunk_size=_CHUNK_SIZE)
+            ),
+            batch_size=_CHUNK_SIZE,
+        )
+
+        return len(frequency_ids)
@@ -0,0 +1,218 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+
+from bnt_parser.models import (
+    Line,
+    Word,
+    WordFrequency,
+    WordPair,
+    WordWriterFrequency,
+    WordWriterPair,
+    Writer,
+)
+from bnt_parser.tables.word_frequency_table import increment_counts
+
+_CHUNK_SIZE = 2000
+
+
+class WordPairTable:
+    """
+    Class representing the word co-occurrence tables in the database.
+    This class is responsible for counting which words share a line.
+    """
+
+    def count_pending(self, limit: int) -> int:
+        """
+        Add the word pairs of up to *limit* uncounted lines to the co-occurrence counts.
+
+        Saving lyrics does not count pairs: a long song's lines hold tens of
+        thousands of them, too many to count inside the request that saves it. The
+        count_word_pairs cron job calls this instead, until it returns fewer than
+        *limit*. Call it in a transaction, so that the counts and the lines'
+        pairs_counted flags commit together; a line is counted once, however often
+        this runs. Pairs are stored against the word frequency rows, which saving
+        the lyrics has already recorded.
+
+        :param limit: The most lines to count.
+        :return: The number of lines counted.
+        """
+        # Skipping locked lines lets two runs at once share out the work, on Postgres.
+        line_ids = list(
+            Line.objects.filter(pairs_counted=False)
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not line_ids:
+            return 0
+
+        words_by_line = defaultdict(set)
+        links = Word.line.through.objects.filter(line_id__in=line_ids)
+        for line_id, text in links.values_list("line_id", "word__text"):
+            words_by_line[line_id].add(text)
+        song_of_line = dict(
+            Line.objects.filter(pk__in=words_by_line)
+            .order_by()
+            .values_list("id", "section__song_id")
+        )
+        writers_by_song = defaultdict(list)
+        authorship = Writer.songs.through.objects.filter(song_id__in=set(song_of_line.values()))
+        for song_id, writer_id in authorship.values_list("song_id", "writer_id"):
+            writers_by_song[song_id].append(writer_id)
+
+        pairs, writer_pairs = Counter(), Counter()
+        for line_id, words in words_by_line.items():
+            writer_ids = writers_by_song[song_of_line[line_id]]
+            for text in words:
+                for neighbour in words:
+                    if neighbour == text:
+                        continue
+                    pairs[text, neighbour] += 1
+                    for writer_id in writer_ids:
+                        writer_pairs[text, writer_id, neighbour] += 1
+
+        if pairs:
+            self._record(pairs, writer_pairs)
+        Line.objects.filter(pk__in=line_ids).update(pairs_counted=True)
+
+        return len(line_ids)
+
+    def _record(self, pairs: Counter, writer_pairs: Counter) -> None:
+        """
+        Add pair counts, keyed by (text, neighbour) and (text, writer id, neighbour).
+
+        A pair whose frequency row does not exist is skipped rather than failing
+        the batch: a writer linked to a song after its lyrics were saved has no
+        WordWriterFrequency rows for them until rebuild_word_frequencies runs, and
+        the rebuild counts the skipped pairs along with the rest.
+        """
+        texts = {text for text, _ in pairs}
+        frequency_ids = dict(WordFrequency.objects.filter(text__in=texts).values_list("text", "id"))
+        self._add_counts(
+            WordPair,
+            {
+                (frequency_ids[text], neighbour): count
+                for (text, neighbour), count in pairs.items()
+                if text in frequency_ids
+            },
+        )
+        missing = texts - frequency_ids.keys()
+
+        if writer_pairs:
+            writer_frequency_ids = {
+                (text, writer_id): frequency_id
+                for text, writer_id, frequency_id in WordWriterFrequency.objects.filter(
+                    frequency__text__in=texts,
+                    writer_id__in={writer_id for _, writer_id, _ in writer_pairs},
+                ).values_list("frequency__text", "writer_id", "id")
+            }
+            self._add_counts(
+                WordWriterPair,
+                {
+                    (writer_frequency_ids[text, writer_id], neighbour): count
+                    for (text, writer_id, neighbour), count in writer_pairs.items()
+                    if (text, writer_id) in writer_frequency_ids
+                },
+            )
+            missing |= {
+                f"{text} (writer {writer_id})"
+                for text, writer_id, _ in writer_pairs
+                if (text, writer_id) not in writer_frequency_ids
+            }
+
+        if missing:
+            logging.warning(
+                "Skipped word pairs of %d words with no frequency row, e.g. %s; "
+                "run rebuild_word_frequencies to count them",
+                len(missing),
+                ", ".join(sorted(missing)[:5]),
+            )
+
+    def _add_counts(self, model, counts: dict[tuple[int, str], int]) -> None:
+        """Add line counts to one pair table, keyed by (frequency id, neighbour)."""
+        # Read as tuples: a batch can match tens of thousands of rows.
+        rows = model.objects.filter(
+            frequency_id__in={frequency_id for frequency_id, _ in counts},
+            neighbour__in={neighbour for _, neighbour in counts},
+        ).values_list("frequency_id", "neighbour", "id")
+        existing = {(frequency_id, neighbour): pk for frequency_id, neighbour, pk in rows}
+
+        created, updated = [], {}
+        for (frequency_id, neighbour), count in counts.items():
+            pk = existing.get((frequency_id, neighbour))
+            if pk is None:
+                created.append(
+                    model(frequency_id=frequency_id, neighbour=neighbour, line_count=count)
+                )
+            else:
+                updated[pk] = (("line_count", count),)
+
+        model.objects.bulk_create(created)
+        increment_counts(model, updated)
+
+    def rebuild(self) -> int:
+        """
+        Recount every pair from the Word.line join table, replacing all counts.
+        The word frequencies must be rebuilt first.
+
+        Every line is marked counted first and only marked lines are recounted, so
+        a line saved while this runs is left whole to count_pending().
+
+        :return: The number of word pairs counted, each way round.
+        """
+        WordPair.objects.all().delete()
+        WordWriterPair.objects.all().delete()
+        Line.objects.filter(pairs_counted=False).update(pairs_counted=True)
+
+        # Joining each link to the other words on its line gives one row per pair.
+        links = (
+            Word.line.through.objects.filter(line__pairs_counted=True)
+            .order_by()
+            .annotate(neighbour=F("line__words__text"))
+            .exclude(neighbour=F("word__text"))
+        )
+
+        frequency_ids = dict(WordFrequency.objects.values_list("text", "id"))
+        pairs = links.values("word__text", "neighbour").annotate(
+            lines=Count("line_id", distinct=True)
+        )
+        created = WordPair.objects.bulk_create(
+            (
+                WordPair(
+                    frequency_id=frequency_ids[row["word__text"]],
+                    neighbour=row["neighbour"],
+                    line_count=row["lines"],
+                )
+                for row in pairs.iterator(chunk_size=_CHUNK_SIZE)
+            ),
+            batch_size=_CHUNK_SIZE,
+        )
+
+        writer_frequency_ids = {
+            (text, writer_id): frequency_id
+            for text, writer_id, frequency_id in WordWriterFrequency.objects.values_list(
+                "frequency__text", "writer_id", "id"
+            )
+        }
+        writer_pairs = (
+            links.filter(line__section__song__writers__isnull=False)
+            .values("word__text", "line__section__song__writers", "neighbour")
+            .annotate(lines=Count("line_id", distinct=True))
+        )
+        WordWriterPair.objects.bulk_create(
+            (
+                WordWriterPair(
+                    frequency_id=writer_frequency_ids[
+                        row["word__text"], row["line__section__song__writers"]
+                    ],
+                    neighbour=row["neighbour"],
+                    line_count=row["lines"],
+                )
+                for row in writer_pairs.iterator(chunk_size=_CHUNK_SIZE)
+            ),
+            batch_size=_CHUNK_SIZE,
+        )
+
+        return len(created)
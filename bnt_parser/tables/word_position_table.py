@@ -0,0 +1,34 @@
+from bnt_parser.models import Line, WordPosition
+from bnt_parser.tables.word_table import WordTable
+
+
+class WordPositionTable:
+    """
+    Class representing the word position table in the database.
+    This class is responsible for recording where each word falls in its line.
+    """
+
+    def save_all(self, line_tokens: list[tuple[Line, list[list[str]]]]) -> None:
+        """
+        Save the position of every word form on the given lines in two queries.
+
+        The words must already exist; WordTable.save_all creates them from the same
+        lines. A form with no Word row is skipped rather than created here, so words
+        keep a single source.
+
+        :param line_tokens: Pairs of a saved Line and its tokens from parse_tokens.
+        """
+        texts = {form for _, tokens in line_tokens for forms in tokens for form in forms}
+        if not texts:
+            return
+
+        words_by_text = WordTable().find_words(texts)
+        WordPosition.objects.bulk_create(
+            [
+                WordPosition(word=words_by_text[form], line=line, position=position)
+                for line, tokens in line_tokens
+                for position, forms in enumerate(tokens)
+                for form in forms
+                if form in words_by_text
+            ]
+        )
@@ -1,4 +1,9 @@
+from django.db import transaction
+
 from bnt_parser.models import Line, Word
+from bnt_parser.signals import words_added
+from bnt_parser.tables.word_frequency_table import WordFrequencyTable
+from bnt_parser.utils.phonetic import phonetic_key
 
 
 class WordTable:
@@ -25,7 +30,7 @@ class WordTable:
         word_object = self.find_word(word=text)
 
         if word_object is None:
-            word_object = Word(text=text)
+            word_object = Word(text=text, phonetic=phonetic_key(text))
             word_object.save()
 
         word_object.line.add(line)
@@ -38,7 +43,8 @@ class WordTable:
 
         Saving word by word costs several round trips each, which is slow enough over a
         long-haul connection to the database to exhaust the request timeout on a large
-        song. This does the same work in three queries regardless of word count.
+        song. This does the same work in a fixed number of queries regardless of word
+        count, including keeping the word frequency counts up to date.
 
         :param line_words: Pairs of a saved Line and the words parsed from it.
         """
@@ -48,10 +54,19 @@ class WordTable:
 
         words_by_text = self.find_words(texts)
 
-        new_words = [Word(text=text) for text in sorted(texts - words_by_text.keys())]
+        new_words = [
+            Word(text=text, phonetic=phonetic_key(text))
+            for text in sorted(texts - words_by_text.keys())
+        ]
         if new_words:
             Word.objects.bulk_create(new_words)
             words_by_text = self.find_words(texts)
+            new_texts = [word.text for word in new_words]
+            transaction.on_commit(lambda: words_added.send(sender=WordTable, texts=new_texts))
+
+        # Before linking: the counts skip links that already exist. Word pairs are
+        # left to the count_word_pairs cron job; see WordPairTable.count_pending.
+        WordFrequencyTable().record(line_words)
 
         link_model = Word.line.through
         links = [
@@ -1,15 +1,19 @@
+import io
 import json
 import os
 import re
 from unittest.mock import MagicMock, call, patch
 
+from django.core.management import call_command
 from django.db import IntegrityError, connection, transaction
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.utils import CaptureQueriesContext
 
 # Test API clients
 from bnt_parser.clients.genius_client import GeniusClient
+from bnt_parser.cron import add_song, count_word_pairs
 from bnt_parser.models import (
+    CorpusVersion,
     ExternalSource,
     Line,
     RejectedTrack,
@@ -17,19 +21,31 @@ from bnt_parser.models import (
     Section,
     Song,
     Word,
+    WordFrequency,
+    WordPair,
+    WordPosition,
+    WordWriterPair,
     Writer,
 )
 from bnt_parser.services.song_service import SongService
 from bnt_parser.services.table_service import TableService
+from bnt_parser.signals import song_saved, words_added
+from bnt_parser.tables.corpus_version_table import CorpusVersionTable
 from bnt_parser.tables.external_source_table import ExternalSourceTable
 from bnt_parser.tables.line_table import LineTable
 from bnt_parser.tables.rejected_track_table import RejectedTrackTable
 from bnt_parser.tables.release_table import ReleaseTable
 from bnt_parser.tables.section_table import SectionTable
 from bnt_parser.tables.song_table import SongTable
+from bnt_parser.tables.word_frequency_table import WordFrequencyTable
+from bnt_parser.tables.word_pair_table import WordPairTable
+from bnt_parser.tables.word_position_table import WordPositionTable
 from bnt_parser.tables.word_table import WordTable
 from bnt_parser.tables.writer_table import WriterTable
+from bnt_parser.utils import timing
 from bnt_parser.utils.genius_page import GeniusPage
+from bnt_parser.utils.phonetic import phonetic_key
+from bnt_parser.utils.rhyme import line_rhyme, rhyme_key
 
 
 def table_lookup(**tables):
@@ -135,6 +151,84 @@ class GeniusPageTestCase(TestCase):
         assert before == after is False
 
 
+class RhymeKeyTestCase(TestCase):
+    def test_rhyme_key(self):
+        cases = {
+            "fire": "ire",
+            "Desire!": "ire",
+            "night": "ight",
+            "times": "imes",
+            "red": "ed",
+            "sky": "y",
+            "tree": "ee",
+            "hmm": "",
+        }
+        for word, key in cases.items():
+            assert rhyme_key(word) == key, word
+
+    def test_line_rhyme_uses_the_final_word(self):
+        assert line_rhyme(SongService.parse_tokens("Come on baby, light my fire.")) == "ire"
+        assert line_rhyme(SongService.parse_tokens("...")) == ""
+
+
+class PhoneticKeyTestCase(TestCase):
+    def test_sound_alikes_share_a_key(self):
+        pairs = [
+            ("tonite", "tonight"),
+            ("nite", "knight"),
+            ("luv", "love"),
+            ("cuz", "cause"),
+            ("thru", "through"),
+            ("hi", "high"),
+            ("fone", "phone"),
+            ("boyz", "boys"),
+        ]
+        for spelling, word in pairs:
+            assert phonetic_key(spelling) == phonetic_key(word), (spelling, word)
+
+    def test_phonetic_key(self):
+        cases = {"Tonight!": "TNT", "through": "0R", "ghost": "KST", "judge": "JJ", "...": ""}
+        for word, key in cases.items():
+            assert phonetic_key(word) == key, word
+
+    def test_different_sounds_differ(self):
+        assert phonetic_key("night") != phonetic_key("light")
+
+
+class RequestTimingTestCase(TestCase):
+    def test_span_does_nothing_untimed(self):
+        assert timing.span("words") is timing.span("lines")
+
+        with timing.span("words"):
+            pass
+
+    def test_queries_count_against_the_innermost_stage(self):
+        timer = timing.RequestTimer()
+        token = timing._current.set(timer)
+        self.addCleanup(timing._current.reset, token)
+
+        with connection.execute_wrapper(timer.record_query):
+            with timing.span("outer"):
+                Song.objects.count()
+                with timing.span("inner"):
+                    Song.objects.count()
+                    Song.objects.count()
+            with timing.span("inner"):
+                Song.objects.count()
+            Song.objects.count()
+
+        assert list(timer.stages) == ["outer", "inner"]
+        assert timer.stages["outer"].queries == 1
+        assert timer.stages["inner"].queries == 3
+        assert timer.queries == 5
+        assert timer.stages["outer"].seconds >= timer.stages["outer"].query_seconds
+
+    def test_no_header_when_off(self):
+        response = self.client.get("/parse/next-song/")
+
+        assert "Server-Timing" not in response
+
+
 class GeniusPageNonMusicTestCase(TestCase):
     """Tests for GeniusPage.is_non_music() against a real Non-Music page."""
 
@@ -190,6 +284,7 @@ class SongServiceTestCase(TestCase):
         self.section_table = SectionTable()
         self.song_table = SongTable()
         self.word_table = WordTable()
+        self.word_position_table = WordPositionTable()
         self.external_source_table = ExternalSourceTable()
         self.writer_table = WriterTable()
         self.rejected_track_table = RejectedTrackTable()
@@ -558,6 +653,25 @@ class SongServiceTestCase(TestCase):
 
         assert parsed_words == expected_words, "Parsed words do not match expected list"
 
+    def test_parse_tokens(self):
+        test_line = "Hello, this world! This is either/or an app's test-line."
+        expected_tokens = [
+            ["hello"],
+            ["this"],
+            ["world"],
+            ["this"],
+            ["is"],
+            ["either"],
+            ["or"],
+            ["an"],
+            ["app's", "app"],
+            ["test-line", "test", "line"],
+        ]
+
+        parsed_tokens = self.service.parse_tokens(test_line)
+
+        assert parsed_tokens == expected_tokens, "Parsed tokens do not match expected list"
+
     def test_save_lyrics(self):
         test_song_object = {"id": 1}
         self.service.song_object = test_song_object
@@ -629,16 +743,20 @@ class SongServiceTestCase(TestCase):
             patch.object(SectionTable, "save") as mock_section_save,
             patch.object(LineTable, "save") as mock_line_save,
             patch.object(WordTable, "save_all") as mock_word_save_all,
+            patch.object(WordPositionTable, "save_all") as mock_word_position_save_all,
+            patch.object(LineTable, "save_search_vectors") as mock_save_search_vectors,
         ):
             mock_get_table.side_effect = [
                 self.section_table,
                 self.line_table,
                 self.word_table,
+                self.word_position_table,
             ]
             expected_get_table_calls = [
                 call("section"),
                 call("line"),
                 call("word"),
+                call("word_position"),
             ]
 
             mock_section_save.side_effect = test_section_objects
@@ -661,21 +779,25 @@ class SongServiceTestCase(TestCase):
                     lyrics=test_line_data[0]["lyrics"],
                     order=test_line_data[0]["order"],
                     section=test_section_objects[0],
+                    rhyme="erse",
                 ),
                 call(
                     lyrics=test_line_data[1]["lyrics"],
                     order=test_line_data[1]["order"],
                     section=test_section_objects[0],
+                    rhyme="erse",
                 ),
                 call(
                     lyrics=test_line_data[2]["lyrics"],
                     order=test_line_data[2]["order"],
                     section=test_section_objects[1],
+                    rhyme="us",
                 ),
                 call(
                     lyrics=test_line_data[3]["lyrics"],
                     order=test_line_data[3]["order"],
                     section=test_section_objects[1],
+                    rhyme="us",
                 ),
             ]
 
@@ -686,11 +808,18 @@ class SongServiceTestCase(TestCase):
                 (test_line_objects[3], ["chorus", "line", "of", "second"]),
             ]
 
+            expected_line_tokens = [
+                (test_line_objects[0], [["first"], ["line"], ["of"], ["verse"]]),
+                (test_line_objects[1], [["second"], ["line"], ["of"], ["verse"]]),
+                (test_line_objects[2], [["first"], ["line"], ["of"], ["chorus"]]),
+                (test_line_objects[3], [["second"], ["line"], ["of"], ["chorus"]]),
+            ]
+
             self.service.save_lyrics()
 
             mock_get_table.assert_has_calls(expected_get_table_calls)
-            assert mock_get_table.call_count == 3, (
-                "Expected one lookup each of the section, line, and word tables"
+            assert mock_get_table.call_count == 4, (
+                "Expected one lookup each of the section, line, word, and word position tables"
             )
 
             mock_section_save.assert_has_calls(expected_section_save_calls)
@@ -700,6 +829,8 @@ class SongServiceTestCase(TestCase):
             assert mock_line_save.call_count == 4, "Expected four calls to save lines"
 
             mock_word_save_all.assert_called_once_with(expected_line_words)
+            mock_word_position_save_all.assert_called_once_with(expected_line_tokens)
+            mock_save_search_vectors.assert_called_once_with(test_line_objects)
 
 
 class GeniusPagePrefetchedTestCase(TestCase):
@@ -1257,6 +1388,26 @@ class NextSongViewTestCase(TestCase):
             assert response.status_code == 404
 
 
+class AddSongCronTestCase(TestCase):
+    def test_records_the_song_as_a_corpus_change(self):
+        receiver = MagicMock()
+        song_saved.connect(receiver)
+        self.addCleanup(song_saved.disconnect, receiver)
+
+        with (
+            patch("bnt_parser.cron.GeniusClient"),
+            patch.object(SongService, "select_song"),
+            patch.object(SongService, "save_song"),
+            patch.object(SongService, "save_lyrics"),
+            patch("builtins.print"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            add_song()
+
+        assert CorpusVersionTable().current() == 1
+        receiver.assert_called_once()
+
+
 class SubmitPageViewTestCase(TestCase):
     API_KEY = "test-api-key-123"
     FIXTURE_PATH = os.path.join(
@@ -1296,6 +1447,8 @@ class SubmitPageViewTestCase(TestCase):
             mock_service.title = self.track_data["title"]
             mock_service.artist = self.track_data["primary_artist_names"]
             MockSongService.return_value = mock_service
+            # The real one, so the save is recorded as a corpus change.
+            MockSongService.corpus_changed = SongService.corpus_changed
 
             response = self._post(
                 data={
@@ -1315,6 +1468,7 @@ class SubmitPageViewTestCase(TestCase):
             mock_service.save_song.assert_called_once()
             mock_service.save_lyrics.assert_called_once()
             assert "Buzzards and Dreadful Crows" in response.json()["detail"]
+            assert CorpusVersionTable().current() == 1, "Saving a song should bump the version"
 
     def test_rolls_back_song_when_lyrics_fail(self):
         """
@@ -1349,6 +1503,104 @@ class SubmitPageViewTestCase(TestCase):
 
         assert Song.objects.count() == 0, "Song row must not survive a failed lyrics save"
         assert ExternalSource.objects.count() == 0, "External source must roll back with the song"
+        assert CorpusVersionTable().current() == 0, "A failed save must not bump the version"
+
+    def test_sends_song_saved_after_commit(self):
+        receiver = MagicMock()
+        song_saved.connect(receiver)
+        self.addCleanup(song_saved.disconnect, receiver)
+
+        with (
+            patch.dict("os.environ", {"PARSE_API_KEY": self.API_KEY}),
+            patch("bnt_parser.views.SongService") as MockSongService,
+        ):
+            mock_service = MagicMock()
+            MockSongService.return_value = mock_service
+            MockSongService.corpus_changed = SongService.corpus_changed
+
+            with self.captureOnCommitCallbacks() as callbacks:
+                self._post(
+                    data={
+                        "track_data": self.track_data,
+                        "genius_record": self.genius_record,
+                        "html": self.html_content,
+                    },
+                    key=self.API_KEY,
+                )
+
+            receiver.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        receiver.assert_called_once()
+        assert receiver.call_args.kwargs["song"] is mock_service.song_object
+
+    def test_failing_song_saved_receiver_does_not_fail_the_save(self):
+        receiver = MagicMock(side_effect=RuntimeError("rebuild failed"))
+        song_saved.connect(receiver)
+        self.addCleanup(song_saved.disconnect, receiver)
+
+        with (
+            patch.dict("os.environ", {"PARSE_API_KEY": self.API_KEY}),
+            patch("bnt_parser.views.SongService") as MockSongService,
+            self.assertLogs(level="ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            MockSongService.corpus_changed = SongService.corpus_changed
+            response = self._post(
+                data={
+                    "track_data": self.track_data,
+                    "genius_record": self.genius_record,
+                    "html": self.html_content,
+                },
+                key=self.API_KEY,
+            )
+
+        receiver.assert_called_once()
+        assert response.status_code == 200
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_reports_stage_timings(self):
+        genius_record = {
+            "id": 999001,
+            "api_path": "/songs/999001",
+            "title": "Buzzards and Dreadful Crows",
+            "primary_artist": {"name": "Guided by Voices"},
+            "album": None,
+            "writer_artists": [],
+        }
+
+        with (
+            patch.dict("os.environ", {"PARSE_API_KEY": self.API_KEY}),
+            self.assertLogs("bnt_parser.utils.timing") as logs,
+        ):
+            response = self._post(
+                data={
+                    "track_data": self.track_data,
+                    "genius_record": genius_record,
+                    "html": self.html_content,
+                },
+                key=self.API_KEY,
+            )
+
+        assert response.status_code == 200
+        metrics = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        assert metrics == [
+            "parse",
+            "save_song",
+            "save_lyrics",
+            "words",
+            "word_positions",
+            "search_vectors",
+            "render",
+            "db",
+            "total",
+        ]
+        record = json.loads(logs.records[0].getMessage())
+        assert record["path"] == "/parse/submit-page/"
+        assert record["status"] == 200
+        assert record["stages"]["words"]["queries"] > 0
+        assert record["queries"] >= record["stages"]["save_lyrics"]["queries"]
 
     def test_returns_422_for_non_music_page(self):
         """
@@ -1605,6 +1857,28 @@ class TableServiceTestCase(TestCase):
 # ============================================================
 
 
+class CorpusVersionTableTestCase(TestCase):
+    def setUp(self):
+        self.table = CorpusVersionTable()
+
+    def test_current_is_zero_before_any_change(self):
+        assert self.table.current() == 0
+
+    def test_bump_advances_the_version(self):
+        self.table.bump()
+        self.table.bump()
+
+        assert self.table.current() == 2
+        assert CorpusVersion.objects.count() == 1, "The counter should stay a single row"
+
+    def test_bump_rolls_back_with_its_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.table.bump()
+            raise RuntimeError("save failed")
+
+        assert self.table.current() == 0
+
+
 class ExternalSourceTableTestCase(TestCase):
     def setUp(self):
         self.table = ExternalSourceTable()
@@ -2126,6 +2400,18 @@ class LineTableTestCase(TestCase):
         assert line.order == 1
         assert line.section == self.section
 
+    def test_save_search_vectors(self):
+        line = self.table.save(lyrics="Dancing in the dark", order=1, section=self.section)
+
+        if connection.vendor != "postgresql":
+            with self.assertNumQueries(0):
+                self.table.save_search_vectors([line])
+            return
+
+        self.table.save_search_vectors([line])
+        line.refresh_from_db()
+        assert "danc" in line.search_vector, "Lyrics should be stemmed into the vector"
+
 
 class WordTableTestCase(TestCase):
     def setUp(self):
@@ -2188,6 +2474,13 @@ class WordTableTestCase(TestCase):
         assert Word.objects.count() == 3
         assert sorted(w.text for w in self.line.words.all()) == ["buzzards", "crows", "dreadful"]
 
+    def test_save_all_records_phonetic_keys(self):
+        self.table.save_all([(self.line, ["tonight", "knight"])])
+        self.table.save_if_not_exists(text="luv", line=self.line)
+
+        keys = dict(Word.objects.values_list("text", "phonetic"))
+        assert keys == {"knight": "NT", "luv": "LF", "tonight": "TNT"}
+
     def test_save_all_reuses_existing_words(self):
         existing = Word.objects.create(text="crows")
 
@@ -2219,6 +2512,20 @@ class WordTableTestCase(TestCase):
 
         assert Word.objects.count() == 0
 
+    def test_save_all_announces_only_new_words_after_commit(self):
+        Word.objects.create(text="crows")
+        receiver = MagicMock()
+        words_added.connect(receiver)
+        self.addCleanup(words_added.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.table.save_all([(self.line, ["crows", "buzzards", "dreadful"])])
+            receiver.assert_not_called()
+
+        assert len(callbacks) == 1
+        receiver.assert_called_once()
+        assert receiver.call_args.kwargs["texts"] == ["buzzards", "dreadful"]
+
     def test_save_all_query_count_does_not_grow_with_word_count(self):
         """The point of save_all: cost stays flat, not one round trip per word."""
         large = []
@@ -2226,19 +2533,410 @@ class WordTableTestCase(TestCase):
             line = self._make_line(f"Line number {index}", index + 2)
             large.append((line, [f"word{index}x{n}" for n in range(20)]))
 
-        with self.assertNumQueries(4):
+        # Four to save the words and links, and nine to add them to the frequency counts.
+        with self.assertNumQueries(13):
             self.table.save_all([(self.line, ["one", "two", "three"])])
 
         with CaptureQueriesContext(connection) as queries:
             self.table.save_all(large)
 
         # 1000 words once cost several thousand round trips. The only reason this is
-        # not four queries too is bulk_create splitting to fit the backend's parameter
-        # limit, which scales far more slowly than one query per word.
-        assert len(queries) < 20, f"Expected a handful of queries, got {len(queries)}"
+        # not thirteen queries too is bulk_create splitting to fit the backend's
+        # parameter limit, which scales far more slowly than one query per word: on
+        # SQLite the words, their links and two of the frequency tables take a few
+        # inserts each.
+        assert len(queries) < 30, f"Expected a handful of queries, got {len(queries)}"
         assert Word.objects.count() == 1003
 
 
+class _WordCountsMixin:
+    """Two songs by one writer, and a helper saving lines to them as save_lyrics does."""
+
+    def setUp(self):
+        self.alice = Writer.objects.create(
+            name="Alice Cooper",
+            external_source=ExternalSource.objects.create(
+                source=ExternalSource.SourceEnum.GENIUS, external_id=101, endpoint="/artists/101"
+            ),
+        )
+        self.first = self._make_song(1)
+        self.second = self._make_song(2)
+        self.alice.songs.add(self.first, self.second)
+
+    def _make_song(self, external_id: int) -> Song:
+        ext = ExternalSource.objects.create(
+            source=ExternalSource.SourceEnum.GENIUS,
+            external_id=external_id,
+            endpoint=f"/songs/{external_id}",
+        )
+        return Song.objects.create(title="Test Song", artist="Test Artist", external_source=ext)
+
+    def _save(self, song: Song, lines: list[list[str]], section_type=Section.SectionTypeEnum.VERSE):
+        section = Section.objects.create(
+            song=song, order=song.sections.count() + 1, type=section_type
+        )
+        line_words = [
+            (Line.objects.create(lyrics=" ".join(words), order=n, section=section), words)
+            for n, words in enumerate(lines, start=1)
+        ]
+        WordTable().save_all(line_words)
+        return line_words
+
+
+class WordFrequencyTableTestCase(_WordCountsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.table = WordFrequencyTable()
+
+    def _counts(self, text: str) -> tuple:
+        frequency = WordFrequency.objects.get(text=text)
+        return (
+            frequency.line_count,
+            frequency.song_count,
+            frequency.writer_count,
+            sorted(frequency.by_writer.values_list("writer__name", "line_count", "song_count")),
+            sorted(
+                frequency.by_section_type.values_list("section_type", "line_count", "song_count")
+            ),
+        )
+
+    def test_save_all_counts_lines_songs_and_writers(self):
+        self._save(self.first, [["rain", "on"], ["rain"]])
+        self._save(self.first, [["rain"]], section_type=Section.SectionTypeEnum.CHORUS)
+        self._save(self.second, [["rain"]])
+
+        assert self._counts("rain") == (
+            4,
+            2,
+            1,
+            [("Alice Cooper", 4, 2)],
+            [("CHORUS", 1, 1), ("VERSE", 3, 2)],
+        )
+        assert self._counts("on") == (1, 1, 1, [("Alice Cooper", 1, 1)], [("VERSE", 1, 1)])
+
+    def test_resaving_lines_counts_nothing_new(self):
+        line_words = self._save(self.first, [["rain", "rain"], ["rain"]])
+
+        WordTable().save_all(line_words)
+
+        assert self._counts("rain")[:3] == (2, 1, 1)
+
+    def test_rebuild_matches_the_incremental_counts(self):
+        bob = Writer.objects.create(
+            name="Bob Dylan",
+            external_source=ExternalSource.objects.create(
+                source=ExternalSource.SourceEnum.GENIUS, external_id=102, endpoint="/artists/102"
+            ),
+        )
+        bob.songs.add(self.second)
+        self._save(self.first, [["rain", "on"], ["rain"]])
+        self._save(self.second, [["rain"], ["sun"]], section_type=Section.SectionTypeEnum.CHORUS)
+        incremental = {text: self._counts(text) for text in ("rain", "on", "sun")}
+
+        WordFrequency.objects.update(line_count=0)
+        count = self.table.rebuild()
+
+        assert count == 3
+        assert {text: self._counts(text) for text in ("rain", "on", "sun")} == incremental
+
+    def test_rebuild_word_frequencies_command(self):
+        self._save(self.first, [["rain", "on"]])
+        WordFrequency.objects.all().delete()
+        out = io.StringIO()
+
+        call_command("rebuild_word_frequencies", stdout=out)
+
+        assert self._counts("rain")[:3] == (1, 1, 1)
+        assert WordPair.objects.get(frequency__text="rain").neighbour == "on"
+        assert "for 2 words and 2 word pairs" in out.getvalue()
+        assert CorpusVersionTable().current() == 1, "A recount should bump the version"
+
+
+class WordPairTableTestCase(_WordCountsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.table = WordPairTable()
+
+    def _pairs(self, model=WordPair) -> list:
+        return sorted(
+            model.objects.values_list(
+                "frequency__frequency__text" if model is WordWriterPair else "frequency__text",
+                "neighbour",
+                "line_count",
+            )
+        )
+
+    def _save_and_count(self, song: Song, lines: list[list[str]], **kwargs):
+        line_words = self._save(song, lines, **kwargs)
+        self.table.count_pending(limit=100)
+        return line_words
+
+    def test_save_all_leaves_pairs_to_be_counted(self):
+        self._save(self.first, [["rain", "on", "me"]])
+
+        assert not WordPair.objects.exists()
+        assert Line.objects.filter(pairs_counted=False).count() == 1
+
+    def test_counts_words_sharing_a_line(self):
+        self._save_and_count(self.first, [["rain", "on", "me"], ["rain", "me"], ["sun"]])
+
+        assert self._pairs() == [
+            ("me", "on", 1),
+            ("me", "rain", 2),
+            ("on", "me", 1),
+            ("on", "rain", 1),
+            ("rain", "me", 2),
+            ("rain", "on", 1),
+        ]
+        assert self._pairs(WordWriterPair) == self._pairs()
+        assert not Line.objects.filter(pairs_counted=False).exists()
+
+    def test_counts_add_up_across_songs(self):
+        self._save_and_count(self.first, [["rain", "me"]])
+        self._save_and_count(self.second, [["rain", "me"]])
+
+        assert WordPair.objects.get(frequency__text="rain", neighbour="me").line_count == 2
+        assert (
+            WordWriterPair.objects.get(frequency__frequency__text="rain", neighbour="me").line_count
+            == 2
+        )
+
+    def test_counting_again_counts_nothing_new(self):
+        line_words = self._save_and_count(self.first, [["rain", "me"]])
+
+        WordTable().save_all(line_words)
+        assert self.table.count_pending(limit=100) == 0
+
+        assert self._pairs() == [("me", "rain", 1), ("rain", "me", 1)]
+
+    def test_count_pending_stops_at_the_limit(self):
+        self._save(self.first, [["rain", "me"], ["rain", "on"], ["sun", "me"]])
+
+        assert self.table.count_pending(limit=2) == 2
+        assert self._pairs() == [
+            ("me", "rain", 1),
+            ("on", "rain", 1),
+            ("rain", "me", 1),
+            ("rain", "on", 1),
+        ]
+        assert self.table.count_pending(limit=2) == 1
+        assert WordPair.objects.count() == 6
+
+    def test_rebuild_matches_the_incremental_counts(self):
+        self._save_and_count(self.first, [["rain", "on", "me"], ["rain", "me"]])
+        self._save_and_count(
+            self.second, [["rain", "sun"]], section_type=Section.SectionTypeEnum.CHORUS
+        )
+        incremental = (self._pairs(), self._pairs(WordWriterPair))
+
+        WordPair.objects.update(line_count=0)
+        count = self.table.rebuild()
+
+        assert count == 8
+        assert (self._pairs(), self._pairs(WordWriterPair)) == incremental
+
+    def test_rebuild_counts_lines_not_yet_counted_once(self):
+        self._save(self.first, [["rain", "me"]])
+
+        self.table.rebuild()
+
+        assert self.table.count_pending(limit=100) == 0
+        assert self._pairs() == [("me", "rain", 1), ("rain", "me", 1)]
+
+
+class CountWordPairsCronTestCase(_WordCountsMixin, TestCase):
+    def test_counts_every_pending_line_in_batches(self):
+        self._save(self.first, [["rain", "me"], ["rain", "on"], ["sun", "me"]])
+
+        with (
+            patch("bnt_parser.cron.PAIR_BATCH_SIZE", 2),
+            patch("builtins.print") as mock_print,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            count_word_pairs()
+
+        assert WordPair.objects.count() == 6
+        assert not Line.objects.filter(pairs_counted=False).exists()
+        assert CorpusVersionTable().current("pair_version") == 2, "Each batch moves it"
+        assert CorpusVersionTable().current() == 0, "Counting pairs is not a corpus change"
+        mock_print.assert_called_once_with("Counted word pairs for 3 lines.")
+
+    def test_writer_linked_after_saving_does_not_stall_the_job(self):
+        late = self._make_song(3)
+        self._save(late, [["rain", "me"]])
+        self.alice.songs.add(late)
+
+        with (
+            patch("builtins.print"),
+            self.assertLogs(level="WARNING"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            count_word_pairs()
+
+        assert not Line.objects.filter(pairs_counted=False).exists()
+        assert WordPair.objects.get(frequency__text="rain", neighbour="me").line_count == 1
+        assert not WordWriterPair.objects.exists()
+
+
+class WordPositionTableTestCase(TestCase):
+    def setUp(self):
+        self.table = WordPositionTable()
+        ext = ExternalSource.objects.create(
+            source=ExternalSource.SourceEnum.GENIUS,
+            external_id=1,
+            endpoint="/songs/1",
+        )
+        song = Song.objects.create(
+            title="Test Song",
+            artist="Test Artist",
+            external_source=ext,
+        )
+        section = Section.objects.create(
+            song=song,
+            order=1,
+            type=Section.SectionTypeEnum.VERSE,
+        )
+        self.line = Line.objects.create(
+            lyrics="Buzzards' test-line",
+            order=1,
+            section=section,
+        )
+
+    def _positions(self):
+        return list(
+            WordPosition.objects.filter(line=self.line)
+            .order_by("position", "word__text")
+            .values_list("word__text", "position")
+        )
+
+    def test_save_all_records_every_form_at_its_position(self):
+        for text in ("buzzards", "test-line", "test", "line"):
+            Word.objects.create(text=text)
+
+        self.table.save_all([(self.line, SongService.parse_tokens(self.line.lyrics))])
+
+        assert self._positions() == [
+            ("buzzards", 0),
+            ("line", 1),
+            ("test", 1),
+            ("test-line", 1),
+        ]
+
+    def test_save_all_skips_words_that_do_not_exist(self):
+        Word.objects.create(text="buzzards")
+
+        self.table.save_all([(self.line, [["buzzards"], ["crows"]])])
+
+        assert self._positions() == [("buzzards", 0)]
+
+    def test_save_all_ignores_empty_input(self):
+        with self.assertNumQueries(0):
+            self.table.save_all([])
+            self.table.save_all([(self.line, [])])
+
+    def test_save_all_query_count_does_not_grow_with_line_count(self):
+        Word.objects.create(text="buzzards")
+        lines = [
+            Line.objects.create(lyrics="buzzards", order=n + 2, section=self.line.section)
+            for n in range(50)
+        ]
+
+        with self.assertNumQueries(2):
+            self.table.save_all([(line, [["buzzards"], ["buzzards"]]) for line in lines])
+
+        assert WordPosition.objects.count() == 100
+
+
+class ReindexLyricsCommandTestCase(TestCase):
+    def setUp(self):
+        ext = ExternalSource.objects.create(
+            source=ExternalSource.SourceEnum.GENIUS,
+            external_id=1,
+            endpoint="/songs/1",
+        )
+        song = Song.objects.create(
+            title="Test Song",
+            artist="Test Artist",
+            external_source=ext,
+        )
+        self.section = Section.objects.create(
+            song=song,
+            order=1,
+            type=Section.SectionTypeEnum.VERSE,
+        )
+
+    def _make_line(self, lyrics: str, order: int) -> Line:
+        line = Line.objects.create(lyrics=lyrics, order=order, section=self.section)
+        words = sorted({form for forms in SongService.parse_tokens(lyrics) for form in forms})
+        WordTable().save_all([(line, words)])
+        return line
+
+    def test_positions_fills_in_lines_saved_without_them(self):
+        line = self._make_line("Buzzards and dreadful crows", 1)
+
+        call_command("reindex_lyrics", "--positions", stdout=io.StringIO())
+
+        positions = list(
+            line.word_positions.order_by("position").values_list("word__text", flat=True)
+        )
+        assert positions == ["buzzards", "and", "dreadful", "crows"]
+
+    def test_positions_leaves_indexed_lines_alone(self):
+        line = self._make_line("Buzzards and dreadful crows", 1)
+        self._make_line("Dreadful crows", 2)
+        call_command("reindex_lyrics", "--positions", stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command("reindex_lyrics", "--positions", stdout=out)
+
+        assert line.word_positions.count() == 4, "A second run should not duplicate positions"
+        assert "for 0 lines" in out.getvalue()
+
+    def test_rhymes_fill_in_lines_saved_without_them(self):
+        line = self._make_line("Light my fire", 1)
+        done = self._make_line("Set the night on fire", 2)
+        Line.objects.filter(pk=done.pk).update(rhyme="ire")
+
+        out = io.StringIO()
+        call_command("reindex_lyrics", "--rhymes", stdout=out)
+
+        line.refresh_from_db()
+        assert line.rhyme == "ire"
+        assert "for 1 lines" in out.getvalue()
+
+    def test_phonetic_fills_in_words_saved_without_it(self):
+        self._make_line("Tonight tonight", 1)
+        Word.objects.update(phonetic="")
+
+        out = io.StringIO()
+        call_command("reindex_lyrics", "--phonetic", stdout=out)
+
+        assert Word.objects.get(text="tonight").phonetic == "TNT"
+        assert "for 1 words" in out.getvalue()
+
+    def test_search_vectors_are_skipped_off_postgres(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("Search vectors are filled in on Postgres")
+        out = io.StringIO()
+
+        call_command("reindex_lyrics", "--search-vectors", stdout=out)
+
+        assert "need Postgres" in out.getvalue()
+
+    def test_each_batch_is_recorded_as_a_corpus_change(self):
+        self._make_line("Light my fire", 1)
+        receiver = MagicMock()
+        song_saved.connect(receiver)
+        self.addCleanup(song_saved.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reindex_lyrics", "--positions", "--rhymes", stdout=io.StringIO())
+
+        assert CorpusVersionTable().current() == 2
+        assert receiver.call_count == 2
+        assert receiver.call_args.kwargs["song"] is None
+
+
 class WriterTableTestCase(TestCase):
     def setUp(self):
         self.table = WriterTable()
@@ -0,0 +1,94 @@
+import re
+
+VOWELS = frozenset("AEIOU")
+NON_LETTERS = re.compile(r"[^A-Z]")
+# Doubled letters sound once, except C, which can sound twice ("accent").
+DOUBLED = re.compile(r"([A-BD-Z])\1+")
+# Initial letter pairs whose first letter is silent.
+SILENT_FIRST = ("AE", "GN", "KN", "PN", "WR")
+
+
+def phonetic_key(word: str) -> str:
+    """
+    Return the Metaphone key of *word*: a rough spelling of how it sounds.
+
+    Words spelt differently but pronounced alike share a key, so "tonite" and
+    "tonight" both give "TNT" and "nite" and "knight" both give "NT". Vowels count
+    only as a first letter, and "0" stands for "th". Follows Lawrence Philips's
+    original Metaphone rules for English, except that a final "gh" is always
+    silent ("high" and "hi" match; "tough" and "tuff" do not). Returns "" for a
+    word with no letters.
+    """
+    word = DOUBLED.sub(r"\1", NON_LETTERS.sub("", word.upper()))
+    if word.startswith(SILENT_FIRST):
+        word = word[1:]
+    elif word.startswith("X"):
+        word = "S" + word[1:]
+    elif word.startswith("WH"):
+        word = "W" + word[2:]
+    if word.endswith("MB"):
+        word = word[:-1]
+
+    key = []
+    for i, letter in enumerate(word):
+        before = word[i - 1] if i else ""
+        after = word[i + 1 : i + 2]
+        after_two = word[i + 1 : i + 3]
+
+        if letter in VOWELS:
+            if i == 0:
+                key.append(letter)
+        elif letter == "C":
+            if after_two == "IA" or after == "H":
+                key.append("K" if before == "S" and after == "H" else "X")
+            elif after in ("I", "E", "Y"):
+                # Silent in "sci", "sce" and "scy".
+                if before != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif letter == "D":
+            key.append("J" if after == "G" and word[i + 2 : i + 3] in ("E", "I", "Y") else "T")
+        elif letter == "G":
+            if after == "H" and word[i + 2 : i + 3] not in VOWELS:
+                continue  # "night", "high"
+            if word[i + 1 :] in ("N", "NED"):
+                continue  # "sign", "signed"
+            if before == "D" and after in ("E", "I", "Y"):
+                continue  # Sounded by the D of "dge"
+            key.append("J" if after in ("E", "I", "Y") else "K")
+        elif letter == "H":
+            if before and before in "CGPST":
+                continue
+            if before in VOWELS and after not in VOWELS:
+                continue
+            key.append("H")
+        elif letter == "K":
+            if before != "C":
+                key.append("K")
+        elif letter == "P":
+            key.append("F" if after == "H" else "P")
+        elif letter == "Q":
+            key.append("K")
+        elif letter == "S":
+            key.append("X" if after == "H" or after_two in ("IO", "IA") else "S")
+        elif letter == "T":
+            if after_two in ("IA", "IO"):
+                key.append("X")
+            elif after == "H":
+                key.append("0")
+            elif after_two != "CH":
+                key.append("T")
+        elif letter == "V":
+            key.append("F")
+        elif letter in ("W", "Y"):
+            if after in VOWELS:
+                key.append(letter)
+        elif letter == "X":
+            key.append("KS")
+        elif letter == "Z":
+            key.append("S")
+        else:
+            key.append(letter)
+
+    return "".join(key)
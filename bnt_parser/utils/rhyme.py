@@ -0,0 +1,37 @@
+import re
+
+# A run of vowels, with "y" counted as one after a consonant ("fly", "rhythm").
+VOWEL_GROUP = re.compile(r"[aeiou]+|(?<=[^aeiou])y")
+NON_LETTERS = re.compile(r"[^a-z]")
+
+
+def rhyme_key(word: str) -> str:
+    """
+    Return the part of *word* a rhyme must share, judged by spelling.
+
+    That is the word from its last sounded vowel to the end: "fire" and "desire"
+    both give "ire", "night" and "light" both give "ight". A final "e", "es" or "ed"
+    after a consonant is taken as silent, so the vowel before it counts.
+    Spelling is only a guide to sound ("love" and "move" share a key, "fire" and
+    "higher" do not), but it needs no pronunciation data. Returns "" for a word
+    with no vowel.
+    """
+    word = NON_LETTERS.sub("", word.lower())
+    groups = [match.start() for match in VOWEL_GROUP.finditer(word)]
+    if not groups:
+        return ""
+
+    start = groups[-1]
+    silent_e = re.fullmatch(r"e[sd]?", word[start:]) and word[start - 1 : start] not in ("", "e")
+    if silent_e and len(groups) > 1:
+        start = groups[-2]
+    return word[start:]
+
+
+def line_rhyme(tokens: list[list[str]]) -> str:
+    """
+    Return the rhyme key of a line's final word.
+
+    :param tokens: The line as parsed by SongService.parse_tokens.
+    """
+    return rhyme_key(tokens[-1][0]) if tokens else ""
@@ -10,6 +10,7 @@ from bnt_parser.clients.genius_client import GeniusClient
 from bnt_parser.models import RejectedTrack
 from bnt_parser.services.song_service import SongService
 from bnt_parser.services.table_service import TableService
+from bnt_parser.utils.timing import span
 
 
 class ApiKeyPermission(BasePermission):
@@ -31,7 +32,8 @@ class NextSongView(APIView):
             table_service=TableService(),
             genius_client=GeniusClient(),
         )
-        result = song_service.find_next_track()
+        with span("find_track"):
+            result = song_service.find_next_track()
         if result is None:
             return Response({"detail": "No new songs found."}, status=status.HTTP_404_NOT_FOUND)
         return Response(result)
@@ -65,15 +67,17 @@ class SubmitPageView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        table_service = TableService()
         song_service = SongService(
-            table_service=TableService(),
+            table_service=table_service,
             genius_client=GeniusClient(),
         )
-        accepted = song_service.load_prefetched(
-            track_data=track_data,
-            genius_record=genius_record,
-            html=html.encode("utf-8"),
-        )
+        with span("parse"):
+            accepted = song_service.load_prefetched(
+                track_data=track_data,
+                genius_record=genius_record,
+                html=html.encode("utf-8"),
+            )
         # Returned before the save block, not as an error: the rejection is already
         # recorded, so the next GET serves a different track. The client treats 422
         # as "move on to the next candidate" rather than a failed run.
@@ -92,8 +96,11 @@ class SubmitPageView(APIView):
         # song row commits, so the track counts as already processed and is never
         # retried, leaving the truncated lyrics in place for good.
         with transaction.atomic():
-            song_service.save_song()
-            song_service.save_lyrics()
+            with span("save_song"):
+                song_service.save_song()
+            with span("save_lyrics"):
+                song_service.save_lyrics()
+            SongService.corpus_changed(table_service, song=song_service.song_object)
 
         return Response({"detail": f'Saved "{song_service.title}" by {song_service.artist}.'})
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BntSearcherConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bnt_searcher"
+
+    def ready(self):
+        # Imported for its side effect of connecting the signal receivers.
+        from bnt_searcher import signals  # noqa: F401
@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from bnt_searcher.services.search_service import find_contains_matches
+
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Time substring searches with the trigram index on Line.lyrics against a forced "
+        "sequential scan, and show the plan Postgres picks. Needs Postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fragments", nargs="+", help="Fragments to search for.")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs per fragment and plan; the median is reported.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Substring search needs Postgres.")
+
+        self.stdout.write(f"{'fragment':<20}{'index ms':>12}{'scan ms':>12}{'lines':>10}")
+        for fragment in options["fragments"]:
+            fragment = fragment.lower()
+            indexed = self._median_ms(fragment, options["repeat"], use_index=True)
+            scanned = self._median_ms(fragment, options["repeat"], use_index=False)
+            lines = find_contains_matches(fragment, [], [], []).count()[1]
+            self.stdout.write(f"{fragment:<20}{indexed:>12.1f}{scanned:>12.1f}{lines:>10}")
+
+        fragment = options["fragments"][0].lower()
+        self.stdout.write(f"\nPlan for {fragment!r}:")
+        matches = find_contains_matches(fragment, [], [], [])
+        self.stdout.write(matches.lines_qs.order_by().values("id").explain())
+
+    def _median_ms(self, fragment: str, repeat: int, use_index: bool) -> float:
+        """Time a search as the view runs it: totals, writers facet and first page."""
+        runs = []
+        for _ in range(repeat):
+            with transaction.atomic():
+                if not use_index:
+                    # Scoped to this transaction by SET LOCAL.
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_bitmapscan = off")
+                        cursor.execute("SET LOCAL enable_indexscan = off")
+                started = time.perf_counter()
+                matches = find_contains_matches(fragment, [], [], [])
+                matches.count()
+                matches.writer_names()
+                matches.page(0, PAGE_SIZE)
+                runs.append((time.perf_counter() - started) * 1000)
+        return statistics.median(runs)
@@ -0,0 +1,192 @@
+import json
+import statistics
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory, override_settings
+
+from bnt_parser.clients.genius_client import GeniusClient
+from bnt_parser.models import ExternalSource, Line, Song, Word, WordFrequency, Writer
+from bnt_parser.services.song_service import SongService
+from bnt_parser.services.table_service import TableService
+from bnt_parser.utils.timing import RequestTimer
+from bnt_searcher.models import WordVariantAlias
+from bnt_searcher.services.synthetic_corpus import SyntheticLyrics
+from bnt_searcher.views import WordSearchView
+
+PAGE_SIZE = 20
+# (sections, lines per section) of the songs saved by the ingest benchmarks.
+SONG_SIZES = {"small": (4, 4), "huge": (60, 20)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time word searches of common, rare and variant terms, with filters and deep "
+        "pages, and the saving of small and huge songs, against the current corpus. "
+        "Writes the results as JSON for comparing runs. Searches run as the view runs "
+        "them, response cache off; saved songs are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per case, after one untimed warm-up run.",
+        )
+        parser.add_argument("--terms", type=int, default=3, help="Terms to search of each kind.")
+        parser.add_argument(
+            "--output", help="File to write the JSON results to. Defaults to standard output."
+        )
+        parser.add_argument("--skip-ingest", action="store_true", help="Time searches only.")
+
+    def handle(self, *args, **options):
+        frequencies = WordFrequency.objects.order_by("-line_count", "text")
+        common = list(frequencies.values_list("text", flat=True)[: options["terms"]])
+        if not common:
+            raise CommandError("The corpus has no words; run generate_corpus first.")
+
+        self.repeat = options["repeat"]
+        # Requests are built by RequestFactory, whose host is "testserver".
+        with override_settings(
+            SEARCH_RESPONSE_CACHE="", ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            results = self._search_cases(common, options["terms"])
+        if not options["skip_ingest"]:
+            results += self._ingest_cases()
+
+        report = {
+            "started_at": datetime.now(tz=UTC).isoformat(),
+            "database": connection.vendor,
+            "settings": {
+                "SEARCH_ENGINE": settings.SEARCH_ENGINE,
+                "SEARCH_POSTINGS_INDEX": settings.SEARCH_POSTINGS_INDEX,
+            },
+            "corpus": {
+                "songs": Song.objects.count(),
+                "lines": Line.objects.count(),
+                "words": Word.objects.count(),
+                "word_links": Word.line.through.objects.count(),
+            },
+            "repeat": self.repeat,
+            "results": results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            for result in results:
+                self.stdout.write(f"{result['name']:<50}{result['median_ms']:>10.1f} ms")
+        else:
+            self.stdout.write(output)
+
+    def _search_cases(self, common: list[str], terms: int) -> list[dict]:
+        rare = list(
+            WordFrequency.objects.filter(line_count=1)
+            .order_by("text")
+            .values_list("text", flat=True)[:terms]
+        )
+        # Only terms looked up already, so no case waits on the dictionary API.
+        variant = list(
+            WordVariantAlias.objects.filter(searched_term__in=Word.objects.values("text"))
+            .order_by("searched_term")
+            .values_list("searched_term", flat=True)[:terms]
+        )
+        # The writer credited on the most songs.
+        writer = (
+            Writer.objects.annotate(songs_written=Count("songs"))
+            .order_by("-songs_written", "name")
+            .values_list("name", flat=True)
+            .first()
+        )
+
+        word = common[0]
+        cases = [(f"common/{term}", {"word": term}) for term in common]
+        cases += [(f"rare/{term}", {"word": term}) for term in rare]
+        cases += [(f"variants/{term}", {"word": term, "variants": "true"}) for term in variant]
+        cases.append((f"section_type/{word}", {"word": word, "section_type": "CHORUS"}))
+        if writer:
+            cases += [
+                (f"primary_writer/{word}", {"word": word, "primary_writer": writer}),
+                (f"co_writer/{word}", {"word": word, "co_writer": writer}),
+                (
+                    f"all_filters/{word}",
+                    {"word": word, "section_type": ["VERSE", "CHORUS"], "co_writer": writer},
+                ),
+            ]
+
+        songs = self._search({"word": word})["meta"]["total_songs"]
+        last_page = max(1, -(-songs // PAGE_SIZE))
+        cases += [
+            (f"page_{page}/{word}", {"word": word, "page": page})
+            for page in sorted({last_page // 2 or 1, last_page})
+        ]
+
+        results = []
+        for name, params in cases:
+            params = {"page_size": PAGE_SIZE, **params}
+            result = self._time(lambda params=params: self._search(params))
+            results.append({"name": f"search/{name}", "params": params, **result})
+        return results
+
+    def _search(self, params: dict) -> dict:
+        request = RequestFactory().get("/search/word/", params)
+        response = WordSearchView.as_view()(request)
+        response.render()
+        if response.status_code != 200:
+            raise CommandError(f"Search for {params} failed: {response.data}")
+        return response.data
+
+    def _ingest_cases(self) -> list[dict]:
+        lyrics = SyntheticLyrics(seed=1)
+        results = []
+        for name, (sections, lines) in SONG_SIZES.items():
+            song_lyrics = lyrics.lyrics(sections, lines)
+            result = self._time(lambda song_lyrics=song_lyrics: self._save_lyrics(song_lyrics))
+            results.append(
+                {
+                    "name": f"save_lyrics/{name}",
+                    "params": {"sections": sections, "lines_per_section": lines},
+                    **result,
+                }
+            )
+        return results
+
+    def _save_lyrics(self, lyrics: list[str]) -> None:
+        """Save a song's lyrics as SubmitPageView does, then roll the save back."""
+        with transaction.atomic():
+            source = ExternalSource.objects.create(
+                source=ExternalSource.SourceEnum.GENIUS, endpoint="/synthetic/benchmark"
+            )
+            song_service = SongService(TableService(), GeniusClient())
+            song_service.song_object = Song.objects.create(
+                title="Benchmark", artist="Synthetic", external_source=source
+            )
+            song_service.lyrics = lyrics
+            song_service.save_lyrics()
+            transaction.set_rollback(True)
+
+    def _time(self, run) -> dict:
+        """Run once to warm up, then time *repeat* runs, counting their queries."""
+        run()
+        timings, timers = [], []
+        for _ in range(self.repeat):
+            timer = RequestTimer()
+            with connection.execute_wrapper(timer.record_query):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            timers.append(timer)
+
+        return {
+            "min_ms": round(min(timings), 2),
+            "median_ms": round(statistics.median(timings), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": timers[-1].queries,
+            "query_ms": round(statistics.median(t.query_seconds * 1000 for t in timers), 2),
+        }
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from bnt_searcher.services.postings_index import rebuild_postings_index
+
+
+class Command(BaseCommand):
+    help = "Build the in-memory word search index and report its size."
+
+    def handle(self, *args, **options):
+        # The index lives in process memory, so a server worker builds its own copy;
+        # running this checks the build succeeds against the current corpus and times it.
+        index = rebuild_postings_index()
+        postings = sum(len(found) for found in index.postings.values())
+        self.stdout.write(
+            f"Indexed {len(index.line_ids)} lines, {len(index.postings)} words, "
+            f"{postings} postings."
+        )
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from bnt_parser.models import Word
+from bnt_searcher.services.search_service import find_full_text_matches, find_matches
+
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Time word searches on the words engine (Word.line join table) against Postgres "
+        "full-text search. Needs Postgres, with search vectors filled in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "words",
+            nargs="*",
+            help="Words to search for. Defaults to the most common words.",
+        )
+        parser.add_argument(
+            "--common",
+            type=int,
+            default=10,
+            help="How many of the most common words to search when none are given.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs per word and engine; the median is reported.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Full-text search needs Postgres.")
+
+        words = options["words"] or list(
+            Word.line.through.objects.values("word__text")
+            .annotate(n=Count("id"))
+            .order_by("-n")
+            .values_list("word__text", flat=True)[: options["common"]]
+        )
+        engines = {
+            "words": lambda word: find_matches([word], [], [], [], index=None),
+            "postgres": lambda word: find_full_text_matches([word], [], [], []),
+        }
+
+        self.stdout.write(f"{'word':<20}{'words ms':>12}{'postgres ms':>14}{'lines':>10}")
+        totals = {name: [] for name in engines}
+        for word in words:
+            timings = {}
+            for name, find in engines.items():
+                timings[name] = self._median_ms(find, word, options["repeat"])
+                totals[name].append(timings[name])
+            matches = find_matches([word], [], [], [], index=None)
+            lines = matches.count()[1] if matches else 0
+            self.stdout.write(
+                f"{word:<20}{timings['words']:>12.1f}{timings['postgres']:>14.1f}{lines:>10}"
+            )
+
+        if words:
+            self.stdout.write(
+                f"{'median':<20}{statistics.median(totals['words']):>12.1f}"
+                f"{statistics.median(totals['postgres']):>14.1f}"
+            )
+
+    def _median_ms(self, find, word: str, repeat: int) -> float:
+        """Time a search as the view runs it: totals, writers facet and first page."""
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            matches = find(word)
+            if matches is not None:
+                matches.count()
+                matches.writer_names()
+                matches.page(0, PAGE_SIZE)
+            runs.append((time.perf_counter() - started) * 1000)
+        return statistics.median(runs)
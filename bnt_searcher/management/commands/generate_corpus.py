@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bnt_searcher.services.synthetic_corpus import SyntheticLyrics, generate_corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic corpus of made-up songs, for measuring "
+        "search and ingest performance. Adds to whatever is there, so point it at a "
+        "scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--songs", type=int, default=1000, help="Songs to add.")
+        parser.add_argument("--sections", type=int, default=6, help="Sections per song.")
+        parser.add_argument("--lines", type=int, default=4, help="Lines per section.")
+        parser.add_argument(
+            "--vocabulary", type=int, default=5000, help="Distinct base words to draw from."
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the word frequencies; higher makes common words commoner.",
+        )
+        parser.add_argument("--writers", type=int, default=50, help="Writers to credit.")
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=100,
+            help="Most common words to record variant lookups for.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed for repeatable output.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        generate_corpus(
+            SyntheticLyrics(options["vocabulary"], options["zipf"], options["seed"]),
+            songs=options["songs"],
+            sections=options["sections"],
+            lines_per_section=options["lines"],
+            writers=options["writers"],
+            variants=options["variants"],
+        )
+        lines = options["songs"] * options["sections"] * options["lines"]
+        self.stdout.write(
+            f"Added {options['songs']} songs, {lines} lines in "
+            f"{time.perf_counter() - started:.1f}s."
+        )
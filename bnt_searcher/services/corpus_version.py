@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+
+from bnt_parser.services.table_service import TableService
+
+
+class _RememberedCounter:
+    """One counter of the CorpusVersion row, re-read at most once per check interval."""
+
+    def __init__(self, counter: str):
+        self.counter = counter
+        self._value = 0
+        self._checked_at: float | None = None
+
+    def read(self) -> int:
+        now = time.monotonic()
+        if (
+            self._checked_at is None
+            or now - self._checked_at >= settings.SEARCH_VERSION_CHECK_SECONDS
+        ):
+            self._value = TableService().get_table("corpus_version").current(self.counter)
+            self._checked_at = now
+
+        return self._value
+
+    def forget(self) -> None:
+        self._checked_at = None
+
+
+_corpus = _RememberedCounter("version")
+_pairs = _RememberedCounter("pair_version")
+
+
+def corpus_version() -> int:
+    """
+    Return the corpus version, re-read at most once per SEARCH_VERSION_CHECK_SECONDS.
+
+    Every search consults the version, so reading it from the database each time
+    would add a round trip to requests that otherwise need none. A worker that did
+    not save the song itself therefore sees a new version up to that many seconds
+    late; the worker that did save it sees it at once, via forget_corpus_version().
+    """
+    return _corpus.read()
+
+
+def forget_corpus_version() -> None:
+    """Drop the remembered version so the next corpus_version() call re-reads it."""
+    _corpus.forget()
+
+
+def pair_version() -> int:
+    """
+    Return the version of the word pair counts, re-read as corpus_version() is.
+
+    Moved by the count_word_pairs cron job alone, so only what reads the pair
+    counts need be keyed on it.
+    """
+    return _pairs.read()
+
+
+def forget_pair_version() -> None:
+    """Drop the remembered pair version so the next pair_version() call re-reads it."""
+    _pairs.forget()
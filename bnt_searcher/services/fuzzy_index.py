@@ -0,0 +1,166 @@
+import threading
+
+from bnt_parser.models import Word
+from bnt_searcher.services.shared_structure import CHUNK_SIZE, SharedStructure
+
+# The most suggestions returned for one misspelt word.
+MAX_SUGGESTIONS = 10
+
+
+def edit_distance(a: str, b: str, limit: int | None = None) -> int:
+    """
+    Return the Levenshtein distance between *a* and *b*.
+
+    With *limit*, stops early once the distance must exceed it and returns
+    limit + 1, which is all a caller bounding the distance needs to know.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return previous[-1]
+
+
+def max_distance_for(term: str) -> int:
+    """Allow one typo in a short word and two in a longer one."""
+    return 1 if len(term) <= 4 else 2
+
+
+class FuzzyIndex:
+    """
+    BK-tree over every distinct word text, for finding words near a misspelling.
+
+    Each node's children are keyed by their edit distance from it. By the triangle
+    inequality, a word within d of the query can only sit under a child whose key
+    is within d of the query's distance to the node, so a lookup visits a small
+    part of the tree rather than scoring every word.
+
+    New words are inserted in place: the tree never needs rebuilding as the
+    vocabulary grows, only catching up with words added since it was last read.
+    Inserts take a lock; lookups do not. A node's children are never changed in
+    place but replaced by a copy holding the new child, so a lookup reads each
+    children dict whole, as it was before or after an insert.
+    """
+
+    def __init__(self, version: int = 0):
+        # The corpus version the index has caught up to.
+        self.version = version
+        # The highest Word id read so far; later words are the ones to add.
+        self.last_word_id = 0
+        self.size = 0
+        # A node is [text, {distance: child node}]; the dict is replaced, never changed.
+        self._root: list | None = None
+        self._lock = threading.Lock()
+
+    def add(self, texts) -> None:
+        """Insert each of *texts* not already in the tree."""
+        with self._lock:
+            for text in texts:
+                self._insert(text)
+
+    def _insert(self, text: str) -> None:
+        if self._root is None:
+            self._root = [text, {}]
+            self.size += 1
+            return
+
+        node = self._root
+        while True:
+            distance = edit_distance(text, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1] = {**node[1], distance: [text, {}]}
+                self.size += 1
+                return
+            node = child
+
+    @classmethod
+    def build(cls, version: int) -> "FuzzyIndex":
+        index = cls()
+        index.catch_up(version)
+        return index
+
+    def catch_up(self, version: int) -> None:
+        """Insert every word saved since the index last read the Word table."""
+        new_words = Word.objects.filter(pk__gt=self.last_word_id).order_by("pk")
+        for word_id, text in new_words.values_list("id", "text").iterator(chunk_size=CHUNK_SIZE):
+            self.add((text,))
+            self.last_word_id = word_id
+        self.version = version
+
+    def suggest(self, term: str, max_distance: int, limit: int = MAX_SUGGESTIONS) -> list[str]:
+        """
+        Return up to *limit* words within *max_distance* edits of *term*, nearest
+        first and then alphabetically. The term itself is never suggested.
+        """
+        found: list[tuple[int, str]] = []
+        root = self._root
+        pending = [root] if root is not None else []
+        while pending:
+            text, children = pending.pop()
+            # No child is worth visiting once the distance passes the largest key by
+            # more than max_distance, so the distance need only be worked out that far;
+            # past it, bound + 1 prunes every child just as the true distance would.
+            bound = max(children, default=0) + max_distance
+            distance = edit_distance(term, text, bound)
+            if 0 < distance <= max_distance:
+                found.append((distance, text))
+            low, high = distance - max_distance, distance + max_distance
+            pending.extend(child for key, child in children.items() if low <= key <= high)
+
+        return [text for _, text in sorted(found)[:limit]]
+
+
+_index: SharedStructure = SharedStructure(
+    "fuzzy index",
+    FuzzyIndex.build,
+    lambda index: f"{index.size} words",
+    catch_up=FuzzyIndex.catch_up,
+)
+
+
+def get_fuzzy_index() -> FuzzyIndex:
+    """
+    Return the shared fuzzy index, building it on first use and taking in words
+    saved since whenever the corpus version moves on.
+    """
+    return _index.get()
+
+
+def warm_fuzzy_index() -> None:
+    """Build the index at startup so the first misspelt search does not pay for it."""
+    _index.warm()
+
+
+def forget_fuzzy_index() -> None:
+    """Drop the index, to be built on next use."""
+    _index.forget()
+
+
+def add_words(texts: list[str]) -> None:
+    """
+    Insert newly saved words if this process has built an index; otherwise do nothing.
+
+    Only this worker hears about the words this way. Other workers take them in
+    when they next see the corpus version move.
+    """
+    if _index.current is not None:
+        _index.current.add(texts)
@@ -0,0 +1,258 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+
+from bnt_parser.models import Line, Section, Word, Writer
+from bnt_searcher.services.shared_structure import CHUNK_SIZE, SharedStructure
+from bnt_searcher.services.writer_songs import get_writer_songs
+
+# Section types are held as one byte per line: the index into this tuple.
+SECTION_TYPES = tuple(Section.SectionTypeEnum.values)
+
+
+def intersect_postings(smaller, larger) -> array:
+    """
+    Return the values found in both sorted sequences, in order.
+
+    Each value of *smaller* is found in *larger* by binary search, resuming from the
+    last hit, so the cost follows the smaller list rather than the sum of both.
+    """
+    found = array("q")
+    start = 0
+    for value in smaller:
+        start = bisect_left(larger, value, start)
+        if start == len(larger):
+            break
+        if larger[start] == value:
+            found.append(value)
+    return found
+
+
+def subtract_postings(postings, removed) -> array:
+    """Return the values of sorted *postings* missing from sorted *removed*, in order."""
+    kept = array("q")
+    start = 0
+    for value in postings:
+        start = bisect_left(removed, value, start)
+        if start == len(removed) or removed[start] != value:
+            kept.append(value)
+    return kept
+
+
+class PostingsIndex:
+    """
+    In-memory inverted index over the Word.line links.
+
+    Every line in the corpus is given a position in search order — song, then
+    section order, then line order — and its columns are held in parallel arrays
+    at that position. A posting list is the sorted array of positions for one word
+    text, so merging posting lists yields lines already in the order the search
+    returns them, and grouping by song needs no sort.
+
+    Only ids and orders are held here. Lyrics, titles and writer details are read
+    from the database for the one page of results being returned.
+    """
+
+    def __init__(self, version: int = 0):
+        # The corpus version the index was built from.
+        self.version = version
+
+        self.line_ids = array("q")
+        self.song_ids = array("q")
+        self.section_ids = array("q")
+        self.section_orders = array("l")
+        self.line_orders = array("l")
+        self.section_types = array("b")
+
+        self.postings: dict[str, array] = {}
+        # The sorted song ids each word text appears in, for song-level boolean queries.
+        self.song_postings: dict[str, array] = {}
+        # Each song's lines are a run of positions: song id to (first, past last).
+        self.song_ranges: dict[int, tuple[int, int]] = {}
+        # Word text is not unique, so keep the earliest id, as WordTable.find_word does.
+        self.word_ids: dict[str, int] = {}
+        # Writer names per song, for the writers facet.
+        self.song_writers: dict[int, tuple[str, ...]] = {}
+
+    @classmethod
+    def build(cls, version: int) -> "PostingsIndex":
+        """
+        Read the whole corpus and build a fresh index from it.
+
+        Streams each table in chunks rather than loading a queryset, so peak memory
+        is the finished index rather than the index plus a list of model rows.
+
+        *version* should be read before the build starts: a song saved mid-build
+        then leaves the index marked older than the corpus, never newer.
+        """
+        index = cls(version)
+        type_codes = {value: code for code, value in enumerate(SECTION_TYPES)}
+        position_by_line: dict[int, int] = {}
+
+        lines = Line.objects.order_by("section__song_id", "section__order", "order").values_list(
+            "id", "section__song_id", "section_id", "section__order", "order", "section__type"
+        )
+        for position, row in enumerate(lines.iterator(chunk_size=CHUNK_SIZE)):
+            line_id, song_id, section_id, section_order, line_order, section_type = row
+            position_by_line[line_id] = position
+            index.line_ids.append(line_id)
+            index.song_ids.append(song_id)
+            index.section_ids.append(section_id)
+            index.section_orders.append(section_order)
+            index.line_orders.append(line_order)
+            index.section_types.append(type_codes[section_type])
+            first, _ = index.song_ranges.get(song_id, (position, None))
+            index.song_ranges[song_id] = (first, position + 1)
+
+        postings: dict[str, set[int]] = {}
+        links = Word.line.through.objects.values_list("word__text", "line_id")
+        for text, line_id in links.iterator(chunk_size=CHUNK_SIZE):
+            postings.setdefault(text, set()).add(position_by_line[line_id])
+        index.postings = {text: array("l", sorted(found)) for text, found in postings.items()}
+        # Positions run in song order, so each word's songs come out sorted already.
+        index.song_postings = {
+            text: array("q", dict.fromkeys(index.song_ids[p] for p in found))
+            for text, found in index.postings.items()
+        }
+
+        for text, word_id in Word.objects.order_by("pk").values_list("text", "id"):
+            index.word_ids.setdefault(text, word_id)
+
+        song_writers: dict[int, list[str]] = {}
+        authorship = Writer.songs.through.objects.values_list("song_id", "writer__name")
+        for song_id, name in authorship.iterator(chunk_size=CHUNK_SIZE):
+            song_writers.setdefault(song_id, []).append(name)
+        index.song_writers = {song_id: tuple(names) for song_id, names in song_writers.items()}
+
+        return index
+
+    def has_any(self, terms: list[str]) -> bool:
+        return any(term in self.postings for term in terms)
+
+    def match(
+        self,
+        terms: list[str],
+        section_types: list[str],
+        primary_writers: list[str],
+        co_writers: list[str],
+    ) -> list[int]:
+        """
+        Return the positions of every line matching the search, in search order.
+
+        Mirrors the database query in WordSearchView: a line matches when it holds
+        any of the terms, its section type is one of section_types (when given), and
+        its song has one of primary_writers and one of co_writers (each list ORed
+        within itself, when given), each writer given by id or part of their name.
+        """
+        return self.filter_positions(
+            self._union(self.postings, terms), section_types, primary_writers, co_writers
+        )
+
+    def match_boolean(
+        self,
+        all_terms: list[str],
+        any_terms: list[str],
+        not_terms: list[str],
+        song_scope: bool,
+    ) -> list[int]:
+        """
+        Return the positions of every line matching a boolean query, in search order.
+
+        A line, or with *song_scope* a song, matches when it holds every one of
+        all_terms, at least one of any_terms (when given) and none of not_terms.
+        Posting lists are intersected smallest first, so an AND costs about the size
+        of its rarest term. At song scope the lines returned are those of matching
+        songs that hold one of the wanted terms.
+        """
+        postings = self.song_postings if song_scope else self.postings
+        if any(term not in postings for term in all_terms):
+            return []
+
+        lists = sorted((postings[term] for term in all_terms), key=len)
+        if any_terms:
+            lists.append(self._union(postings, any_terms))
+            lists.sort(key=len)
+        matched = lists[0]
+        for other in lists[1:]:
+            matched = intersect_postings(matched, other)
+        for term in not_terms:
+            if term in postings:
+                matched = subtract_postings(matched, postings[term])
+
+        if not song_scope:
+            return list(matched)
+
+        # Only the matched songs' runs of each posting list are read, so the cost
+        # follows the matches rather than the commonest term's postings.
+        wanted = [self.postings[term] for term in all_terms + any_terms if term in self.postings]
+        found: set[int] = set()
+        for song_id in matched:
+            start, end = self.song_ranges[song_id]
+            for term_postings in wanted:
+                low = bisect_left(term_postings, start)
+                found.update(term_postings[low : bisect_left(term_postings, end, low)])
+        return sorted(found)
+
+    def filter_positions(
+        self,
+        positions: list[int],
+        section_types: list[str],
+        primary_writers: list[str],
+        co_writers: list[str],
+    ) -> list[int]:
+        """Keep the positions whose line passes the section type and writer filters."""
+        if section_types:
+            wanted = {code for code, value in enumerate(SECTION_TYPES) if value in section_types}
+            positions = [p for p in positions if self.section_types[p] in wanted]
+
+        for writers in (primary_writers, co_writers):
+            if writers:
+                songs = set(get_writer_songs().song_ids(writers))
+                positions = [p for p in positions if self.song_ids[p] in songs]
+
+        return positions
+
+    @staticmethod
+    def _union(postings: dict[str, array], terms: list[str]) -> list[int]:
+        found: set[int] = set()
+        for term in terms:
+            found.update(postings.get(term, ()))
+        return sorted(found)
+
+
+_index: SharedStructure = SharedStructure(
+    "postings index",
+    PostingsIndex.build,
+    lambda index: f"{len(index.line_ids)} lines, {len(index.postings)} words",
+)
+
+
+def get_postings_index() -> PostingsIndex | None:
+    """
+    Return the shared postings index, building it on first use and rebuilding it
+    once the corpus version has moved on.
+
+    Returns None when SEARCH_POSTINGS_INDEX is off, so the caller falls back to
+    querying the database.
+    """
+    if not settings.SEARCH_POSTINGS_INDEX:
+        return None
+
+    return _index.get()
+
+
+def rebuild_postings_index() -> PostingsIndex:
+    """Build a fresh index and swap it in."""
+    return _index.rebuild()
+
+
+def forget_postings_index() -> None:
+    """Drop the index, to be built on next use."""
+    _index.forget()
+
+
+def warm_postings_index() -> None:
+    """Build the index at startup, if it is on, so the first search does not pay for it."""
+    if settings.SEARCH_POSTINGS_INDEX:
+        _index.warm()
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CacheStats:
+    """Hit and miss counts for one process, for sizing the cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+class LRUResponseCache:
+    """
+    Per-process cache of search responses, evicting the least recently used.
+
+    Each gunicorn worker holds its own copy, so a response cached by one worker is
+    a miss on the others.
+    """
+
+    name = "lru"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return data
+
+    def set(self, key: str, data: dict) -> None:
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "size": len(self._entries), "max_size": self.max_size}
+
+
+class DjangoResponseCache:
+    """
+    Search responses held in a Django cache, shared by every worker using it.
+
+    Sizing and eviction belong to the configured cache backend. Entries from an old
+    corpus version are never read again and age out under the backend's own policy.
+    """
+
+    name = "django"
+
+    def __init__(self, alias: str, timeout: int | None):
+        self.alias = alias
+        self.timeout = timeout
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> dict | None:
+        data = caches[self.alias].get(key)
+        if data is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return data
+
+    def set(self, key: str, data: dict) -> None:
+        caches[self.alias].set(key, data, timeout=self.timeout)
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "alias": self.alias, "timeout": self.timeout}
+
+
+_cache: LRUResponseCache | DjangoResponseCache | None = None
+_cache_config: tuple | None = None
+
+
+def get_response_cache() -> LRUResponseCache | DjangoResponseCache | None:
+    """
+    Return the search response cache chosen by SEARCH_RESPONSE_CACHE.
+
+    "lru" keeps responses in this process; "django" keeps them in the Django cache
+    named by SEARCH_RESPONSE_CACHE_ALIAS. Returns None when caching is off.
+    """
+    global _cache, _cache_config
+
+    config = (
+        settings.SEARCH_RESPONSE_CACHE,
+        settings.SEARCH_RESPONSE_CACHE_SIZE,
+        settings.SEARCH_RESPONSE_CACHE_ALIAS,
+        settings.SEARCH_RESPONSE_CACHE_TIMEOUT,
+    )
+    if config != _cache_config:
+        backend, max_size, alias, timeout = config
+        if backend == "lru":
+            _cache = LRUResponseCache(max_size=max_size)
+        elif backend == "django":
+            _cache = DjangoResponseCache(alias=alias, timeout=timeout)
+        elif not backend:
+            _cache = None
+        else:
+            raise ValueError(f"Unknown SEARCH_RESPONSE_CACHE backend '{backend}'.")
+        _cache_config = config
+
+    return _cache
+
+
+def query_digest(*parts) -> str:
+    """Hash JSON-serialisable *parts* into a short stable digest."""
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode()).hexdigest()
+
+
+def response_cache_key(prefix: str, host: str, query: list, version: int) -> str:
+    """
+    Build a cache key from a normalised query and the corpus version.
+
+    The host is included because responses carry absolute page URLs.
+    """
+    return f"{prefix}:{version}:{query_digest(host, query)}"
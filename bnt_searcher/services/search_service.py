@@ -0,0 +1,766 @@
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q
+
+from bnt_parser.models import Line, Section, Song, Word, WordFrequency, WordPosition, Writer
+from bnt_parser.utils.phonetic import phonetic_key
+from bnt_searcher.services.postings_index import SECTION_TYPES, PostingsIndex
+from bnt_searcher.services.writer_songs import get_writer_songs
+
+
+def _song_result(song: Song, sections: list[dict]) -> dict:
+    return {
+        "id": song.id,
+        "title": song.title,
+        "artist": song.artist,
+        "writers": [{"id": w.id, "name": w.name} for w in song.writers.all()],
+        "sections": sections,
+    }
+
+
+def _line_result(line_id: int, order: int, lyric: str) -> dict:
+    return {"id": line_id, "order": order, "lyric": lyric}
+
+
+def add_context(results: list[dict], lines_around: int) -> None:
+    """
+    Surround each matched line in *results* with up to *lines_around* lines on
+    either side of it from the same section, in place.
+
+    Windows that overlap or touch are merged first, so a line near two matches is
+    sent once, and the lines of every window on the page are read in one query on
+    (section, order). Each line gains "match", false for the lines added around.
+    """
+    sections = [section for song in results for section in song["sections"]]
+    windows = []
+    for section in sections:
+        merged = []
+        for order in sorted(line["order"] for line in section["lines"]):
+            low, high = order - lines_around, order + lines_around
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1][1] = high
+            else:
+                merged.append([low, high])
+        windows.extend(
+            Q(section_id=section["id"], order__range=(low, high)) for low, high in merged
+        )
+    if not windows:
+        return
+
+    lines_by_section = defaultdict(list)
+    lines = Line.objects.filter(reduce(or_, windows)).order_by("section_id", "order")
+    for section_id, line_id, order, lyric in lines.values_list(
+        "section_id", "id", "order", "lyrics"
+    ):
+        lines_by_section[section_id].append(_line_result(line_id, order, lyric))
+
+    for section in sections:
+        matched = {line["id"] for line in section["lines"]}
+        section["lines"] = [
+            {**line, "match": line["id"] in matched} for line in lines_by_section[section["id"]]
+        ]
+
+
+def _in_section_type_order(counts: dict) -> dict[str, int]:
+    """Key section type counts by type value, listed in the order types are declared."""
+    counts = {Section.SectionTypeEnum(key).value: lines for key, lines in counts.items()}
+    return {value: counts[value] for value in SECTION_TYPES if value in counts}
+
+
+# Columns of an exported match, one row per line.
+EXPORT_FIELDS = (
+    "song_id",
+    "title",
+    "artist",
+    "writers",
+    "section_id",
+    "section_type",
+    "section_order",
+    "line_id",
+    "line_order",
+    "lyric",
+)
+
+
+def _export_row(
+    song_id: int,
+    title: str,
+    artist: str,
+    writers,
+    section_id: int,
+    section_type: str,
+    section_order: int,
+    line_id: int,
+    line_order: int,
+    lyric: str,
+) -> dict:
+    return {
+        "song_id": song_id,
+        "title": title,
+        "artist": artist,
+        "writers": list(writers),
+        "section_id": section_id,
+        "section_type": section_type,
+        "section_order": section_order,
+        "line_id": line_id,
+        "line_order": line_order,
+        "lyric": lyric,
+    }
+
+
+def build_lines_queryset(
+    terms: list[str],
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+):
+    """Build the query for every line holding any of *terms*, in search order."""
+    return filter_lines(
+        Line.objects.filter(words__text__in=terms), section_types, primary_writers, co_writers
+    )
+
+
+def filter_lines(
+    lines_qs,
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+):
+    """Apply the search filters to a query of matching lines and put it in search order."""
+    lines_qs = (
+        # The search vector is only matched on, never shown; reading it would ship
+        # and compare a tsvector per line under DISTINCT.
+        lines_qs.defer("search_vector")
+        .select_related("section", "section__song")
+        .prefetch_related("section__song__writers")
+        .order_by("section__song_id", "section__order", "order")
+    )
+    return _apply_filters(lines_qs, section_types, primary_writers, co_writers).distinct()
+
+
+def _apply_filters(
+    lines_qs,
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+):
+    """
+    Narrow a query of lines to the section types and writers searched for.
+
+    Writers are given by id or by a substring of their name. Each writer list is
+    ORed within itself and resolved to song ids in memory, so the filter is on the
+    line's song id rather than a join through every song's writers.
+    """
+    if section_types:
+        lines_qs = lines_qs.filter(section__type__in=section_types)
+
+    for writers in (primary_writers, co_writers):
+        if writers:
+            lines_qs = lines_qs.filter(section__song_id__in=get_writer_songs().song_ids(writers))
+
+    return lines_qs
+
+
+class DatabaseMatches:
+    """
+    Search results answered by the database through the Word.line join table.
+
+    Nothing is loaded up front. Counts and the writers facet come from aggregate
+    queries, and a page reads only its own songs and their lines, so the cost of a
+    search does not grow with the number of lines it matches.
+    """
+
+    def __init__(self, lines_qs):
+        self.lines_qs = lines_qs
+
+        self.song_map = {}
+        self.section_map = {}  # section_id → {'obj': Section, 'lines': [Line, ...]}
+        self.song_sections = defaultdict(list)  # song_id → [section_id, ...]
+
+    def _group(self, lines) -> None:
+        # Group lines into song → section → lines, preserving order
+        for line in lines:
+            section = line.section
+            song = section.song
+            if song.id not in self.song_map:
+                self.song_map[song.id] = song
+            if section.id not in self.section_map:
+                self.section_map[section.id] = {"obj": section, "lines": []}
+                self.song_sections[song.id].append(section.id)
+            self.section_map[section.id]["lines"].append(line)
+
+    def _song_ids(self):
+        return (
+            self.lines_qs.order_by("section__song_id")
+            .values_list("section__song_id", flat=True)
+            .distinct()
+        )
+
+    def count(self) -> tuple[int, int]:
+        """Return (songs, lines) matched, counted by the database."""
+        totals = self.lines_qs.order_by().aggregate(
+            songs=Count("section__song_id", distinct=True),
+            lines=Count("id", distinct=True),
+        )
+        return totals["songs"], totals["lines"]
+
+    def writer_names(self) -> list[str]:
+        """Return the sorted names of every writer of a matched song."""
+        song_ids = self.lines_qs.order_by().values("section__song_id")
+        return list(
+            Writer.objects.filter(songs__in=song_ids)
+            .order_by("name")
+            .values_list("name", flat=True)
+            .distinct()
+        )
+
+    def section_type_counts(self) -> dict[str, int]:
+        """Return the lines matched in each section type, by one GROUP BY on the type."""
+        counts = dict(
+            self.lines_qs.order_by()
+            .values("section__type")
+            .annotate(lines=Count("id", distinct=True))
+            .values_list("section__type", "lines")
+        )
+        return _in_section_type_order(counts)
+
+    def page(self, start: int, end: int) -> list[dict]:
+        page_song_ids = list(self._song_ids()[start:end])
+        self._group(self.lines_qs.filter(section__song_id__in=page_song_ids))
+        return self._results(page_song_ids)
+
+    def page_after(self, after: int | None, limit: int) -> tuple[list[dict], int | None]:
+        """
+        Return the page of songs following song id *after*, and the last song id on
+        it when more songs follow.
+
+        Songs are keyed by id, the leading column of the search order (song, section
+        order, line order), so a page boundary always falls between two song ids and
+        the cursor needs nothing more. Only the page's song ids and their lines are
+        read.
+        """
+        song_ids_qs = self._song_ids()
+        if after is not None:
+            song_ids_qs = song_ids_qs.filter(section__song_id__gt=after)
+        song_ids = list(song_ids_qs[: limit + 1])
+
+        page_song_ids = song_ids[:limit]
+        self._group(self.lines_qs.filter(section__song_id__in=page_song_ids))
+        next_after = page_song_ids[-1] if len(song_ids) > limit else None
+
+        return self._results(page_song_ids), next_after
+
+    def iter_rows(self, chunk_size: int):
+        """
+        Yield every match as a flat export row, in search order.
+
+        Read through a server-side cursor chunk by chunk, with each chunk's writers
+        prefetched, so memory holds one chunk however many lines match.
+        """
+        for line in self.lines_qs.defer("search_vector").iterator(chunk_size=chunk_size):
+            section = line.section
+            song = section.song
+            yield _export_row(
+                song.id,
+                song.title,
+                song.artist,
+                (w.name for w in song.writers.all()),
+                section.id,
+                section.type.value,
+                section.order,
+                line.id,
+                line.order,
+                line.lyrics,
+            )
+
+    def _results(self, song_ids: list[int]) -> list[dict]:
+        results = []
+        for song_id in song_ids:
+            sections_out = []
+            for section_id in self.song_sections[song_id]:
+                s = self.section_map[section_id]
+                section = s["obj"]
+                sections_out.append(
+                    {
+                        "id": section.id,
+                        "type": section.type.value,
+                        "order": section.order,
+                        "lines": [
+                            _line_result(line.id, line.order, line.lyrics) for line in s["lines"]
+                        ],
+                    }
+                )
+            results.append(_song_result(self.song_map[song_id], sections_out))
+        return results
+
+
+class FullTextMatches(DatabaseMatches):
+    """
+    Search results answered by Postgres full-text search over Line.search_vector.
+
+    With *ranked*, songs are ordered by their best line's SearchRank instead of by
+    id. Keyset pages rely on id order, so ranked results are paged by offset only.
+    """
+
+    def __init__(self, lines_qs, query: SearchQuery, ranked: bool = False):
+        super().__init__(lines_qs)
+        self.query = query
+        self.ranked = ranked
+
+    def _song_ids(self):
+        if not self.ranked:
+            return super()._song_ids()
+        # Grouped over a plain subquery of the matches: the filtered query is DISTINCT,
+        # which Postgres will not combine with ordering by an aggregate.
+        return (
+            Line.objects.filter(id__in=self.lines_qs.order_by().values("id"))
+            .values("section__song_id")
+            .annotate(best=Max(SearchRank(F("search_vector"), self.query)))
+            .order_by("-best", "section__song_id")
+            .values_list("section__song_id", flat=True)
+        )
+
+    def page_after(self, after: int | None, limit: int) -> tuple[list[dict], int | None]:
+        if self.ranked:
+            raise ValueError("Ranked results cannot be paged by cursor.")
+        return super().page_after(after, limit)
+
+
+class IndexMatches:
+    """
+    Search results answered by the in-memory postings index.
+
+    Matching, filtering, counting and grouping all run against the index. The
+    database is read only for the songs and lyrics on the page being returned.
+    """
+
+    def __init__(self, index: PostingsIndex, positions: list[int]):
+        self.index = index
+        self.positions = positions
+
+        # Positions are in search order, so each song's lines are one contiguous run.
+        self.song_order = []
+        self.song_runs = {}  # song_id → (first, last + 1) into self.positions
+        self.type_counts = Counter()  # section type code → lines
+        for offset, position in enumerate(positions):
+            self.type_counts[index.section_types[position]] += 1
+            song_id = index.song_ids[position]
+            if song_id in self.song_runs:
+                self.song_runs[song_id] = (self.song_runs[song_id][0], offset + 1)
+            else:
+                self.song_order.append(song_id)
+                self.song_runs[song_id] = (offset, offset + 1)
+
+        self.total_songs = len(self.song_order)
+        self.total_lines = len(positions)
+
+    def count(self) -> tuple[int, int]:
+        return self.total_songs, self.total_lines
+
+    def writer_names(self) -> list[str]:
+        all_writers = set()
+        for song_id in self.song_order:
+            all_writers.update(self.index.song_writers.get(song_id, ()))
+        return sorted(all_writers)
+
+    def section_type_counts(self) -> dict[str, int]:
+        """Return the lines matched in each section type, counted as the matches were read."""
+        return _in_section_type_order(
+            {SECTION_TYPES[code]: lines for code, lines in self.type_counts.items()}
+        )
+
+    def page(self, start: int, end: int) -> list[dict]:
+        return self._results(self.song_order[start:end])
+
+    def page_after(self, after: int | None, limit: int) -> tuple[list[dict], int | None]:
+        # Song ids are ascending in search order, so the cursor is a binary search.
+        start = 0 if after is None else bisect_right(self.song_order, after)
+        end = start + limit
+        next_after = self.song_order[end - 1] if end < self.total_songs else None
+        return self._results(self.song_order[start:end]), next_after
+
+    def iter_rows(self, chunk_size: int):
+        """
+        Yield every match as a flat export row, in search order.
+
+        Positions come from the index; titles and lyrics are read one chunk of
+        lines at a time.
+        """
+        index = self.index
+        for start in range(0, self.total_lines, chunk_size):
+            positions = self.positions[start : start + chunk_size]
+            lyrics = dict(
+                Line.objects.filter(id__in=[index.line_ids[p] for p in positions]).values_list(
+                    "id", "lyrics"
+                )
+            )
+            songs = {
+                song_id: (title, artist)
+                for song_id, title, artist in Song.objects.filter(
+                    id__in={index.song_ids[p] for p in positions}
+                ).values_list("id", "title", "artist")
+            }
+            for position in positions:
+                song_id = index.song_ids[position]
+                line_id = index.line_ids[position]
+                yield _export_row(
+                    song_id,
+                    *songs[song_id],
+                    index.song_writers.get(song_id, ()),
+                    index.section_ids[position],
+                    SECTION_TYPES[index.section_types[position]],
+                    index.section_orders[position],
+                    line_id,
+                    index.line_orders[position],
+                    lyrics[line_id],
+                )
+
+    def _results(self, page_song_ids: list[int]) -> list[dict]:
+        index = self.index
+        page_positions = [
+            position
+            for song_id in page_song_ids
+            for position in self.positions[slice(*self.song_runs[song_id])]
+        ]
+
+        songs = Song.objects.prefetch_related("writers").in_bulk(page_song_ids)
+        lyrics = dict(
+            Line.objects.filter(id__in=[index.line_ids[p] for p in page_positions]).values_list(
+                "id", "lyrics"
+            )
+        )
+
+        sections_by_song = defaultdict(list)
+        for position in page_positions:
+            song_sections = sections_by_song[index.song_ids[position]]
+            section_id = index.section_ids[position]
+            if not song_sections or song_sections[-1]["id"] != section_id:
+                song_sections.append(
+                    {
+                        "id": section_id,
+                        "type": SECTION_TYPES[index.section_types[position]],
+                        "order": index.section_orders[position],
+                        "lines": [],
+                    }
+                )
+            line_id = index.line_ids[position]
+            song_sections[-1]["lines"].append(
+                _line_result(line_id, index.line_orders[position], lyrics[line_id])
+            )
+
+        return [
+            _song_result(songs[song_id], sections_by_song[song_id]) for song_id in page_song_ids
+        ]
+
+
+# Trigrams need three characters; a shorter fragment cannot use the index.
+MIN_CONTAINS_LENGTH = 3
+
+
+def contains_enabled() -> bool:
+    """
+    Whether substring search is available: only on Postgres, where migration 0012
+    gives Line.lyrics a trigram index. Anywhere else it would scan every line.
+    """
+    return connection.vendor == "postgresql"
+
+
+def find_contains_matches(
+    fragment: str,
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+) -> DatabaseMatches:
+    """
+    Find every line whose lyrics contain *fragment* anywhere, ignoring case.
+
+    Unlike a word search this needs no tokenising, so it finds partial words, text
+    inside hyphenated compounds and anything spanning words. The trigram index on
+    UPPER(lyrics) answers the ICONTAINS.
+    """
+    return DatabaseMatches(
+        filter_lines(
+            Line.objects.filter(lyrics__icontains=fragment),
+            section_types,
+            primary_writers,
+            co_writers,
+        )
+    )
+
+
+def full_text_enabled() -> bool:
+    """Whether searches go to Postgres full-text search: chosen, and on Postgres."""
+    return settings.SEARCH_ENGINE == "postgres" and connection.vendor == "postgresql"
+
+
+def find_full_text_matches(
+    terms: list[str],
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+    phrase: bool = False,
+    ranked: bool = False,
+) -> FullTextMatches:
+    """
+    Find every line matching any of *terms* by Postgres full-text search.
+
+    Terms are stemmed by SEARCH_FTS_CONFIG, so "dancing" also finds "dance". With
+    *phrase*, each term is a phrase whose words must appear in order, one after
+    another. The GIN index on Line.search_vector answers the match.
+    """
+    search_type = "phrase" if phrase else "plain"
+    query = reduce(
+        or_,
+        (
+            SearchQuery(term, config=settings.SEARCH_FTS_CONFIG, search_type=search_type)
+            for term in terms
+        ),
+    )
+    lines_qs = filter_lines(
+        Line.objects.filter(search_vector=query), section_types, primary_writers, co_writers
+    )
+    return FullTextMatches(lines_qs, query, ranked=ranked)
+
+
+def find_word_id(search_term: str, index: PostingsIndex | None) -> int | None:
+    if index is not None:
+        return index.word_ids.get(search_term)
+
+    word_obj = Word.objects.filter(text=search_term).first()
+    return word_obj.id if word_obj else None
+
+
+def find_word_ids(texts: list[str], index: PostingsIndex | None) -> dict[str, int]:
+    """Look up the id of each of *texts* that is a known word, in one query at most."""
+    if index is not None:
+        return {text: index.word_ids[text] for text in texts if text in index.word_ids}
+
+    # Text is not unique, so take the earliest word, as find_word_id does.
+    return dict(
+        Word.objects.filter(text__in=texts)
+        .order_by()
+        .values("text")
+        .annotate(first_id=Min("id"))
+        .values_list("text", "first_id")
+    )
+
+
+def find_sound_alikes(search_term: str) -> list[str]:
+    """
+    Return the known words that sound like *search_term*, by their phonetic key.
+
+    One indexed lookup; the term itself is included when it is a known word.
+    """
+    key = phonetic_key(search_term)
+    if not key:
+        return []
+
+    return list(
+        Word.objects.filter(phonetic=key).order_by("text").values_list("text", flat=True).distinct()
+    )
+
+
+def count_batch_matches(
+    term_texts: dict[str, list[str]],
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+    index: PostingsIndex | None,
+) -> dict[str, tuple[int, int]]:
+    """
+    Count the (songs, lines) matched by each of several word searches.
+
+    *term_texts* maps each search to the word texts it matches: its word and, when
+    wanted, the word's variants. From the index the counts cost no queries. From
+    the database they cost one: every line holding any of the texts is joined once,
+    and each search's totals are distinct counts filtered to its own texts, so a
+    line holding two variants of a word still counts once for it.
+    """
+    if index is not None:
+        counts = {}
+        for term, texts in term_texts.items():
+            matches = find_matches(texts, section_types, primary_writers, co_writers, index)
+            counts[term] = matches.count() if matches is not None else (0, 0)
+        return counts
+
+    all_texts = {text for texts in term_texts.values() for text in texts}
+    lines_qs = _apply_filters(
+        Line.objects.filter(words__text__in=all_texts), section_types, primary_writers, co_writers
+    )
+    aggregates = {}
+    for n, texts in enumerate(term_texts.values()):
+        holds_term = Q(words__text__in=texts)
+        aggregates[f"songs_{n}"] = Count("section__song_id", distinct=True, filter=holds_term)
+        aggregates[f"lines_{n}"] = Count("id", distinct=True, filter=holds_term)
+    totals = lines_qs.order_by().aggregate(**aggregates)
+
+    return {term: (totals[f"songs_{n}"], totals[f"lines_{n}"]) for n, term in enumerate(term_texts)}
+
+
+def find_matches(
+    terms: list[str],
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+    index: PostingsIndex | None,
+) -> DatabaseMatches | IndexMatches | None:
+    """
+    Find every line matching the search, from the index when there is one.
+
+    Returns None when none of the terms is a known word at all.
+    """
+    if index is not None:
+        if not index.has_any(terms):
+            return None
+        positions = index.match(terms, section_types, primary_writers, co_writers)
+        return IndexMatches(index, positions)
+
+    if not Word.objects.filter(text__in=terms).exists():
+        return None
+
+    return DatabaseMatches(build_lines_queryset(terms, section_types, primary_writers, co_writers))
+
+
+def find_rhyme_matches(
+    rhyme: str,
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+) -> DatabaseMatches:
+    """Find every line whose final word has the rhyme key *rhyme*, by its index."""
+    return DatabaseMatches(
+        filter_lines(Line.objects.filter(rhyme=rhyme), section_types, primary_writers, co_writers)
+    )
+
+
+def find_phrase_matches(
+    phrase: list[str],
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+) -> DatabaseMatches | None:
+    """
+    Find every line holding the words of *phrase* at consecutive positions.
+
+    Adjacency is a postings intersection over WordPosition. The rarest word is the
+    anchor: its occurrences are read through the word index, and each other word is
+    probed at the anchor's position plus its offset through the (line, position)
+    index. Work is bounded by the anchor's postings, however common the other words.
+    The rarest word is picked by its stored WordFrequency line count, so no position
+    is read but the anchor's and the probes'.
+
+    Returns None when any word of the phrase never occurs.
+    """
+    counts = dict(
+        WordFrequency.objects.filter(text__in=phrase, line_count__gt=0).values_list(
+            "text", "line_count"
+        )
+    )
+    if any(word not in counts for word in phrase):
+        return None
+
+    anchor_offset = min(range(len(phrase)), key=lambda offset: counts[phrase[offset]])
+    anchors = WordPosition.objects.filter(word__text=phrase[anchor_offset])
+    for offset, word in enumerate(phrase):
+        if offset == anchor_offset:
+            continue
+        anchors = anchors.filter(
+            Exists(
+                WordPosition.objects.filter(
+                    line_id=OuterRef("line_id"),
+                    position=OuterRef("position") + (offset - anchor_offset),
+                    word__text=word,
+                )
+            )
+        )
+
+    return DatabaseMatches(
+        filter_lines(
+            Line.objects.filter(id__in=anchors.values("line_id")),
+            section_types,
+            primary_writers,
+            co_writers,
+        )
+    )
+
+
+def find_boolean_matches(
+    all_terms: list[str],
+    any_terms: list[str],
+    not_terms: list[str],
+    song_scope: bool,
+    section_types: list[str],
+    primary_writers: list[str],
+    co_writers: list[str],
+    index: PostingsIndex | None,
+) -> DatabaseMatches | IndexMatches | None:
+    """
+    Find every line matching a boolean query, from the index when there is one.
+
+    A line, or with *song_scope* a song, matches when it holds every one of
+    all_terms, at least one of any_terms (when given) and none of not_terms. At song
+    scope the lines returned are those of matching songs holding a wanted term.
+
+    In the database the rarest of all_terms drives the query and each other term is
+    an EXISTS probe on the Word.line table, so an AND costs about the rarest term's
+    postings rather than a scan of every term's.
+
+    Returns None when nothing can match: one of all_terms, or every one of any_terms,
+    is not a known word.
+    """
+    wanted = all_terms + any_terms
+    if index is not None:
+        if any(term not in index.postings for term in all_terms) or not index.has_any(wanted):
+            return None
+        positions = index.match_boolean(all_terms, any_terms, not_terms, song_scope)
+        return IndexMatches(
+            index,
+            index.filter_positions(positions, section_types, primary_writers, co_writers),
+        )
+
+    links = Word.line.through.objects
+    counts = dict(
+        links.filter(word__text__in=wanted)
+        .values("word__text")
+        .annotate(n=Count("id"))
+        .values_list("word__text", "n")
+    )
+    if any(term not in counts for term in all_terms) or not counts:
+        return None
+
+    if song_scope:
+        unit = "line__section__song_id"
+
+        def holds(term):
+            return Exists(
+                links.filter(line__section__song_id=OuterRef("section__song_id"), word__text=term)
+            )
+    else:
+        unit = "line_id"
+
+        def holds(term):
+            return Exists(links.filter(line_id=OuterRef("pk"), word__text=term))
+
+    lines_qs = Line.objects.filter(words__text__in=wanted)
+    if all_terms:
+        anchor = min(all_terms, key=lambda term: counts[term])
+        anchor_units = links.filter(word__text=anchor).values(unit)
+        if song_scope:
+            lines_qs = lines_qs.filter(section__song_id__in=anchor_units)
+        else:
+            lines_qs = Line.objects.filter(id__in=anchor_units)
+        for term in all_terms:
+            if term != anchor:
+                lines_qs = lines_qs.filter(holds(term))
+        if any_terms:
+            lines_qs = lines_qs.filter(reduce(or_, (holds(term) for term in any_terms)))
+    for term in not_terms:
+        lines_qs = lines_qs.filter(~holds(term))
+
+    return DatabaseMatches(filter_lines(lines_qs, section_types, primary_writers, co_writers))
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from bnt_searcher.services.corpus_version import corpus_version
+
+logger = logging.getLogger(__name__)
+
+# Rows read per round trip by the builds of the shared structures.
+CHUNK_SIZE = 10_000
+
+
+class SharedStructure:
+    """
+    An in-memory structure built from the corpus and shared by a worker's requests.
+
+    Built on first use, and brought up to date once the corpus version moves on:
+    rebuilt by *build*, or, given *catch_up*, updated in place. Whatever *build*
+    returns must carry the corpus version it was built from as ``version``. Each
+    worker holds its own copy. One request at a time brings it up to date, while
+    the others go on reading the copy they have rather than waiting; only the first
+    build, with no copy yet to read, makes them wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[int], Any],
+        describe: Callable[[Any], str],
+        catch_up: Callable[[Any, int], None] | None = None,
+    ):
+        # Names the structure in log messages: "Built <name>: <describe()> in 0.12s".
+        self.name = name
+        self._build = build
+        self._describe = describe
+        self._catch_up = catch_up
+        self.current = None
+        # Held by whichever request is building or updating the structure.
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Return the structure, first building or updating it if this request may."""
+        current = self.current
+        if current is not None and current.version == corpus_version():
+            return current
+
+        if current is None:
+            with self._lock:
+                current = self.current
+                return current if current is not None else self.rebuild()
+
+        if not self._lock.acquire(blocking=False):
+            # Another request is updating it; the old copy serves until it is done.
+            return current
+        try:
+            if self.current is not None:
+                current = self.current
+            version = corpus_version()
+            if current.version != version:
+                if self._catch_up is None:
+                    current = self.rebuild()
+                else:
+                    self._catch_up(current, version)
+        finally:
+            self._lock.release()
+
+        return current
+
+    def rebuild(self) -> Any:
+        """Build a fresh copy and swap it in; until then the old copy is current."""
+        started = time.perf_counter()
+        structure = self._build(corpus_version())
+        self.current = structure
+        logger.info(
+            "Built %s: %s in %.2fs",
+            self.name,
+            self._describe(structure),
+            time.perf_counter() - started,
+        )
+
+        return structure
+
+    def forget(self) -> None:
+        """Drop the structure, to be built afresh on next use."""
+        self.current = None
+
+    def warm(self) -> None:
+        """
+        Build the structure at startup so the first request does not pay for it.
+
+        Failures are logged rather than raised: the structure is an optimisation,
+        and a worker that cannot build it should still start and build it on use.
+        """
+        try:
+            self.get()
+        except Exception:
+            logger.exception("Could not build %s at startup", self.name)
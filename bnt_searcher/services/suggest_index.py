@@ -0,0 +1,90 @@
+import heapq
+from array import array
+from collections import Counter
+
+from bnt_parser.models import WordFrequency
+from bnt_searcher.services.shared_structure import CHUNK_SIZE, SharedStructure
+from bnt_searcher.services.term_dictionary import prefix_range
+
+# The most suggestions one request may ask for.
+SUGGEST_MAX_LIMIT = 20
+# Prefixes starting more words than this have their top words worked out at build
+# time; shorter runs are ranked when asked for, which takes microseconds.
+_SCAN_LIMIT = 256
+
+
+class SuggestIndex:
+    """
+    Every word text in the corpus, sorted, with the number of lines using each.
+
+    A prefix is a contiguous run of the sorted words, found by binary search. A
+    short run is ranked by line count as it is read; a long one, as for a prefix
+    of a letter or two, has its busiest SUGGEST_MAX_LIMIT words stored in advance.
+    Either way a suggestion costs no query.
+    """
+
+    def __init__(self, version: int = 0):
+        # The corpus version the index was built from.
+        self.version = version
+        self.terms: list[str] = []
+        self.line_counts = array("l")
+        # The busiest words of each prefix starting more than _SCAN_LIMIT words.
+        self.top: dict[str, list[int]] = {}
+
+    @classmethod
+    def build(cls, version: int) -> "SuggestIndex":
+        """Read every word's line count. *version* should be read before the build."""
+        index = cls(version)
+        counts = WordFrequency.objects.filter(line_count__gt=0).values_list("text", "line_count")
+        rows = sorted(counts.iterator(chunk_size=CHUNK_SIZE))
+        index.terms = [text for text, _ in rows]
+        index.line_counts = array("l", (line_count for _, line_count in rows))
+
+        prefix_sizes = Counter(
+            term[:length] for term in index.terms for length in range(len(term) + 1)
+        )
+        index.top = {prefix: [] for prefix, size in prefix_sizes.items() if size > _SCAN_LIMIT}
+        # Taking words busiest first fills each prefix's list in rank order.
+        for i in sorted(range(len(index.terms)), key=index._rank):
+            term = index.terms[i]
+            for length in range(len(term) + 1):
+                top = index.top.get(term[:length])
+                if top is not None and len(top) < SUGGEST_MAX_LIMIT:
+                    top.append(i)
+
+        return index
+
+    def _rank(self, i: int) -> tuple[int, str]:
+        return -self.line_counts[i], self.terms[i]
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Return up to *limit* (text, line count) pairs for the words starting with
+        *prefix*, busiest first and then alphabetically. *limit* is capped at
+        SUGGEST_MAX_LIMIT.
+        """
+        limit = min(limit, SUGGEST_MAX_LIMIT)
+        top = self.top.get(prefix)
+        if top is None:
+            start, end = prefix_range(self.terms, prefix)
+            top = heapq.nsmallest(limit, range(start, end), key=self._rank)
+
+        return [(self.terms[i], self.line_counts[i]) for i in top[:limit]]
+
+
+_index: SharedStructure = SharedStructure(
+    "suggestion index", SuggestIndex.build, lambda index: f"{len(index.terms)} words"
+)
+
+
+def get_suggest_index() -> SuggestIndex:
+    """
+    Return the shared suggestion index, building it on first use and rebuilding it
+    once the corpus version has moved on.
+    """
+    return _index.get()
+
+
+def forget_suggest_index() -> None:
+    """Drop the index, to be built on next use."""
+    _index.forget()
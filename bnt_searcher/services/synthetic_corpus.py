@@ -0,0 +1,224 @@
+import random
+from datetime import UTC, datetime
+from itertools import accumulate
+
+from django.db import transaction
+
+from bnt_parser.models import ExternalSource, Line, Section, Song, Writer
+from bnt_parser.services.song_service import SongService
+from bnt_parser.services.table_service import TableService
+from bnt_parser.utils.rhyme import line_rhyme
+from bnt_searcher.models import WordVariant, WordVariantAlias, WordVariantLookup
+
+# Every word is built from these syllables, so none ends in a consonant and no
+# inflection below can collide with another word.
+SYLLABLES = [consonant + vowel for consonant in "bdfgklmnprstvz" for vowel in "aeiou"]
+INFLECTIONS = ("s", "ed", "ing")
+# The share of words sung in an inflected form rather than as the base word.
+INFLECTED_SHARE = 0.2
+
+# How the sections of a synthetic song run: verses and choruses alternating, with
+# a bridge before the last chorus of a longer song.
+SECTION_PATTERN = [
+    Section.SectionTypeEnum.VERSE,
+    Section.SectionTypeEnum.CHORUS,
+    Section.SectionTypeEnum.VERSE,
+    Section.SectionTypeEnum.CHORUS,
+    Section.SectionTypeEnum.BRIDGE,
+    Section.SectionTypeEnum.CHORUS,
+]
+
+_SONGS_PER_BATCH = 100
+
+
+def synthetic_word(rank: int) -> str:
+    """Return the made-up word of the given frequency rank: "dada", "dade" and so on."""
+    # Offset so every word has at least two syllables.
+    number = rank + len(SYLLABLES)
+    syllables = []
+    while number:
+        number, digit = divmod(number, len(SYLLABLES))
+        syllables.append(SYLLABLES[digit])
+    return "".join(reversed(syllables))
+
+
+class SyntheticLyrics:
+    """
+    Made-up lyrics whose words follow Zipf's law, as the words of real lyrics do.
+
+    The word of rank r is sung with weight 1 / r^exponent, so a few words turn up
+    in a large share of lines and most in only a handful, giving the Word.line join
+    table the fan-out a real corpus has. The same seed gives the same lyrics.
+    """
+
+    def __init__(self, vocabulary: int = 5000, exponent: float = 1.1, seed: int = 0):
+        self.random = random.Random(seed)
+        self.words = [synthetic_word(rank) for rank in range(vocabulary)]
+        self.cum_weights = list(
+            accumulate(1 / (rank + 1) ** exponent for rank in range(vocabulary))
+        )
+
+    def word(self) -> str:
+        word = self.random.choices(self.words, cum_weights=self.cum_weights)[0]
+        if self.random.random() < INFLECTED_SHARE:
+            word += self.random.choice(INFLECTIONS)
+        return word
+
+    def line(self) -> str:
+        line = " ".join(self.word() for _ in range(self.random.randint(4, 10)))
+        return line.capitalize()
+
+    def song(
+        self, sections: int, lines_per_section: int
+    ) -> list[tuple[Section.SectionTypeEnum, list[str]]]:
+        """
+        Return a song as (section type, lines) pairs. Every chorus has the same
+        lines, as in most songs.
+        """
+        chorus = [self.line() for _ in range(lines_per_section)]
+        song = []
+        for n in range(sections):
+            section_type = SECTION_PATTERN[n % len(SECTION_PATTERN)]
+            if section_type == Section.SectionTypeEnum.CHORUS:
+                song.append((section_type, chorus))
+            else:
+                song.append((section_type, [self.line() for _ in range(lines_per_section)]))
+        return song
+
+    def lyrics(self, sections: int, lines_per_section: int) -> list[str]:
+        """Return a song as the lyric lines SongService.save_lyrics reads."""
+        lyrics = []
+        for section_type, lines in self.song(sections, lines_per_section):
+            lyrics.extend([f"[{section_type.label}]", *lines, ""])
+        return lyrics
+
+
+def generate_corpus(
+    lyrics: SyntheticLyrics,
+    songs: int,
+    sections: int,
+    lines_per_section: int,
+    writers: int,
+    variants: int,
+) -> None:
+    """
+    Write *songs* synthetic songs straight into the models, with their writers,
+    words, word positions and word counts, and variant lookups for the *variants*
+    most common words so variant searches need no dictionary API.
+
+    Songs are written in batches through the same tables as saved lyrics, so
+    everything derived from the lyrics is filled in as it would be. Each song has
+    one of the writers, busier writers more often, and up to two co-writers.
+    """
+    table_service = TableService()
+    writer_objects = _create_writers(writers)
+    writer_weights = list(accumulate(1 / (rank + 1) for rank in range(len(writer_objects))))
+
+    for first in range(0, songs, _SONGS_PER_BATCH):
+        with transaction.atomic():
+            batch = range(first, min(first + _SONGS_PER_BATCH, songs))
+            sources = ExternalSource.objects.bulk_create(
+                [
+                    ExternalSource(
+                        source=ExternalSource.SourceEnum.GENIUS,
+                        endpoint=f"/synthetic/songs/{n + 1}",
+                    )
+                    for n in batch
+                ]
+            )
+            song_objects = Song.objects.bulk_create(
+                [
+                    Song(
+                        title=f"Synthetic Song {n + 1}", artist="Synthetic", external_source=source
+                    )
+                    for n, source in zip(batch, sources, strict=True)
+                ]
+            )
+
+            authorship = []
+            for song in song_objects:
+                credited = lyrics.random.choices(
+                    writer_objects, cum_weights=writer_weights, k=lyrics.random.randint(1, 3)
+                )
+                authorship.extend(
+                    Writer.songs.through(writer_id=writer.pk, song_id=song.pk)
+                    for writer in set(credited)
+                )
+            Writer.songs.through.objects.bulk_create(authorship)
+
+            section_objects, section_lyrics = [], []
+            for song in song_objects:
+                song_sections = lyrics.song(sections, lines_per_section)
+                for order, (section_type, lines) in enumerate(song_sections, start=1):
+                    section_objects.append(Section(song=song, order=order, type=section_type))
+                    section_lyrics.append(lines)
+            Section.objects.bulk_create(section_objects)
+
+            line_objects, line_tokens = [], []
+            for section, lines in zip(section_objects, section_lyrics, strict=True):
+                for order, text in enumerate(lines, start=1):
+                    tokens = SongService.parse_tokens(text)
+                    line_objects.append(
+                        Line(lyrics=text, order=order, section=section, rhyme=line_rhyme(tokens))
+                    )
+                    line_tokens.append(tokens)
+            Line.objects.bulk_create(line_objects)
+            saved = list(zip(line_objects, line_tokens, strict=True))
+
+            table_service.get_table("word").save_all(
+                [
+                    (line, sorted({form for forms in tokens for form in forms}))
+                    for line, tokens in saved
+                ]
+            )
+            table_service.get_table("word_position").save_all(saved)
+            table_service.get_table("line").save_search_vectors(line_objects)
+            # As the count_word_pairs cron job would, once the songs are saved.
+            table_service.get_table("word_pair").count_pending(limit=len(line_objects))
+
+    with transaction.atomic():
+        _create_variant_lookups(lyrics.words[:variants])
+        SongService.corpus_changed(table_service)
+
+
+def _create_writers(count: int) -> list[Writer]:
+    """Return the synthetic writers, creating those an earlier run did not."""
+    names = [f"Synthetic Writer {n + 1}" for n in range(count)]
+    existing = {writer.name: writer for writer in Writer.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in existing]
+
+    sources = ExternalSource.objects.bulk_create(
+        [
+            ExternalSource(source=ExternalSource.SourceEnum.GENIUS, endpoint=f"/synthetic/{name}")
+            for name in missing
+        ]
+    )
+    created = Writer.objects.bulk_create(
+        [
+            Writer(name=name, external_source=source)
+            for name, source in zip(missing, sources, strict=True)
+        ]
+    )
+    existing.update((writer.name, writer) for writer in created)
+    return [existing[name] for name in names]
+
+
+def _create_variant_lookups(words: list[str]) -> None:
+    """Record each word's inflections as its variants, as a dictionary lookup would."""
+    known = set(
+        WordVariantLookup.objects.filter(headword__in=words).values_list("headword", flat=True)
+    )
+    words = [word for word in words if word not in known]
+    lookups = WordVariantLookup.objects.bulk_create(
+        [WordVariantLookup(headword=word, fetched_at=datetime.now(tz=UTC)) for word in words]
+    )
+    WordVariant.objects.bulk_create(
+        [
+            WordVariant(lookup=lookup, text=lookup.headword + inflection)
+            for lookup in lookups
+            for inflection in INFLECTIONS
+        ]
+    )
+    WordVariantAlias.objects.bulk_create(
+        [WordVariantAlias(searched_term=lookup.headword, lookup=lookup) for lookup in lookups]
+    )
@@ -0,0 +1,108 @@
+from bisect import bisect_left
+
+from bnt_parser.models import Word
+from bnt_searcher.services.shared_structure import CHUNK_SIZE, SharedStructure
+
+WILDCARD = "*"
+
+
+class TooManyTerms(Exception):
+    """Raised when a wildcard pattern would expand to more words than allowed."""
+
+    def __init__(self, pattern: str, limit: int):
+        super().__init__(f'"{pattern}" matches more than {limit} words.')
+        self.pattern = pattern
+        self.limit = limit
+
+
+def prefix_range(terms: list[str], prefix: str) -> tuple[int, int]:
+    """Return the slice of sorted *terms* starting with *prefix*, by two binary searches."""
+    # No word holds U+10FFFF, so it sorts after every continuation of the prefix.
+    return bisect_left(terms, prefix), bisect_left(terms, prefix + "\U0010ffff")
+
+
+class TermDictionary:
+    """
+    Every distinct word text in the corpus, sorted, with a sorted reversed copy.
+
+    A prefix pattern ("danc*") is a contiguous run of the sorted terms, and a suffix
+    pattern ("*light") a contiguous run of the reversed ones, so either is found by
+    binary search and its size is known before a single term is read. The Word.text
+    index (a varchar_pattern_ops one on Postgres) would serve a prefix, but not a
+    suffix, and neither says how many words match until they are all read, so a
+    pattern too broad to expand could not be refused cheaply.
+    """
+
+    def __init__(self, version: int = 0):
+        # The corpus version the dictionary was built from.
+        self.version = version
+        self.terms: list[str] = []
+        self.reversed_terms: list[str] = []
+
+    @classmethod
+    def build(cls, version: int) -> "TermDictionary":
+        dictionary = cls(version)
+        texts = Word.objects.values_list("text", flat=True).distinct()
+        dictionary.terms = sorted(texts.iterator(chunk_size=CHUNK_SIZE))
+        dictionary.reversed_terms = sorted(term[::-1] for term in dictionary.terms)
+        return dictionary
+
+    def expand(self, pattern: str, limit: int) -> list[str]:
+        """
+        Return the sorted words matching *pattern*, which holds one "*" standing for
+        any run of characters: "danc*", "*light" or "mid*night".
+
+        A pattern with text on both sides reads whichever side's run is smaller and
+        checks the other end of each word in it.
+
+        :raises TooManyTerms: when more than *limit* words would match.
+        :raises ValueError: when the pattern has no "*", more than one, or nothing
+            else to match on.
+        """
+        if pattern.count(WILDCARD) != 1 or pattern == WILDCARD:
+            raise ValueError(pattern)
+        prefix, suffix = pattern.split(WILDCARD)
+
+        prefix_start, prefix_end = prefix_range(self.terms, prefix)
+        suffix_start, suffix_end = prefix_range(self.reversed_terms, suffix[::-1])
+
+        # With text on one side only, the run is the answer, so its size is checked
+        # before it is read.
+        if not suffix and prefix_end - prefix_start > limit:
+            raise TooManyTerms(pattern, limit)
+        if not prefix and suffix_end - suffix_start > limit:
+            raise TooManyTerms(pattern, limit)
+
+        if not suffix or (prefix and prefix_end - prefix_start <= suffix_end - suffix_start):
+            candidates = self.terms[prefix_start:prefix_end]
+            if suffix:
+                candidates = [term for term in candidates if term.endswith(suffix)]
+        else:
+            candidates = [term[::-1] for term in self.reversed_terms[suffix_start:suffix_end]]
+            if prefix:
+                candidates = [term for term in candidates if term.startswith(prefix)]
+
+        # "mid*dim" must not match "mid" by using its letters twice.
+        candidates = [term for term in candidates if len(term) >= len(prefix) + len(suffix)]
+        if len(candidates) > limit:
+            raise TooManyTerms(pattern, limit)
+
+        return sorted(candidates)
+
+
+_dictionary: SharedStructure = SharedStructure(
+    "term dictionary", TermDictionary.build, lambda dictionary: f"{len(dictionary.terms)} words"
+)
+
+
+def get_term_dictionary() -> TermDictionary:
+    """
+    Return the shared term dictionary, building it on first use and rebuilding it
+    once the corpus version has moved on.
+    """
+    return _dictionary.get()
+
+
+def forget_term_dictionary() -> None:
+    """Drop the dictionary, to be built on next use."""
+    _dictionary.forget()
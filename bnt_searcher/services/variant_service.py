@@ -1,12 +1,115 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import UTC, datetime
 
+from django.conf import settings
+from django.db import transaction
+
 from bnt_searcher.clients.mw_client import fetch_inflections
 from bnt_searcher.models import WordVariant, WordVariantAlias, WordVariantLookup
 
 logger = logging.getLogger(__name__)
 
 
+class VariantCache:
+    """
+    Per-process cache of each search term's variant texts, evicting the least
+    recently used and dropping entries older than *ttl* seconds.
+
+    Changing a lookup or its variants in this process forgets the terms aliased to
+    it (see signals.py); other workers see the change once their entries expire.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, tuple[str, ...]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, term: str) -> tuple[str, ...] | None:
+        with self._lock:
+            entry = self._entries.get(term)
+            if entry is None:
+                return None
+            expires, variants = entry
+            if time.monotonic() >= expires:
+                del self._entries[term]
+                return None
+            self._entries.move_to_end(term)
+            return variants
+
+    def set(self, term: str, variants: list[str]) -> None:
+        """
+        Cache *term*'s variants once the current transaction commits, or at once
+        outside one, so nothing read from or written by a rolled-back transaction
+        outlives it.
+        """
+        if self.max_size > 0:
+            transaction.on_commit(lambda: self._set(term, tuple(variants)))
+
+    def _set(self, term: str, variants: tuple[str, ...]) -> None:
+        with self._lock:
+            self._entries[term] = (time.monotonic() + self.ttl, variants)
+            self._entries.move_to_end(term)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, terms) -> None:
+        """Drop *terms* once the current transaction commits, after any set() in it."""
+        terms = list(terms)
+        transaction.on_commit(lambda: self._forget(terms))
+
+    def _forget(self, terms: list[str]) -> None:
+        with self._lock:
+            for term in terms:
+                self._entries.pop(term, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: VariantCache | None = None
+_cache_config: tuple | None = None
+
+
+def _variant_cache() -> VariantCache:
+    """Return the variant cache sized by SEARCH_VARIANT_CACHE_SIZE and _SECONDS."""
+    global _cache, _cache_config
+
+    config = (settings.SEARCH_VARIANT_CACHE_SIZE, settings.SEARCH_VARIANT_CACHE_SECONDS)
+    if config != _cache_config:
+        _cache = VariantCache(*config)
+        _cache_config = config
+
+    return _cache
+
+
+def forget_variants(terms=None) -> None:
+    """
+    Drop the cached variant lists of *terms*, or every one if *terms* is None, to be
+    read from the database on next use.
+    """
+    if _cache is None:
+        return
+    if terms is None:
+        _cache.clear()
+    else:
+        _cache.forget(terms)
+
+
+def forget_lookup_variants(lookup_id: int) -> None:
+    """Drop the cached variant lists of every term aliased to the lookup."""
+    if _cache is not None:
+        _cache.forget(
+            WordVariantAlias.objects.filter(lookup_id=lookup_id).values_list(
+                "searched_term", flat=True
+            )
+        )
+
+
 def get_variants(search_term: str) -> list[str]:
     """
     Return a list of inflected variant texts for *search_term*.
@@ -14,10 +117,23 @@ def get_variants(search_term: str) -> list[str]:
     Results are cached via WordVariantAlias → WordVariantLookup / WordVariant.
     An alias hit is returned immediately. On a miss, the M-W API is called,
     results are stored under the canonical headword, and an alias is created
-    so subsequent calls for the same term skip the API entirely.
+    so subsequent calls for the same term skip the API entirely. Either way the
+    texts are then held in this process's VariantCache, so a repeat search for
+    the term runs no query.
 
     Returns an empty list when M-W has no inflections for the term.
     """
+    cache = _variant_cache()
+    cached = cache.get(search_term)
+    if cached is not None:
+        return list(cached)
+
+    variants = _read_or_fetch_variants(search_term)
+    cache.set(search_term, variants)
+    return variants
+
+
+def _read_or_fetch_variants(search_term: str) -> list[str]:
     alias = (
         WordVariantAlias.objects.filter(searched_term=search_term).select_related("lookup").first()
     )
@@ -42,3 +158,37 @@ def get_variants(search_term: str) -> list[str]:
     WordVariantAlias.objects.create(searched_term=search_term, lookup=lookup)
 
     return list(lookup.variants.values_list("text", flat=True))
+
+
+def get_variants_for(search_terms: list[str]) -> dict[str, list[str]]:
+    """
+    Return the variant texts of each of *search_terms*, keyed by term.
+
+    Terms in the variant cache cost nothing; other terms already looked up are
+    read together, in two queries whatever their number. Only the rest go
+    through get_variants() one by one.
+    """
+    cache = _variant_cache()
+    variants = {}
+    for term in search_terms:
+        cached = cache.get(term)
+        if cached is not None:
+            variants[term] = list(cached)
+
+    uncached = [term for term in search_terms if term not in variants]
+    if uncached:
+        aliases = (
+            WordVariantAlias.objects.filter(searched_term__in=uncached)
+            .select_related("lookup")
+            .prefetch_related("lookup__variants")
+        )
+        for alias in aliases:
+            texts = [variant.text for variant in alias.lookup.variants.all()]
+            variants[alias.searched_term] = texts
+            cache.set(alias.searched_term, texts)
+
+    for term in search_terms:
+        if term not in variants:
+            variants[term] = get_variants(term)
+
+    return variants
@@ -0,0 +1,81 @@
+from array import array
+
+from bnt_parser.models import Writer
+from bnt_searcher.services.shared_structure import CHUNK_SIZE, SharedStructure
+
+
+class WriterSongs:
+    """
+    The songs of every writer, held as a sorted array of song ids per writer.
+
+    Resolves the writer filters to a set of song ids in memory, so a search keeps
+    lines by song id rather than joining through each song's writers and matching
+    their names with a leading-wildcard LIKE.
+    """
+
+    def __init__(self, version: int = 0):
+        # The corpus version the sets were built from.
+        self.version = version
+        self.names: dict[int, str] = {}
+        self.songs: dict[int, array] = {}
+
+    @classmethod
+    def build(cls, version: int) -> "WriterSongs":
+        """Read every writer and their songs. *version* should be read before the build."""
+        writer_songs = cls(version)
+        writer_songs.names = dict(Writer.objects.values_list("id", "name"))
+
+        songs: dict[int, list[int]] = {}
+        authorship = Writer.songs.through.objects.order_by("song_id").values_list(
+            "writer_id", "song_id"
+        )
+        for writer_id, song_id in authorship.iterator(chunk_size=CHUNK_SIZE):
+            songs.setdefault(writer_id, []).append(song_id)
+        writer_songs.songs = {writer_id: array("q", ids) for writer_id, ids in songs.items()}
+
+        return writer_songs
+
+    def writer_ids(self, writers: list[str]) -> set[int]:
+        """
+        Return the ids of the writers given, each either by id or by text contained
+        in their name, ignoring case.
+        """
+        ids = {int(writer) for writer in writers if writer.isdigit()}
+        needles = [writer.lower() for writer in writers if not writer.isdigit()]
+        if needles:
+            ids.update(
+                writer_id
+                for writer_id, name in self.names.items()
+                if any(needle in name.lower() for needle in needles)
+            )
+        return ids
+
+    def song_ids(self, writers: list[str]) -> list[int]:
+        """Return the sorted ids of the songs by any of the writers given."""
+        found: set[int] = set()
+        for writer_id in self.writer_ids(writers):
+            found.update(self.songs.get(writer_id, ()))
+        return sorted(found)
+
+
+_writer_songs: SharedStructure = SharedStructure(
+    "writer song sets", WriterSongs.build, lambda writer_songs: f"{len(writer_songs.names)} writers"
+)
+
+
+def get_writer_songs() -> WriterSongs:
+    """
+    Return the shared writer song sets, building them on first use and rebuilding
+    them once the corpus version has moved on.
+    """
+    return _writer_songs.get()
+
+
+def forget_writer_songs() -> None:
+    """
+    Drop the sets, to be rebuilt on next use.
+
+    For writers or their songs changing in this process, which happens inside the
+    saving transaction: rebuilding then could read a state that never commits.
+    """
+    _writer_songs.forget()
@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from bnt_parser.models import Writer
+from bnt_parser.signals import song_saved, words_added
+from bnt_searcher.models import WordVariant, WordVariantAlias, WordVariantLookup
+from bnt_searcher.services.corpus_version import forget_corpus_version
+from bnt_searcher.services.fuzzy_index import add_words
+from bnt_searcher.services.variant_service import forget_lookup_variants, forget_variants
+from bnt_searcher.services.writer_songs import forget_writer_songs
+
+
+@receiver(song_saved)
+def mark_search_structures_stale(sender, **kwargs):
+    # This worker saved the song, so it need not wait out the version check interval.
+    # Only marked stale: each structure rebuilds on its next search, not here in the
+    # request that saved the song.
+    forget_corpus_version()
+
+
+@receiver(words_added)
+def add_words_to_fuzzy_index(sender, texts, **kwargs):
+    add_words(texts)
+
+
+@receiver(post_save, sender=Writer)
+@receiver(post_delete, sender=Writer)
+@receiver(m2m_changed, sender=Writer.songs.through)
+def forget_writer_song_sets(sender, **kwargs):
+    forget_writer_songs()
+
+
+@receiver(post_save, sender=WordVariantLookup)
+def forget_refreshed_lookup(sender, instance, created, **kwargs):
+    # A new lookup has no aliases yet, so nothing can be cached for it.
+    if not created:
+        forget_lookup_variants(instance.pk)
+
+
+@receiver(post_save, sender=WordVariant)
+@receiver(post_delete, sender=WordVariant)
+def forget_changed_variant(sender, instance, **kwargs):
+    forget_lookup_variants(instance.lookup_id)
+
+
+@receiver(post_save, sender=WordVariantAlias)
+@receiver(post_delete, sender=WordVariantAlias)
+def forget_changed_alias(sender, instance, created=False, **kwargs):
+    # get_variants caches a term itself right after creating its alias.
+    if not created:
+        forget_variants([instance.searched_term])
@@ -1,13 +1,61 @@
+import io
+import json
+import os
+from collections import Counter
 from datetime import UTC, datetime
+from random import Random
+from unittest import skipUnless
 from unittest.mock import MagicMock, patch
 
 import requests
-from django.test import TestCase
-
-from bnt_parser.models import ExternalSource, Line, Section, Song, Word, Writer
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bnt_parser.models import (
+    ExternalSource,
+    Line,
+    Section,
+    Song,
+    Word,
+    WordFrequency,
+    WordPair,
+    WordPosition,
+    WordSectionFrequency,
+    WordWriterFrequency,
+    WordWriterPair,
+    Writer,
+)
+from bnt_parser.services.song_service import SongService
+from bnt_parser.services.table_service import TableService
+from bnt_parser.signals import song_saved, words_added
+from bnt_parser.tables.external_source_table import ExternalSourceTable
 from bnt_searcher.clients.mw_client import fetch_inflections
+from bnt_searcher.management.commands import benchmark_search
 from bnt_searcher.models import WordVariant, WordVariantAlias, WordVariantLookup
-from bnt_searcher.services.variant_service import get_variants
+from bnt_searcher.services import (
+    fuzzy_index,
+    postings_index,
+    response_cache,
+    search_service,
+    suggest_index,
+    term_dictionary,
+)
+from bnt_searcher.services.corpus_version import forget_corpus_version
+from bnt_searcher.services.shared_structure import SharedStructure
+from bnt_searcher.services.synthetic_corpus import (
+    SyntheticLyrics,
+    generate_corpus,
+    synthetic_word,
+)
+from bnt_searcher.services.variant_service import (
+    forget_variants,
+    get_variants,
+    get_variants_for,
+)
+from bnt_searcher.services.writer_songs import WriterSongs
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -42,6 +90,27 @@ def _make_word(text, song=None):
     return word
 
 
+def _make_lyrics(song, lyrics, section_type=Section.SectionTypeEnum.VERSE, order=1):
+    """
+    Save a section of *lyrics* lines with their words and word positions, as parsed,
+    and count their word pairs as the count_word_pairs cron job would.
+    """
+    section = Section.objects.create(song=song, order=order, type=section_type)
+    line_tokens = [
+        (Line.objects.create(lyrics=text, order=n, section=section), SongService.parse_tokens(text))
+        for n, text in enumerate(lyrics, start=1)
+    ]
+    TableService().get_table("word").save_all(
+        [
+            (line, sorted({form for forms in tokens for form in forms}))
+            for line, tokens in line_tokens
+        ]
+    )
+    TableService().get_table("word_position").save_all(line_tokens)
+    TableService().get_table("word_pair").count_pending(limit=len(line_tokens))
+    return section
+
+
 # ---------------------------------------------------------------------------
 # mw_client.fetch_inflections
 # ---------------------------------------------------------------------------
@@ -312,6 +381,132 @@ class GetVariantsTestCase(TestCase):
 
         mock_fetch.assert_called_once()
 
+    def test_get_variants_for_reads_known_terms_together(self):
+        lookup = WordVariantLookup.objects.create(headword="run", fetched_at=datetime.now(tz=UTC))
+        WordVariant.objects.create(lookup=lookup, text="ran")
+        WordVariantAlias.objects.create(searched_term="run", lookup=lookup)
+        WordVariantAlias.objects.create(searched_term="runs", lookup=lookup)
+
+        with patch(
+            "bnt_searcher.services.variant_service.fetch_inflections", return_value=("walk", [])
+        ) as mock_fetch:
+            result = get_variants_for(["run", "runs", "walk"])
+
+        mock_fetch.assert_called_once_with("walk")
+        assert result == {"run": ["ran"], "runs": ["ran"], "walk": []}
+
+
+@override_settings(SEARCH_VARIANT_CACHE_SIZE=2, SEARCH_VARIANT_CACHE_SECONDS=60)
+class VariantCacheTestCase(TestCase):
+    def setUp(self):
+        lookup = WordVariantLookup.objects.create(headword="run", fetched_at=datetime.now(tz=UTC))
+        WordVariant.objects.create(lookup=lookup, text="ran")
+        for term in ("run", "runs", "running"):
+            WordVariantAlias.objects.create(searched_term=term, lookup=lookup)
+        self.lookup = lookup
+        self.addCleanup(forget_variants)
+
+    def _committed(self):
+        # The cache takes entries and forgets terms only once the transaction commits.
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def _warm(self, *terms):
+        with self._committed():
+            for term in terms:
+                get_variants(term)
+
+    def test_warm_term_runs_no_query(self):
+        self._warm("run")
+
+        with self.assertNumQueries(0):
+            assert get_variants("run") == ["ran"]
+            assert get_variants_for(["run"]) == {"run": ["ran"]}
+
+    def test_uncommitted_reads_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            get_variants("run")
+
+        with self.assertNumQueries(2):
+            get_variants("run")
+
+    def test_get_variants_for_reads_only_uncached_terms(self):
+        self._warm("run")
+
+        with self.assertNumQueries(2), self._committed():
+            result = get_variants_for(["run", "runs"])
+        with self.assertNumQueries(0):
+            get_variants_for(["run", "runs"])
+
+        assert result == {"run": ["ran"], "runs": ["ran"]}
+
+    def test_looking_up_a_new_term_keeps_other_terms_warm(self):
+        self._warm("run")
+        with (
+            patch(
+                "bnt_searcher.services.variant_service.fetch_inflections",
+                return_value=("walk", []),
+            ),
+            self._committed(),
+        ):
+            get_variants("walk")
+
+        with self.assertNumQueries(0):
+            assert get_variants("run") == ["ran"]
+
+    def test_saving_a_variant_forgets_its_terms(self):
+        self._warm("run", "runs")
+        with self._committed():
+            WordVariant.objects.create(lookup=self.lookup, text="running")
+
+        assert set(get_variants("run")) == {"ran", "running"}
+        assert set(get_variants("runs")) == {"ran", "running"}
+
+    def test_changing_a_lookup_keeps_other_lookups_warm(self):
+        walk = WordVariantLookup.objects.create(headword="walk", fetched_at=datetime.now(tz=UTC))
+        WordVariantAlias.objects.create(searched_term="walk", lookup=walk)
+        self._warm("run", "walk")
+
+        with self._committed():
+            WordVariant.objects.create(lookup=walk, text="walked")
+
+        with self.assertNumQueries(0):
+            get_variants("run")
+        assert get_variants("walk") == ["walked"]
+
+    def test_refreshing_a_lookup_forgets_its_terms(self):
+        self._warm("run")
+        with self._committed():
+            WordVariant.objects.filter(lookup=self.lookup).delete()
+            self.lookup.fetched_at = datetime.now(tz=UTC)
+            self.lookup.save()
+
+        assert get_variants("run") == []
+
+    def test_entries_expire(self):
+        with patch("bnt_searcher.services.variant_service.time.monotonic", return_value=0):
+            self._warm("run")
+        with (
+            patch("bnt_searcher.services.variant_service.time.monotonic", return_value=60),
+            self.assertNumQueries(2),
+        ):
+            get_variants("run")
+
+    def test_least_recently_used_term_is_evicted(self):
+        self._warm("run", "runs", "run", "running")
+
+        with self.assertNumQueries(0):
+            get_variants("run")
+            get_variants("running")
+        with self.assertNumQueries(2):
+            get_variants("runs")
+
+    @override_settings(SEARCH_VARIANT_CACHE_SIZE=0)
+    def test_size_zero_turns_the_cache_off(self):
+        self._warm("run")
+
+        with self.assertNumQueries(2):
+            get_variants("run")
+
 
 # ---------------------------------------------------------------------------
 # WordSearchView — variants flag
@@ -449,3 +644,1879 @@ class CoWriterFilterTestCase(TestCase):
             {"word": "love", "co_writer": ["Alice Cooper", "Bob Dylan"]},
         )
         assert response.json()["meta"]["total_songs"] == 2
+
+    def test_writers_by_id(self):
+        alice = Writer.objects.get(name="Alice Cooper")
+        response = self.client.get(
+            "/search/word/", {"word": "love", "co_writer": [str(alice.id), "dylan"]}
+        )
+        assert response.json()["meta"]["total_songs"] == 2
+
+        response = self.client.get("/search/word/", {"word": "love", "primary_writer": alice.id})
+        titles = [r["title"] for r in response.json()["data"]["results"]]
+        assert titles == ["Song A"]
+
+    def test_filter_does_not_join_writers(self):
+        lines_qs = search_service.build_lines_queryset(["love"], [], ["alice"], [])
+
+        assert "writer" not in str(lines_qs.query).lower()
+        assert [line.section.song.title for line in lines_qs] == ["Song A"]
+
+    def test_new_songs_are_seen_at_once(self):
+        self.client.get("/search/word/", {"word": "love", "co_writer": "alice"})
+        Writer.objects.get(name="Alice Cooper").songs.add(self.song_b)
+
+        response = self.client.get("/search/word/", {"word": "love", "co_writer": "alice"})
+        assert response.json()["meta"]["total_songs"] == 2
+
+
+class WriterSongsTestCase(TestCase):
+    def test_song_ids_by_id_or_name(self):
+        songs = [_make_song(title=f"Song {n}", external_id=n) for n in range(3)]
+        alice = _make_writer("Alice Cooper", 2001)
+        bob = _make_writer("Bob Dylan", 2002)
+        alice.songs.add(songs[2], songs[0])
+        bob.songs.add(songs[1], songs[0])
+
+        writer_songs = WriterSongs.build(version=1)
+
+        assert list(writer_songs.songs[alice.id]) == [songs[0].id, songs[2].id]
+        assert writer_songs.song_ids([str(bob.id)]) == [songs[0].id, songs[1].id]
+        assert writer_songs.song_ids(["COOPER", str(bob.id)]) == [s.id for s in songs]
+        assert writer_songs.song_ids(["nobody", "999"]) == []
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — postings index
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_POSTINGS_INDEX=True, SEARCH_VERSION_CHECK_SECONDS=3600)
+class PostingsIndexSearchTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        forget_corpus_version()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        self.song_a = _make_song(title="Song A", artist="Artist", external_id=10)
+        self.song_b = _make_song(title="Song B", artist="Artist", external_id=11)
+        self.love = Word.objects.create(text="love")
+        self.lost = Word.objects.create(text="lost")
+
+        for song, types in ((self.song_a, ["VERSE", "CHORUS"]), (self.song_b, ["CHORUS"])):
+            for order, section_type in enumerate(types, start=1):
+                section = Section.objects.create(song=song, order=order, type=section_type)
+                for line_order in (2, 1):
+                    line = Line.objects.create(
+                        lyrics=f"love line {line_order}", order=line_order, section=section
+                    )
+                    self.love.line.add(line)
+                    if line_order == 1:
+                        self.lost.line.add(line)
+
+        _make_writer("Alice Cooper", 2001).songs.add(self.song_a)
+        _make_writer("Bob Dylan", 2002).songs.add(self.song_b)
+
+    def _search_both_ways(self, params):
+        with override_settings(SEARCH_POSTINGS_INDEX=False):
+            expected = self.client.get("/search/word/", params).json()
+        actual = self.client.get("/search/word/", params).json()
+        return expected, actual
+
+    def test_matches_database_results(self):
+        expected, actual = self._search_both_ways({"word": "love"})
+        assert actual == expected
+        assert actual["meta"]["total_lines"] == 6
+
+    def test_matches_database_results_with_filters(self):
+        for params in (
+            {"word": "love", "section_type": "chorus"},
+            {"word": "love", "co_writer": "alice"},
+            {"word": "love", "primary_writer": ["cooper", "dylan"], "section_type": "verse"},
+            {"word": "love", "page_size": 1, "page": 2},
+            {"word": "nothing"},
+        ):
+            expected, actual = self._search_both_ways(params)
+            assert actual == expected, params
+
+    def test_variants_are_merged_in_search_order(self):
+        with patch("bnt_searcher.views.get_variants", return_value=["lost"]):
+            expected, actual = self._search_both_ways({"word": "love", "variants": "true"})
+        assert actual == expected
+
+    def test_reads_only_the_page_from_the_database(self):
+        self.client.get("/search/word/", {"word": "love"})
+
+        # Songs, their writers and the page's lyrics; nothing per match.
+        with self.assertNumQueries(3):
+            self.client.get("/search/word/", {"word": "love", "page_size": 1})
+
+    def test_song_saved_rebuilds_the_index_on_next_search(self):
+        self.client.get("/search/word/", {"word": "love"})
+        song_c = _make_song(title="Song C", artist="Artist", external_id=12)
+        _make_word("love", song=song_c)
+        TableService().get_table("corpus_version").bump()
+
+        # Marked stale only; the saving request does not pay for the rebuild.
+        with self.assertNumQueries(0):
+            song_saved.send(sender=None, song=song_c)
+
+        response = self.client.get("/search/word/", {"word": "love"})
+        assert response.json()["meta"]["total_songs"] == 3
+
+    def test_disabled_index_is_never_built(self):
+        with override_settings(SEARCH_POSTINGS_INDEX=False):
+            self.client.get("/search/word/", {"word": "love"})
+            song_saved.send(sender=None, song=self.song_a)
+
+        assert postings_index._index.current is None
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — cursor pagination
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class CursorPaginationTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        writer = _make_writer("Alice Cooper", 2001)
+        for n in range(5):
+            song = _make_song(title=f"Song {n}", artist="Artist", external_id=100 + n)
+            _make_word("love", song=song)
+            writer.songs.add(song)
+
+    def _walk_cursor(self, params):
+        pages = []
+        response = self.client.get("/search/word/", {**params, "cursor": ""}).json()
+        pages.append(response)
+        while response["meta"]["next_cursor"]:
+            cursor = response["meta"]["next_cursor"]
+            response = self.client.get("/search/word/", {**params, "cursor": cursor}).json()
+            pages.append(response)
+        return pages
+
+    def _walk_offset(self, params):
+        pages = []
+        page = 1
+        while True:
+            response = self.client.get("/search/word/", {**params, "page": page}).json()
+            pages.append(response)
+            if not response["meta"]["next_page_url"]:
+                return pages
+            page += 1
+
+    def _assert_same_as_offset_pages(self):
+        params = {"word": "love", "page_size": 2}
+        cursor_pages = self._walk_cursor(params)
+        offset_pages = self._walk_offset(params)
+
+        assert len(cursor_pages) == len(offset_pages) == 3
+        for cursor_page, offset_page in zip(cursor_pages, offset_pages, strict=True):
+            assert cursor_page["data"] == offset_page["data"]
+            for key in ("total_songs", "total_lines", "writers_in_results"):
+                assert cursor_page["meta"][key] == offset_page["meta"][key]
+
+    def test_cursor_pages_match_offset_pages(self):
+        self._assert_same_as_offset_pages()
+
+    @override_settings(SEARCH_POSTINGS_INDEX=True)
+    def test_cursor_pages_match_offset_pages_from_index(self):
+        self._assert_same_as_offset_pages()
+
+    def test_next_page_url_carries_cursor(self):
+        response = self.client.get("/search/word/", {"word": "love", "page_size": 2, "cursor": ""})
+        meta = response.json()["meta"]
+        assert meta["page"] is None
+        assert meta["previous_page_url"] is None
+        assert f"cursor={meta['next_cursor']}" in meta["next_page_url"]
+
+    def test_last_page_has_no_next_cursor(self):
+        response = self.client.get("/search/word/", {"word": "love", "cursor": ""})
+        meta = response.json()["meta"]
+        assert meta["next_cursor"] is None
+        assert meta["next_page_url"] is None
+
+    def test_cursor_page_cost_does_not_grow_with_matches(self):
+        """Only the page's songs are read: the same queries for 5 matches as for 50."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/search/word/", {"word": "love", "page_size": 2, "cursor": ""})
+
+        for n in range(45):
+            song = _make_song(title=f"More {n}", artist="Artist", external_id=200 + n)
+            _make_word("love", song=song)
+
+        with CaptureQueriesContext(connection) as large:
+            self.client.get("/search/word/", {"word": "love", "page_size": 2, "cursor": ""})
+
+        assert len(large) == len(small)
+
+    def test_invalid_cursor_returns_400(self):
+        for cursor in ("not-a-cursor", "e30=", "WzFd"):
+            response = self.client.get("/search/word/", {"word": "love", "cursor": cursor})
+            assert response.status_code == 400, cursor
+
+    def test_empty_result_has_no_next_cursor(self):
+        response = self.client.get("/search/word/", {"word": "nothing", "cursor": ""})
+        assert response.status_code == 200
+        assert response.json()["meta"]["next_cursor"] is None
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — meta totals and writers facet
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class SearchMetaTestCase(TestCase):
+    def setUp(self):
+        self.writers = [_make_writer(f"Writer {n}", 3000 + n) for n in range(3)]
+        for n in range(6):
+            song = _make_song(title=f"Song {n}", artist="Artist", external_id=300 + n)
+            word = _make_word("rain", song=song)
+            # A second matching line in the same section counts once per line.
+            section = song.sections.get()
+            word.line.add(Line.objects.create(lyrics="more rain", order=2, section=section))
+            self.writers[n % 3].songs.add(song)
+
+    def test_totals_count_every_match_not_just_the_page(self):
+        meta = self.client.get("/search/word/", {"word": "rain", "page_size": 1}).json()["meta"]
+        assert meta["total_songs"] == 6
+        assert meta["total_lines"] == 12
+        assert meta["writers_in_results"] == ["Writer 0", "Writer 1", "Writer 2"]
+
+    def test_totals_respect_writer_filters(self):
+        meta = self.client.get(
+            "/search/word/", {"word": "rain", "co_writer": ["writer 1", "writer 2"]}
+        ).json()["meta"]
+        assert meta["total_songs"] == 4
+        assert meta["total_lines"] == 8
+        assert meta["writers_in_results"] == ["Writer 1", "Writer 2"]
+
+    def test_offset_page_cost_does_not_grow_with_matches(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/search/word/", {"word": "rain", "page": 2, "page_size": 2})
+
+        for n in range(30):
+            song = _make_song(title=f"More {n}", artist="Artist", external_id=400 + n)
+            _make_word("rain", song=song)
+            self.writers[0].songs.add(song)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get("/search/word/", {"word": "rain", "page": 2, "page_size": 2})
+
+        assert len(large) == len(small)
+        assert [r["title"] for r in response.json()["data"]["results"]] == ["Song 2", "Song 3"]
+
+    def test_section_type_counts(self):
+        song = Song.objects.get(title="Song 0")
+        chorus = Section.objects.create(song=song, order=2, type=Section.SectionTypeEnum.CHORUS)
+        Word.objects.filter(text="rain", line__section__song=song).first().line.add(
+            Line.objects.create(lyrics="rain chorus", order=1, section=chorus),
+            Line.objects.create(lyrics="rain chorus again", order=2, section=chorus),
+        )
+        params = {"word": "rain", "page_size": 1}
+
+        meta = self.client.get("/search/word/", params).json()["meta"]
+        assert meta["section_type_counts"] == {"VERSE": 12, "CHORUS": 2}
+
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            meta = self.client.get("/search/word/", params).json()["meta"]
+        assert meta["section_type_counts"] == {"VERSE": 12, "CHORUS": 2}
+
+    def test_section_type_counts_follow_the_filters(self):
+        meta = self.client.get("/search/word/", {"word": "rain", "section_type": "chorus"}).json()[
+            "meta"
+        ]
+        assert meta["section_type_counts"] == {}
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — response cache
+# ---------------------------------------------------------------------------
+
+
+@override_settings(
+    SEARCH_RESPONSE_CACHE="lru", SEARCH_RESPONSE_CACHE_SIZE=2, SEARCH_VERSION_CHECK_SECONDS=3600
+)
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        response_cache._cache_config = None
+        forget_corpus_version()
+        self.addCleanup(setattr, response_cache, "_cache_config", None)
+
+        self.song = _make_song(title="Test Song", artist="Test Artist", external_id=1)
+        _make_word("run", song=self.song)
+
+    def test_repeat_search_is_served_without_queries(self):
+        first = self.client.get("/search/word/", {"word": "run"})
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/search/word/", {"word": "run"})
+
+        assert second.json() == first.json()
+
+    def test_repeat_variant_search_skips_get_variants(self):
+        with patch("bnt_searcher.views.get_variants", return_value=[]) as mock_get_variants:
+            self.client.get("/search/word/", {"word": "run", "variants": "true"})
+            self.client.get("/search/word/", {"word": "run", "variants": "true"})
+
+        mock_get_variants.assert_called_once()
+
+    def test_key_ignores_parameter_order_and_word_case(self):
+        self.client.get("/search/word/", {"word": "Run ", "page_size": 5})
+
+        with self.assertNumQueries(0):
+            self.client.get("/search/word/?page_size=5&word=run")
+
+    def test_corpus_version_bump_invalidates(self):
+        self.client.get("/search/word/", {"word": "run"})
+        other = _make_song(title="Other Song", artist="Test Artist", external_id=2)
+        _make_word("run", song=other)
+
+        TableService().get_table("corpus_version").bump()
+        forget_corpus_version()
+
+        response = self.client.get("/search/word/", {"word": "run"})
+        assert response.json()["meta"]["total_songs"] == 2
+
+    def test_errors_are_not_cached(self):
+        self.client.get("/search/word/", {"word": "run", "page": "x"})
+        stats = self.client.get("/search/cache-stats/").json()
+
+        assert stats["size"] == 0
+
+    def test_lru_evicts_least_recently_used(self):
+        for word in ("run", "ran", "run", "runs"):
+            self.client.get("/search/word/", {"word": word})
+
+        stats = self.client.get("/search/cache-stats/").json()
+        assert stats == {
+            "backend": "lru",
+            "size": 2,
+            "max_size": 2,
+            "hits": 1,
+            "misses": 3,
+            "hit_rate": 0.25,
+        }
+
+        with self.assertNumQueries(0):
+            self.client.get("/search/word/", {"word": "run"})
+
+    @override_settings(SEARCH_RESPONSE_CACHE="django")
+    def test_django_cache_backend(self):
+        self.addCleanup(caches["default"].clear)
+        first = self.client.get("/search/word/", {"word": "run"})
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/search/word/", {"word": "run"})
+
+        assert second.json() == first.json()
+        stats = self.client.get("/search/cache-stats/").json()
+        assert stats["backend"] == "django"
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    @override_settings(SEARCH_RESPONSE_CACHE="")
+    def test_stats_when_cache_is_off(self):
+        assert self.client.get("/search/cache-stats/").json() == {"backend": None}
+
+
+class _Built:
+    def __init__(self, version):
+        self.version = version
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class SharedStructureTestCase(TestCase):
+    def setUp(self):
+        forget_corpus_version()
+        self.addCleanup(forget_corpus_version)
+
+    def _bump(self):
+        TableService().get_table("corpus_version").bump()
+
+    def test_rebuilt_once_the_version_moves(self):
+        structure = SharedStructure("test structure", _Built, lambda built: "")
+        built = structure.get()
+        assert structure.get() is built
+
+        self._bump()
+
+        assert structure.get() is not built
+        assert structure.get().version == 1
+
+    def test_caught_up_in_place_given_catch_up(self):
+        catch_up = MagicMock(side_effect=lambda built, version: setattr(built, "version", version))
+        structure = SharedStructure("test structure", _Built, lambda built: "", catch_up)
+        built = structure.get()
+
+        self._bump()
+
+        assert structure.get() is built
+        catch_up.assert_called_once_with(built, 1)
+
+    def test_old_copy_serves_while_another_request_rebuilds(self):
+        build = MagicMock(side_effect=_Built)
+        structure = SharedStructure("test structure", build, lambda built: "")
+        built = structure.get()
+        self._bump()
+
+        with structure._lock:
+            assert structure.get() is built
+
+        assert build.call_count == 1
+        assert structure.get().version == 1
+
+    def test_warm_logs_a_failed_build(self):
+        structure = SharedStructure("test structure", MagicMock(side_effect=ValueError), str)
+
+        with self.assertLogs("bnt_searcher.services.shared_structure", "ERROR"):
+            structure.warm()
+
+        assert structure.current is None
+
+
+@override_settings(SEARCH_POSTINGS_INDEX=True)
+class PostingsIndexVersionTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        forget_corpus_version()
+        self.addCleanup(postings_index.forget_postings_index)
+
+    def test_index_is_rebuilt_when_the_corpus_version_moves(self):
+        _make_word("run", song=_make_song(external_id=1))
+        built = postings_index.get_postings_index()
+        assert postings_index.get_postings_index() is built
+
+        TableService().get_table("corpus_version").bump()
+        forget_corpus_version()
+
+        rebuilt = postings_index.get_postings_index()
+        assert rebuilt is not built
+        assert rebuilt.version == 1
+
+
+# ---------------------------------------------------------------------------
+# Conditional GET — ETag / 304
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=3600)
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        forget_corpus_version()
+        self.song = _make_song(title="Test Song", artist="Test Artist", external_id=1)
+        _make_word("run", song=self.song)
+        _make_writer("Annie Clark", 1004)
+
+    def test_search_sends_etag_and_revalidation_headers(self):
+        response = self.client.get("/search/word/", {"word": "run"})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        assert "no-cache" in response.headers["Cache-Control"]
+        assert "public" in response.headers["Cache-Control"]
+
+    def test_matching_etag_returns_304_without_searching(self):
+        etag = self.client.get("/search/word/", {"word": "run"}).headers["ETag"]
+
+        with (
+            patch("bnt_searcher.views.find_matches") as mock_find_matches,
+            self.assertNumQueries(0),
+        ):
+            response = self.client.get("/search/word/", {"word": "run"}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        mock_find_matches.assert_not_called()
+
+    def test_etag_differs_by_query(self):
+        first = self.client.get("/search/word/", {"word": "run"}).headers["ETag"]
+        second = self.client.get("/search/word/", {"word": "run", "page": 2}).headers["ETag"]
+        assert first != second
+
+    def test_etag_differs_by_negotiated_format(self):
+        etag = self.client.get("/search/word/", {"word": "run"}).headers["ETag"]
+
+        response = self.client.get(
+            "/search/word/", {"word": "run"}, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "Accept" in response.headers["Vary"]
+
+    def test_corpus_change_invalidates_etag(self):
+        etag = self.client.get("/search/word/", {"word": "run"}).headers["ETag"]
+
+        TableService().get_table("corpus_version").bump()
+        forget_corpus_version()
+
+        response = self.client.get("/search/word/", {"word": "run"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_writer_list_answers_304(self):
+        etag = self.client.get("/search/writers/").headers["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/search/writers/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+    def test_invalid_request_has_no_etag_to_revalidate(self):
+        response = self.client.get("/search/word/", {"word": "run", "page": "last"})
+        assert response.status_code == 400
+        assert "ETag" not in response.headers
+
+        response = self.client.get(
+            "/search/word/", {"word": "run", "page": "last"}, HTTP_IF_NONE_MATCH="*"
+        )
+        assert response.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class PhraseSearchTestCase(TestCase):
+    def setUp(self):
+        self.song_a = _make_song(title="Song A", artist="Artist", external_id=1)
+        self.song_b = _make_song(title="Song B", artist="Artist", external_id=2)
+        _make_lyrics(self.song_a, ["I'm a lost soul", "Lost in a soul"])
+        _make_lyrics(
+            self.song_a, ["A lost soul again"], section_type=Section.SectionTypeEnum.CHORUS, order=2
+        )
+        _make_lyrics(self.song_b, ["Soul-lost and lonely", "The lost soul's song"])
+        _make_writer("Alice Cooper", 2001).songs.add(self.song_b)
+
+    def _lyrics(self, params):
+        response = self.client.get("/search/word/", params)
+        assert response.status_code == 200
+        return [
+            line["lyric"]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+            for line in section["lines"]
+        ]
+
+    def test_matches_only_adjacent_words_in_order(self):
+        assert self._lyrics({"phrase": "lost soul"}) == [
+            "I'm a lost soul",
+            "A lost soul again",
+            "The lost soul's song",
+        ]
+
+    def test_hyphenated_word_is_not_two_adjacent_words(self):
+        assert self._lyrics({"phrase": "soul lost"}) == []
+
+    def test_phrase_is_tokenised_like_lyrics(self):
+        assert self._lyrics({"phrase": "  Lost, SOUL! "}) == self._lyrics({"phrase": "lost soul"})
+
+    def test_anchor_is_picked_without_counting_positions(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._lyrics({"phrase": "lost soul"})
+
+        # Counting positions per word reads the table itself, not as an aliased subquery.
+        counted = f'FROM "{WordPosition._meta.db_table}" INNER JOIN'
+        assert not any(
+            counted in query["sql"] and "GROUP BY" in query["sql"]
+            for query in queries.captured_queries
+        )
+
+    def test_phrase_with_an_unknown_word_is_empty(self):
+        response = self.client.get("/search/word/", {"phrase": "lost crows"})
+        body = response.json()
+        assert body["data"]["results"] == []
+        assert body["data"]["word"] == {"id": None, "text": "lost crows"}
+        assert body["meta"]["total_lines"] == 0
+
+    def test_filters_apply_to_phrases(self):
+        assert self._lyrics({"phrase": "lost soul", "section_type": "chorus"}) == [
+            "A lost soul again"
+        ]
+        assert self._lyrics({"phrase": "lost soul", "co_writer": "alice"}) == [
+            "The lost soul's song"
+        ]
+
+    def test_meta_counts_phrase_matches(self):
+        meta = self.client.get("/search/word/", {"phrase": "lost soul"}).json()["meta"]
+        assert meta["total_songs"] == 2
+        assert meta["total_lines"] == 3
+
+    def test_phrase_text_is_formatted(self):
+        response = self.client.get("/search/word/", {"phrase": "i'm a lost soul"})
+        assert response.json()["data"]["word"]["text"] == "I'm a lost soul"
+
+    def test_word_or_phrase_is_required(self):
+        for params in ({}, {"word": " "}, {"phrase": "?!"}):
+            response = self.client.get("/search/word/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — boolean queries
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class BooleanSearchTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        song_a = _make_song(title="Song A", artist="Artist", external_id=1)
+        _make_lyrics(song_a, ["Rain and sun", "Rain again"])
+        _make_lyrics(song_a, ["Sun only"], section_type=Section.SectionTypeEnum.CHORUS, order=2)
+        song_b = _make_song(title="Song B", artist="Artist", external_id=2)
+        _make_lyrics(song_b, ["Rain on me", "Clouds"])
+        song_c = _make_song(title="Song C", artist="Artist", external_id=3)
+        _make_lyrics(song_c, ["Sun and clouds"])
+        _make_writer("Alice Cooper", 2001).songs.add(song_a)
+
+    def _lyrics(self, params):
+        response = self.client.get("/search/word/", params)
+        assert response.status_code == 200, response.json()
+        return [
+            line["lyric"]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+            for line in section["lines"]
+        ]
+
+    def _assert_lyrics(self, params, expected):
+        assert self._lyrics(params) == expected, params
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            assert self._lyrics(params) == expected, f"{params} from the index"
+
+    def test_and_within_a_line(self):
+        self._assert_lyrics({"all": ["rain", "sun"]}, ["Rain and sun"])
+
+    def test_and_within_a_song(self):
+        self._assert_lyrics({"all": ["rain", "clouds"], "scope": "song"}, ["Rain on me", "Clouds"])
+
+    def test_not_within_a_line(self):
+        self._assert_lyrics({"word": "rain", "not": "sun"}, ["Rain again", "Rain on me"])
+
+    def test_not_within_a_song(self):
+        self._assert_lyrics({"word": "rain", "not": "sun", "scope": "song"}, ["Rain on me"])
+
+    def test_or(self):
+        self._assert_lyrics(
+            {"any": ["rain", "clouds"], "not": "sun", "scope": "song"}, ["Rain on me", "Clouds"]
+        )
+        self._assert_lyrics(
+            {"all": "sun", "any": ["rain", "clouds"]}, ["Rain and sun", "Sun and clouds"]
+        )
+
+    def test_song_ranges_hold_each_songs_lines(self):
+        index = postings_index.PostingsIndex.build(0)
+
+        for song_id, (start, end) in index.song_ranges.items():
+            assert set(index.song_ids[start:end]) == {song_id}
+        assert sum(end - start for start, end in index.song_ranges.values()) == len(index.line_ids)
+
+    def test_filters_apply_to_boolean_queries(self):
+        self._assert_lyrics({"any": ["sun"], "section_type": "chorus"}, ["Sun only"])
+        self._assert_lyrics({"all": "rain", "co_writer": "alice"}, ["Rain and sun", "Rain again"])
+
+    def test_unknown_required_term_is_empty(self):
+        self._assert_lyrics({"all": ["rain", "hail"]}, [])
+        self._assert_lyrics({"any": ["hail", "sleet"]}, [])
+        self._assert_lyrics(
+            {"word": "rain", "not": "hail"}, ["Rain and sun", "Rain again", "Rain on me"]
+        )
+
+    def test_query_is_described(self):
+        response = self.client.get(
+            "/search/word/", {"all": "Rain", "any": ["i", "clouds"], "not": "sun"}
+        )
+        assert response.json()["data"]["word"] == {
+            "id": None,
+            "text": "rain AND (I OR clouds) AND NOT sun",
+        }
+
+    def test_invalid_boolean_queries_return_400(self):
+        for params in ({"not": "sun"}, {"all": "rain", "scope": "verse"}):
+            response = self.client.get("/search/word/", params)
+            assert response.status_code == 400, params
+
+
+class PostingsMergeTestCase(TestCase):
+    def test_intersect_postings(self):
+        assert list(postings_index.intersect_postings([2, 5, 9], [1, 2, 3, 5, 8, 10])) == [2, 5]
+        assert list(postings_index.intersect_postings([20], [1, 2])) == []
+
+    def test_subtract_postings(self):
+        assert list(postings_index.subtract_postings([1, 2, 5, 9], [2, 9, 11])) == [1, 5]
+        assert list(postings_index.subtract_postings([1, 2], [])) == [1, 2]
+
+
+# ---------------------------------------------------------------------------
+# Wildcard search — term dictionary
+# ---------------------------------------------------------------------------
+
+
+class TermDictionaryTestCase(TestCase):
+    def setUp(self):
+        self.dictionary = term_dictionary.TermDictionary()
+        self.dictionary.terms = sorted(["dance", "danced", "dancing", "delight", "light", "mid"])
+        self.dictionary.reversed_terms = sorted(term[::-1] for term in self.dictionary.terms)
+
+    def test_prefix(self):
+        assert self.dictionary.expand("danc*", 10) == ["dance", "danced", "dancing"]
+
+    def test_suffix(self):
+        assert self.dictionary.expand("*light", 10) == ["delight", "light"]
+
+    def test_prefix_and_suffix(self):
+        assert self.dictionary.expand("d*d", 10) == ["danced"]
+        assert self.dictionary.expand("mi*id", 10) == []
+
+    def test_cap_is_enforced_before_expanding(self):
+        with self.assertRaises(term_dictionary.TooManyTerms):
+            self.dictionary.expand("d*", 3)
+        with self.assertRaises(term_dictionary.TooManyTerms):
+            self.dictionary.expand("*t", 1)
+
+    def test_invalid_patterns(self):
+        for pattern in ("dance", "*", "d*n*e"):
+            with self.assertRaises(ValueError):
+                self.dictionary.expand(pattern, 10)
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0, SEARCH_WILDCARD_MAX_TERMS=2)
+class WildcardSearchTestCase(TestCase):
+    def setUp(self):
+        term_dictionary.forget_term_dictionary()
+        self.addCleanup(term_dictionary.forget_term_dictionary)
+
+        self.song = _make_song(title="Song A", artist="Artist", external_id=1)
+        _make_lyrics(self.song, ["Dance all night", "Dancing in the moonlight", "Twilight"])
+
+    def test_prefix_search(self):
+        body = self.client.get("/search/word/", {"word": "Danc*"}).json()
+        assert body["data"]["word"]["terms"] == ["dance", "dancing"]
+        assert body["meta"]["total_lines"] == 2
+
+    def test_suffix_search_matches_index_results(self):
+        expected = self.client.get("/search/word/", {"word": "*light"}).json()
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            actual = self.client.get("/search/word/", {"word": "*light"}).json()
+        postings_index.forget_postings_index()
+
+        assert actual == expected
+        assert expected["data"]["word"]["terms"] == ["moonlight", "twilight"]
+
+    def test_pattern_matching_nothing_is_empty(self):
+        body = self.client.get("/search/word/", {"word": "zz*"}).json()
+        assert body["data"]["results"] == []
+
+    def test_too_broad_a_pattern_returns_400(self):
+        response = self.client.get("/search/word/", {"word": "*n*"})
+        assert response.status_code == 400
+        response = self.client.get("/search/word/", {"word": "*t"})
+        assert response.status_code == 400
+        assert "more than 2 words" in response.json()["detail"]
+
+    def test_new_words_are_found_after_a_song_is_saved(self):
+        self.client.get("/search/word/", {"word": "danc*"})
+        Word.objects.filter(text="dancing").delete()
+        _make_lyrics(_make_song(title="Song B", artist="Artist", external_id=2), ["Dancer"])
+        TableService().get_table("corpus_version").bump()
+
+        body = self.client.get("/search/word/", {"word": "danc*"}).json()
+        assert body["data"]["word"]["terms"] == ["dance", "dancer"]
+
+
+# ---------------------------------------------------------------------------
+# Fuzzy lookup — BK-tree
+# ---------------------------------------------------------------------------
+
+
+class FuzzyIndexTestCase(TestCase):
+    WORDS = ["dance", "danced", "dancer", "lance", "chance", "love", "glove", "lovely", "move"]
+
+    def setUp(self):
+        self.index = fuzzy_index.FuzzyIndex()
+        self.index.add(self.WORDS)
+
+    def test_edit_distance(self):
+        assert fuzzy_index.edit_distance("kitten", "sitting") == 3
+        assert fuzzy_index.edit_distance("", "abc") == 3
+        assert fuzzy_index.edit_distance("love", "love") == 0
+        assert fuzzy_index.edit_distance("kitten", "sitting", limit=1) == 2
+
+    def test_suggest_matches_scoring_every_word(self):
+        for term in ("danse", "lvoe", "chanse", "moved", "xyz"):
+            for max_distance in (1, 2):
+                expected = sorted(
+                    (fuzzy_index.edit_distance(term, word), word)
+                    for word in self.WORDS
+                    if 0 < fuzzy_index.edit_distance(term, word) <= max_distance
+                )
+                assert self.index.suggest(term, max_distance) == [w for _, w in expected], term
+
+    def test_bounded_lookup_matches_scoring_every_word_in_a_larger_tree(self):
+        rng = Random(7)
+        words = sorted({"".join(rng.choices("abcde", k=rng.randint(2, 7))) for _ in range(400)})
+        index = fuzzy_index.FuzzyIndex()
+        index.add(words)
+
+        for term in rng.sample(words, 20) + ["zzzzzz", "abcdeabcde"]:
+            expected = sorted(
+                (fuzzy_index.edit_distance(term, word), word)
+                for word in words
+                if 0 < fuzzy_index.edit_distance(term, word) <= 2
+            )
+            assert index.suggest(term, 2, limit=1000) == [w for _, w in expected], term
+
+    def test_suggest_orders_nearest_first_and_caps(self):
+        assert self.index.suggest("dance", 1) == ["danced", "dancer", "lance"]
+        assert self.index.suggest("dance", 2, limit=2) == ["danced", "dancer"]
+
+    def test_adding_a_known_word_is_a_no_op(self):
+        size = self.index.size
+        self.index.add(["love", "dance"])
+        assert self.index.size == size
+
+    def test_catch_up_reads_only_new_words(self):
+        index = fuzzy_index.FuzzyIndex()
+        Word.objects.create(text="love")
+        index.catch_up(version=1)
+
+        Word.objects.create(text="lovely")
+        with self.assertNumQueries(1):
+            index.catch_up(version=2)
+
+        assert index.size == 2
+        assert index.version == 2
+        assert index.suggest("lovelyy", 1) == ["lovely"]
+
+    def test_insert_replaces_children_rather_than_changing_them(self):
+        # Lookups take no lock, so one part-way through a node's children must
+        # not see them change under it.
+        root_children = self.index._root[1]
+        before = dict(root_children)
+        self.index.add(["dancing", "lanced", "glance", "loved"])
+
+        assert root_children == before
+        assert self.index.suggest("lanse", 1) == ["lance"]
+        assert self.index.suggest("lovedd", 1) == ["loved"]
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class FuzzySearchTestCase(TestCase):
+    def setUp(self):
+        fuzzy_index.forget_fuzzy_index()
+        self.addCleanup(fuzzy_index.forget_fuzzy_index)
+
+        _make_lyrics(_make_song(external_id=1), ["Dance with me", "Glove and love"])
+
+    def test_unknown_word_gets_suggestions(self):
+        body = self.client.get("/search/word/", {"word": "lovr"}).json()
+        assert body["data"]["results"] == []
+        assert body["data"]["word"]["suggestions"] == ["love"]
+
+    def test_fuzzy_searches_the_suggestions(self):
+        body = self.client.get("/search/word/", {"word": "dancce", "fuzzy": "true"}).json()
+        assert body["data"]["word"]["terms"] == ["dance"]
+        assert body["meta"]["total_lines"] == 1
+
+    def test_short_words_allow_one_typo(self):
+        body = self.client.get("/search/word/", {"word": "mee"}).json()
+        assert body["data"]["word"]["suggestions"] == ["me"]
+        body = self.client.get("/search/word/", {"word": "wxtx"}).json()
+        assert body["data"]["word"]["suggestions"] == []
+
+    def test_known_word_has_no_suggestions(self):
+        body = self.client.get("/search/word/", {"word": "love", "fuzzy": "true"}).json()
+        assert "suggestions" not in body["data"]["word"]
+        assert "terms" not in body["data"]["word"]
+
+    def test_words_added_reach_a_built_index(self):
+        self.client.get("/search/word/", {"word": "lovr"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TableService().get_table("word").save_all([(Line.objects.first(), ["lovely"])])
+
+        assert fuzzy_index._index.current.suggest("lovelyy", 1) == ["lovely"]
+
+    def test_words_added_signal_is_ignored_without_an_index(self):
+        words_added.send(sender=None, texts=["lovely"])
+        assert fuzzy_index._index.current is None
+
+    def test_warm_builds_the_index(self):
+        fuzzy_index.warm_fuzzy_index()
+        assert fuzzy_index._index.current.suggest("lovr", 1) == ["love"]
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — Postgres full-text engine
+# ---------------------------------------------------------------------------
+
+
+@skipUnless(connection.vendor != "postgresql", "Checks the fallback on other databases")
+@override_settings(SEARCH_ENGINE="postgres", SEARCH_VERSION_CHECK_SECONDS=0)
+class FullTextFallbackTestCase(TestCase):
+    def setUp(self):
+        _make_lyrics(_make_song(external_id=1), ["Dancing in the dark", "Dance all night"])
+
+    def test_other_databases_use_the_words_engine(self):
+        body = self.client.get("/search/word/", {"word": "dance"}).json()
+
+        assert body["data"]["word"]["id"] == Word.objects.get(text="dance").id
+        assert body["meta"]["total_lines"] == 1, "No stemming without full-text search"
+
+    def test_relevance_sort_is_ignored_without_full_text(self):
+        response = self.client.get(
+            "/search/word/", {"word": "dance", "sort": "relevance", "cursor": ""}
+        )
+        assert response.status_code == 200
+
+    def test_words_engine_does_not_read_search_vectors(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/search/word/", {"word": "dance"})
+            self.client.get("/search/export/", {"word": "dance"})
+
+        assert not any("search_vector" in query["sql"] for query in queries.captured_queries)
+
+
+@skipUnless(connection.vendor == "postgresql", "Full-text search needs Postgres")
+@override_settings(SEARCH_ENGINE="postgres", SEARCH_VERSION_CHECK_SECONDS=0)
+class FullTextSearchTestCase(TestCase):
+    def setUp(self):
+        self.song_a = _make_song(title="Song A", artist="Artist", external_id=1)
+        self.song_b = _make_song(title="Song B", artist="Artist", external_id=2)
+        lines = [
+            *_make_lyrics(self.song_a, ["Dancing in the dark", "Lost soul"]).lines.all(),
+            *_make_lyrics(self.song_b, ["Dance, dance, dance", "Soul lost"]).lines.all(),
+        ]
+        TableService().get_table("line").save_search_vectors(lines)
+
+    def _lyrics(self, params):
+        response = self.client.get("/search/word/", params)
+        assert response.status_code == 200
+        return [
+            line["lyric"]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+            for line in section["lines"]
+        ]
+
+    def test_words_match_by_stem(self):
+        assert self._lyrics({"word": "dance"}) == ["Dancing in the dark", "Dance, dance, dance"]
+
+    def test_phrase_needs_words_in_order(self):
+        assert self._lyrics({"phrase": "lost soul"}) == ["Lost soul"]
+
+    def test_relevance_orders_songs_by_best_rank(self):
+        body = self.client.get("/search/word/", {"word": "dance", "sort": "relevance"}).json()
+        assert [song["title"] for song in body["data"]["results"]] == ["Song B", "Song A"]
+
+    def test_relevance_cannot_use_a_cursor(self):
+        response = self.client.get(
+            "/search/word/", {"word": "dance", "sort": "relevance", "cursor": ""}
+        )
+        assert response.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# WordSearchView — substring search
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class ContainsSearchTestCase(TestCase):
+    def setUp(self):
+        self.song = _make_song(title="Song A", artist="Artist", external_id=1)
+        _make_lyrics(self.song, ["I'm GONNA dance", "Heart-breaker"])
+        _make_lyrics(self.song, ["Gonna go"], section_type=Section.SectionTypeEnum.CHORUS, order=2)
+
+    @skipUnless(connection.vendor != "postgresql", "Checks the refusal on other databases")
+    def test_needs_postgres(self):
+        response = self.client.get("/search/word/", {"contains": "gonn"})
+        assert response.status_code == 400
+
+    @skipUnless(connection.vendor == "postgresql", "Substring search needs Postgres")
+    def test_finds_fragments_in_song_order(self):
+        body = self.client.get("/search/word/", {"contains": "Gonn"}).json()
+        sections = body["data"]["results"][0]["sections"]
+        assert [[line["lyric"] for line in s["lines"]] for s in sections] == [
+            ["I'm GONNA dance"],
+            ["Gonna go"],
+        ]
+        assert body["data"]["word"] == {"id": None, "text": "gonn"}
+
+    @skipUnless(connection.vendor == "postgresql", "Substring search needs Postgres")
+    def test_finds_text_inside_compounds(self):
+        body = self.client.get("/search/word/", {"contains": "rt-br"}).json()
+        assert body["meta"]["total_lines"] == 1
+
+    @skipUnless(connection.vendor == "postgresql", "Substring search needs Postgres")
+    def test_short_fragment_returns_400(self):
+        response = self.client.get("/search/word/", {"contains": "go"})
+        assert response.status_code == 400
+
+    @skipUnless(connection.vendor == "postgresql", "Substring search needs Postgres")
+    def test_query_can_use_the_trigram_index(self):
+        matches = search_service.find_contains_matches("gonn", [], [], [])
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = matches.lines_qs.order_by().values("id").explain()
+
+        assert "line_lyrics_trgm_idx" in plan
+
+
+# ---------------------------------------------------------------------------
+# SearchExportView
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class SearchExportTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        writer = _make_writer("Alice Cooper", 2001)
+        for n in range(3):
+            song = _make_song(title=f"Song {n}", artist="Artist", external_id=1 + n)
+            _make_lyrics(song, [f"Rain number {n}", "No match", "Rain, rain"])
+            writer.songs.add(song)
+
+    def _ndjson(self, params):
+        response = self.client.get("/search/export/", params)
+        assert response.status_code == 200
+        assert response.streaming
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_unknown_word_is_not_looked_up_for_suggestions(self):
+        with patch("bnt_searcher.views.get_fuzzy_index") as mock_get_fuzzy_index:
+            assert self._ndjson({"word": "rian"}) == []
+
+        mock_get_fuzzy_index.assert_not_called()
+
+    def test_streams_every_match_in_search_order(self):
+        rows = self._ndjson({"word": "rain"})
+
+        assert [(row["title"], row["lyric"]) for row in rows] == [
+            ("Song 0", "Rain number 0"),
+            ("Song 0", "Rain, rain"),
+            ("Song 1", "Rain number 1"),
+            ("Song 1", "Rain, rain"),
+            ("Song 2", "Rain number 2"),
+            ("Song 2", "Rain, rain"),
+        ]
+        assert rows[0]["writers"] == ["Alice Cooper"]
+        assert rows[0]["section_type"] == "VERSE"
+        assert rows[1]["line_order"] == 3
+
+    def test_index_streams_the_same_rows(self):
+        expected = self._ndjson({"word": "rain", "section_type": "verse"})
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            assert self._ndjson({"word": "rain", "section_type": "verse"}) == expected
+
+    def test_reads_lines_in_chunks(self):
+        with patch("bnt_searcher.views.EXPORT_CHUNK_SIZE", 2):
+            assert len(self._ndjson({"word": "rain"})) == 6
+
+    def test_csv(self):
+        response = self.client.get("/search/export/", {"word": "rain", "output": "csv"})
+        content = b"".join(response.streaming_content).decode()
+
+        assert response["Content-Type"] == "text/csv"
+        assert 'filename="bobntay-rain.csv"' in response["Content-Disposition"]
+        lines = content.splitlines()
+        assert lines[0].startswith("song_id,title,artist,writers,")
+        assert len(lines) == 7
+        assert '"Rain, rain"' in lines[2]
+
+    def test_no_matches_streams_nothing(self):
+        assert self._ndjson({"word": "nothing"}) == []
+
+    def test_invalid_requests_return_400(self):
+        for params in ({"word": "rain", "output": "xml"}, {}):
+            response = self.client.get("/search/export/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# WordFrequencyView
+# ---------------------------------------------------------------------------
+
+
+class WordFrequencyViewTestCase(TestCase):
+    def setUp(self):
+        alice = _make_writer("Alice Cooper", 2001)
+        bob = _make_writer("Bob Dylan", 2002)
+        first = _make_song(title="First", external_id=1)
+        alice.songs.add(first)
+        bob.songs.add(first)
+        second = _make_song(title="Second", external_id=2)
+        alice.songs.add(second)
+
+        _make_lyrics(first, ["Rain on me", "Rain again"])
+        _make_lyrics(first, ["Rain, rain"], section_type=Section.SectionTypeEnum.CHORUS, order=2)
+        _make_lyrics(second, ["Falling rain", "No sun"])
+
+    def test_counts_lines_songs_and_writers(self):
+        response = self.client.get("/search/frequency/", {"word": "Rain"})
+
+        assert response.status_code == 200
+        [rain] = response.json()["words"]
+        assert (rain["text"], rain["lines"], rain["songs"], rain["writers"]) == ("rain", 4, 2, 2)
+        assert rain["by_writer"] == [
+            {"writer": "Alice Cooper", "lines": 4, "songs": 2},
+            {"writer": "Bob Dylan", "lines": 3, "songs": 1},
+        ]
+        assert rain["by_section_type"] == {
+            "VERSE": {"lines": 3, "songs": 2},
+            "CHORUS": {"lines": 1, "songs": 1},
+        }
+
+    def test_several_words_in_the_order_given(self):
+        response = self.client.get("/search/frequency/", {"word": ["sun", "nowhere", "rain"]})
+
+        words = response.json()["words"]
+        assert [(word["text"], word["lines"]) for word in words] == [
+            ("sun", 1),
+            ("nowhere", 0),
+            ("rain", 4),
+        ]
+        assert words[1]["by_writer"] == []
+
+    def test_query_count_does_not_grow_with_word_count(self):
+        self.client.get("/search/frequency/", {"word": "rain"})  # reads the corpus version
+
+        # The frequencies, then their writer and section type breakdowns.
+        with self.assertNumQueries(3):
+            self.client.get("/search/frequency/", {"word": ["rain", "sun", "on", "me", "again"]})
+
+    def test_invalid_requests_return_400(self):
+        too_many = {"word": [f"word{n}" for n in range(51)]}
+        for params in ({}, {"word": " "}, too_many):
+            response = self.client.get("/search/frequency/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# WordNeighboursView
+# ---------------------------------------------------------------------------
+
+
+class WordNeighboursViewTestCase(TestCase):
+    def setUp(self):
+        alice = _make_writer("Alice Cooper", 2001)
+        bob = _make_writer("Bob Dylan", 2002)
+        first = _make_song(title="First", external_id=1)
+        alice.songs.add(first)
+        second = _make_song(title="Second", external_id=2)
+        bob.songs.add(second)
+
+        _make_lyrics(first, ["Heart of gold", "My heart, my soul", "Gold rush"])
+        _make_lyrics(second, ["Heart of stone", "Heart of glass"])
+
+    def _neighbours(self, params):
+        response = self.client.get("/search/neighbours/", params)
+        assert response.status_code == 200
+        return [(row["text"], row["lines"]) for row in response.json()["neighbours"]]
+
+    def test_busiest_neighbours_first(self):
+        assert self._neighbours({"word": "Heart"}) == [
+            ("of", 3),
+            ("glass", 1),
+            ("gold", 1),
+            ("my", 1),
+            ("soul", 1),
+            ("stone", 1),
+        ]
+
+    def test_limit(self):
+        assert self._neighbours({"word": "heart", "limit": 2}) == [("of", 3), ("glass", 1)]
+
+    def test_one_writers_songs(self):
+        assert self._neighbours({"word": "heart", "writer": "bob dylan"}) == [
+            ("of", 2),
+            ("glass", 1),
+            ("stone", 1),
+        ]
+
+    @override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+    def test_etag_follows_the_pair_counts(self):
+        first = self.client.get("/search/neighbours/", {"word": "heart"})["ETag"]
+
+        TableService().get_table("corpus_version").bump("pair_version")
+
+        assert self.client.get("/search/neighbours/", {"word": "heart"})["ETag"] != first
+
+    def test_unknown_word_has_no_neighbours(self):
+        assert self._neighbours({"word": "nowhere"}) == []
+
+    def test_invalid_requests_return_400(self):
+        for params in ({}, {"word": "heart", "limit": "many"}):
+            response = self.client.get("/search/neighbours/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# Keyword in context
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class SearchContextTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        song = _make_song(title="Weather")
+        _make_lyrics(song, ["Clouds", "Rain falls", "Grey skies", "Rain again", "Dry", "Sun"])
+        _make_lyrics(
+            song, ["Chorus line", "Rain in the chorus"], Section.SectionTypeEnum.CHORUS, order=2
+        )
+        other = _make_song(title="Drizzle", external_id=2)
+        _make_lyrics(other, ["Rain first", "Then nothing", "Still nothing"])
+
+    def _sections(self, params):
+        response = self.client.get("/search/word/", params)
+        assert response.status_code == 200
+        return [
+            [(line["lyric"], line.get("match")) for line in section["lines"]]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+        ]
+
+    def test_overlapping_windows_are_merged_within_each_section(self):
+        assert self._sections({"word": "rain", "context": 1}) == [
+            [
+                ("Clouds", False),
+                ("Rain falls", True),
+                ("Grey skies", False),
+                ("Rain again", True),
+                ("Dry", False),
+            ],
+            [("Chorus line", False), ("Rain in the chorus", True)],
+            [("Rain first", True), ("Then nothing", False)],
+        ]
+
+    def test_index_gives_the_same_context(self):
+        expected = self._sections({"word": "rain", "context": 2})
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            assert self._sections({"word": "rain", "context": 2}) == expected
+
+    def test_without_context_only_matches_are_sent(self):
+        assert self._sections({"word": "rain"})[0] == [("Rain falls", None), ("Rain again", None)]
+
+    def test_context_costs_one_query_per_page(self):
+        self.client.get("/search/word/", {"word": "rain"})  # reads the corpus version
+        with CaptureQueriesContext(connection) as without:
+            self.client.get("/search/word/", {"word": "rain"})
+        with CaptureQueriesContext(connection) as with_context:
+            self.client.get("/search/word/", {"word": "rain", "context": 3})
+
+        assert len(with_context) == len(without) + 1
+
+    def test_context_must_be_an_integer(self):
+        response = self.client.get("/search/word/", {"word": "rain", "context": "some"})
+        assert response.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# BatchSearchView
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=0)
+class BatchSearchTestCase(TestCase):
+    def setUp(self):
+        postings_index.forget_postings_index()
+        self.addCleanup(postings_index.forget_postings_index)
+
+        writer = _make_writer("Alice Cooper", 2001)
+        first = _make_song(title="First", external_id=1)
+        writer.songs.add(first)
+        _make_lyrics(first, ["I love you", "Loved and lost, my love", "Lost again"])
+        second = _make_song(title="Second", external_id=2)
+        _make_lyrics(second, ["Loved once"], Section.SectionTypeEnum.CHORUS)
+
+        lookup = WordVariantLookup.objects.create(headword="love", fetched_at=datetime.now(tz=UTC))
+        WordVariant.objects.create(lookup=lookup, text="loved")
+        WordVariantAlias.objects.create(searched_term="love", lookup=lookup)
+        # Every other term searched with variants, so none goes to the dictionary API.
+        self.no_variants = WordVariantLookup.objects.create(
+            headword="none", fetched_at=datetime.now(tz=UTC)
+        )
+        for term in ("lost", "again"):
+            WordVariantAlias.objects.create(searched_term=term, lookup=self.no_variants)
+
+    def _totals(self, params):
+        response = self.client.get("/search/batch/", params)
+        assert response.status_code == 200
+        return [
+            (search["word"]["text"], search["total_songs"], search["total_lines"])
+            for search in response.json()["data"]
+        ]
+
+    def test_totals_per_word_in_the_order_given(self):
+        assert self._totals({"word": ["Lost", "love", "nowhere"]}) == [
+            ("lost", 1, 2),
+            ("love", 1, 2),
+            ("nowhere", 0, 0),
+        ]
+
+    def test_variants_count_each_line_once(self):
+        assert self._totals({"word": ["love", "lost"], "variants": "true"}) == [
+            ("love", 2, 3),
+            ("lost", 1, 2),
+        ]
+
+    def test_filters(self):
+        assert self._totals({"word": ["loved", "lost"], "section_type": "chorus"}) == [
+            ("loved", 1, 1),
+            ("lost", 0, 0),
+        ]
+        assert self._totals({"word": ["loved", "lost"], "primary_writer": "alice"}) == [
+            ("loved", 1, 1),
+            ("lost", 1, 2),
+        ]
+
+    def test_index_gives_the_same_totals(self):
+        params = {"word": ["love", "lost", "again"], "variants": "true", "section_type": "verse"}
+        expected = self._totals(params)
+        with override_settings(SEARCH_POSTINGS_INDEX=True):
+            assert self._totals(params) == expected
+
+    def test_totals_cost_a_fixed_number_of_queries(self):
+        words = ["love", "lost", "again", "once", "you", "my"]
+        for word in words[3:]:
+            WordVariantAlias.objects.create(searched_term=word, lookup=self.no_variants)
+        self.client.get("/search/batch/", {"word": "love"})
+        with CaptureQueriesContext(connection) as one:
+            self.client.get("/search/batch/", {"word": words[:1], "variants": "true"})
+        with CaptureQueriesContext(connection) as many:
+            self.client.get("/search/batch/", {"word": words, "variants": "true"})
+
+        assert len(many) == len(one)
+
+    def test_results_give_each_words_first_page(self):
+        response = self.client.get(
+            "/search/batch/", {"word": ["lost", "nowhere"], "results": "true", "page_size": 1}
+        )
+
+        lost, nowhere = response.json()["data"]
+        assert [song["title"] for song in lost["results"]] == ["First"]
+        assert [line["lyric"] for line in lost["results"][0]["sections"][0]["lines"]] == [
+            "Loved and lost, my love",
+            "Lost again",
+        ]
+        assert nowhere["results"] == []
+
+    def test_invalid_requests_return_400(self):
+        too_many = {"word": [f"word{n}" for n in range(51)]}
+        for params in ({}, too_many, {"word": "love", "page_size": "big"}):
+            response = self.client.get("/search/batch/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# RhymeSearchView
+# ---------------------------------------------------------------------------
+
+
+class RhymeSearchTestCase(TestCase):
+    def setUp(self):
+        song_service = SongService(TableService(), MagicMock())
+        alice = _make_writer("Alice Cooper", 2001)
+        for n, lyrics in enumerate(
+            [["Light my fire", "Walk on by"], ["Burning desire", "Set the night on fire"]]
+        ):
+            song_service.song_object = _make_song(title=f"Song {n}", external_id=n + 1)
+            song_service.lyrics = lyrics
+            song_service.save_lyrics()
+            if n:
+                alice.songs.add(song_service.song_object)
+
+    def _lines(self, params):
+        response = self.client.get("/search/rhyme/", params)
+        assert response.status_code == 200
+        return [
+            line["lyric"]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+            for line in section["lines"]
+        ]
+
+    def test_lines_ending_in_a_rhyme(self):
+        response = self.client.get("/search/rhyme/", {"word": "Liar"})
+        assert response.json()["data"]["word"]["rhyme"] == "iar"
+
+        assert self._lines({"word": "admire"}) == [
+            "Light my fire",
+            "Burning desire",
+            "Set the night on fire",
+        ]
+        assert self._lines({"word": "sky"}) == ["Walk on by"]
+        assert response.json()["meta"]["total_lines"] == 0
+
+    def test_filters_and_totals(self):
+        response = self.client.get("/search/rhyme/", {"word": "wire", "co_writer": "alice"})
+
+        assert response.json()["meta"]["total_songs"] == 1
+        assert response.json()["meta"]["total_lines"] == 2
+
+    def test_invalid_requests_return_400(self):
+        for params in ({}, {"word": "hmm"}):
+            response = self.client.get("/search/rhyme/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# Phonetic search
+# ---------------------------------------------------------------------------
+
+
+class PhoneticSearchTestCase(TestCase):
+    def setUp(self):
+        song_service = SongService(TableService(), MagicMock())
+        song_service.song_object = _make_song()
+        song_service.lyrics = ["Tonight tonight", "Meet me tonite", "The night is young"]
+        song_service.save_lyrics()
+
+    def _lines(self, params):
+        response = self.client.get("/search/word/", params)
+        assert response.status_code == 200
+        return response.json()["data"]["word"], [
+            line["lyric"]
+            for song in response.json()["data"]["results"]
+            for section in song["sections"]
+            for line in section["lines"]
+        ]
+
+    def test_phonetic_search_finds_sound_alikes(self):
+        word, lines = self._lines({"word": "tonite", "phonetic": "true"})
+
+        assert word["terms"] == ["tonite", "tonight"]
+        assert lines == ["Tonight tonight", "Meet me tonite"]
+
+    def test_sound_alikes_of_an_unknown_spelling(self):
+        word, lines = self._lines({"word": "nite", "phonetic": "true"})
+        assert lines == ["The night is young"]
+
+        word, lines = self._lines({"word": "tunite", "phonetic": "true"})
+        assert word["terms"] == ["tunite", "tonight", "tonite"]
+        assert lines == ["Tonight tonight", "Meet me tonite"]
+
+    def test_off_by_default(self):
+        word, lines = self._lines({"word": "tonite"})
+
+        assert "terms" not in word
+        assert lines == ["Meet me tonite"]
+
+    def test_no_dictionary_lookup(self):
+        with patch("bnt_searcher.views.get_variants") as get_variants:
+            self._lines({"word": "tonite", "phonetic": "true"})
+
+        get_variants.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# WordSuggestView
+# ---------------------------------------------------------------------------
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=60)
+class WordSuggestTestCase(TestCase):
+    def setUp(self):
+        suggest_index.forget_suggest_index()
+        self.addCleanup(suggest_index.forget_suggest_index)
+        forget_corpus_version()
+        self.addCleanup(forget_corpus_version)
+
+        _make_lyrics(
+            _make_song(),
+            ["Dance dance dance", "Dancing in the dark", "The dark end of the street", "Darling"],
+        )
+
+    def _suggest(self, params):
+        response = self.client.get("/search/suggest/", params)
+        assert response.status_code == 200
+        return [(row["text"], row["lines"]) for row in response.json()["suggestions"]]
+
+    def test_busiest_words_first(self):
+        assert self._suggest({"q": "Da"}) == [
+            ("dark", 2),
+            ("dance", 1),
+            ("dancing", 1),
+            ("darling", 1),
+        ]
+        assert self._suggest({"q": "dan", "limit": "1"}) == [("dance", 1)]
+        assert self._suggest({"q": "zz"}) == []
+
+    def test_stored_top_words_match_a_scan(self):
+        scanned = suggest_index.SuggestIndex.build(0)
+        with patch.object(suggest_index, "_SCAN_LIMIT", 1):
+            stored = suggest_index.SuggestIndex.build(0)
+
+        assert "d" in stored.top and "d" not in scanned.top
+        for prefix in ("", "d", "da", "dar", "the", "x"):
+            assert stored.suggest(prefix, 3) == scanned.suggest(prefix, 3), prefix
+
+    def test_no_queries_once_built(self):
+        self._suggest({"q": "d"})
+
+        with self.assertNumQueries(0):
+            assert self._suggest({"q": "str"}) == [("street", 1)]
+
+    def test_index_follows_saved_songs(self):
+        self._suggest({"q": "d"})
+
+        song = _make_song(title="Song 2", external_id=2)
+        _make_lyrics(song, ["Darling darling"])
+        TableService().get_table("corpus_version").bump()
+        song_saved.send(sender=None, song=song)
+
+        assert self._suggest({"q": "darl"}) == [("darling", 2)]
+
+    def test_invalid_requests_return_400(self):
+        for params in ({}, {"q": " "}, {"q": "da", "limit": "many"}):
+            response = self.client.get("/search/suggest/", params)
+            assert response.status_code == 400, params
+
+
+# ---------------------------------------------------------------------------
+# Request timing
+# ---------------------------------------------------------------------------
+
+
+@override_settings(REQUEST_TIMING=True)
+class SearchTimingTestCase(TestCase):
+    def setUp(self):
+        _make_lyrics(_make_song(), ["Light my fire", "Walk on by"])
+
+    def test_search_stages_are_reported(self):
+        with (
+            patch("bnt_searcher.views.get_variants", return_value=["lights"]),
+            self.assertLogs("bnt_parser.utils.timing"),
+        ):
+            response = self.client.get("/search/word/", {"word": "light", "variants": "true"})
+
+        metrics = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        assert metrics == ["find", "variants", "word", "count", "page", "render", "db", "total"]
+        assert "page;dur=" in response["Server-Timing"]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus and benchmarks
+# ---------------------------------------------------------------------------
+
+
+class SyntheticCorpusTestCase(TestCase):
+    def test_lyrics_are_repeatable_and_zipf_distributed(self):
+        lyrics = SyntheticLyrics(vocabulary=200, seed=7)
+        words = Counter(lyrics.word() for _ in range(5000))
+
+        assert (
+            SyntheticLyrics(vocabulary=200, seed=7).line()
+            == SyntheticLyrics(vocabulary=200, seed=7).line()
+        )
+        assert words.most_common(1)[0][0] == lyrics.words[0]
+        assert words[lyrics.words[0]] > 5 * words[lyrics.words[20]]
+
+    def test_song_repeats_its_chorus(self):
+        song = SyntheticLyrics(seed=1).song(4, 3)
+
+        assert [section_type.value for section_type, _ in song] == [
+            "VERSE",
+            "CHORUS",
+            "VERSE",
+            "CHORUS",
+        ]
+        assert song[1][1] == song[3][1]
+        assert len(song[0][1]) == 3
+
+    def test_generate_corpus(self):
+        out = io.StringIO()
+        call_command(
+            "generate_corpus",
+            "--songs=3",
+            "--sections=2",
+            "--lines=2",
+            "--vocabulary=50",
+            "--writers=2",
+            "--variants=5",
+            stdout=out,
+        )
+
+        assert Song.objects.count() == 3
+        assert Line.objects.count() == 12
+        assert Word.line.through.objects.count() > 12
+        assert Writer.objects.count() == 2
+        assert all(song.writers.exists() for song in Song.objects.all())
+        assert WordVariantAlias.objects.count() == 5
+        assert "Added 3 songs, 12 lines" in out.getvalue()
+
+    def test_benchmark_writes_json(self):
+        call_command("generate_corpus", "--songs=5", "--vocabulary=50", stdout=io.StringIO())
+        out = io.StringIO()
+
+        with (
+            patch("bnt_searcher.services.variant_service.fetch_inflections") as fetch,
+            patch.dict(benchmark_search.SONG_SIZES, {"huge": (3, 5)}),
+        ):
+            call_command("benchmark_search", "--repeat=1", "--terms=1", stdout=out)
+
+        report = json.loads(out.getvalue())
+        names = [result["name"].split("/")[0:2] for result in report["results"]]
+        assert ["search", "common"] in names
+        assert ["search", "variants"] in names
+        assert ["search", "co_writer"] in names
+        assert ["save_lyrics", "huge"] in names
+        assert report["corpus"]["songs"] == 5, "Saved songs should be rolled back"
+        assert all(result["queries"] > 0 for result in report["results"])
+        fetch.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Query budgets and plans
+# ---------------------------------------------------------------------------
+
+# The word every synthetic corpus uses most.
+_COMMON_WORD = synthetic_word(0)
+
+# Warm searches, with every in-memory structure built, and the queries each may run.
+SEARCH_BUDGETS = {
+    "word": ({"word": _COMMON_WORD}, 8),
+    # The same as a plain search: the variants come from the variant cache.
+    "variants": ({"word": _COMMON_WORD, "variants": "true"}, 8),
+    "filters": (
+        {"word": _COMMON_WORD, "section_type": "CHORUS", "co_writer": "Synthetic Writer 1"},
+        8,
+    ),
+    "page": ({"word": _COMMON_WORD, "page": 2, "page_size": 1}, 8),
+    "cursor": ({"word": _COMMON_WORD, "cursor": "", "page_size": 1}, 8),
+    "context": ({"word": _COMMON_WORD, "context": 1}, 9),
+}
+# The queries saving a song runs besides one per section, one per line and those
+# of the word count tables, and the two more it runs when the song has new words.
+SUBMIT_BASE_QUERIES = 16
+NEW_WORD_QUERIES = 2
+# The word count tables, whose updates run one per distinct increment, so their
+# query count depends on the words as well as the size of the song.
+COUNT_TABLES = tuple(
+    f'"{model._meta.db_table}"'
+    for model in (WordFrequency, WordWriterFrequency, WordSectionFrequency)
+)
+# The word pair tables, which saving a song leaves to the count_word_pairs cron job.
+PAIR_TABLES = tuple(f'"{model._meta.db_table}"' for model in (WordPair, WordWriterPair))
+
+
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=60)
+class QueryBudgetTestCase(TestCase):
+    """
+    The queries the hot endpoints run, at several corpus sizes. A search runs a fixed
+    number whatever the corpus size; saving a song runs a fixed number plus one per
+    section and line, as SectionTable and LineTable save row by row; finding the next
+    song runs one per track already saved. A change to any of these counts is a
+    change to the cost of the endpoint and should be made on purpose.
+    """
+
+    # Songs in the corpus at each step.
+    SIZES = (2, 6, 18)
+
+    def setUp(self):
+        self.lyrics = SyntheticLyrics(vocabulary=100, seed=3)
+        self.addCleanup(forget_corpus_version)
+        self.addCleanup(forget_variants)
+
+    def _grow_corpus(self, songs: int) -> None:
+        generate_corpus(
+            self.lyrics,
+            songs=songs - Song.objects.count(),
+            sections=4,
+            lines_per_section=3,
+            writers=3,
+            variants=5,
+        )
+        forget_corpus_version()
+
+    def _sizes(self):
+        for size in self.SIZES:
+            self._grow_corpus(size)
+            yield size
+
+    def test_search_query_count_does_not_grow_with_the_corpus(self):
+        for size in self._sizes():
+            for name, (params, budget) in SEARCH_BUDGETS.items():
+                with self.subTest(songs=size, search=name):
+                    # The first run builds the writer song sets, reads the version and,
+                    # once committed, caches the variants.
+                    with self.captureOnCommitCallbacks(execute=True):
+                        assert self.client.get("/search/word/", params).status_code == 200
+                    with self.assertNumQueries(budget):
+                        response = self.client.get("/search/word/", params)
+                    assert response.json()["meta"]["total_lines"] > 0
+
+    def _submit(self, sections: int, lines: int) -> tuple[int, int, bool]:
+        """
+        Post a song of the given size to SubmitPageView. Returns the number of queries
+        run on the word count tables, the number run on every other table, and
+        whether the song added words.
+        """
+        words = Word.objects.count()
+        lyrics = self.lyrics.lyrics(sections, lines)
+        # A title of its own, or the song is found already saved and only linked.
+        title = f"Budget {Song.objects.count() + 1}"
+
+        def load_prefetched(service, track_data, genius_record, html):
+            service.genius_record, service.lyrics = genius_record, lyrics
+            service.title, service.artist = track_data["title"], "Synthetic"
+            return True
+
+        genius_record = {
+            "id": 1,
+            "api_path": "/songs/1",
+            "title": title,
+            "primary_artist": {"name": "Synthetic"},
+            "album": None,
+            "writer_artists": [{"name": "Synthetic Writer 1"}],
+        }
+        with (
+            patch.dict("os.environ", {"PARSE_API_KEY": "key"}),
+            patch.object(SongService, "load_prefetched", load_prefetched),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            response = self.client.post(
+                "/parse/submit-page/",
+                data=json.dumps(
+                    {
+                        "track_data": {"title": title, "url": "https://genius.com/budget"},
+                        "genius_record": genius_record,
+                        "html": "<html></html>",
+                    }
+                ),
+                content_type="application/json",
+                HTTP_X_API_KEY="key",
+            )
+        assert response.status_code == 200
+        assert not any(
+            table in query["sql"] for table in PAIR_TABLES for query in queries.captured_queries
+        )
+
+        counts = sum(
+            any(table in query["sql"] for table in COUNT_TABLES)
+            for query in queries.captured_queries
+        )
+        return counts, len(queries) - counts, Word.objects.count() > words
+
+    def test_submit_page_queries_grow_only_with_sections_and_lines(self):
+        for size in self._sizes():
+            # Small enough that every bulk insert is one batch, on SQLite too.
+            for sections, lines in ((1, 1), (2, 1), (1, 4), (3, 5), (4, 6)):
+                with self.subTest(songs=size, sections=sections, lines=lines):
+                    counts, others, new_words = self._submit(sections, lines)
+                    expected = SUBMIT_BASE_QUERIES + sections + sections * lines
+                    assert others == expected + (NEW_WORD_QUERIES if new_words else 0)
+                    # A read, an insert batch or two and the updates for each table:
+                    # never more updates than the song has lines, and none per word.
+                    assert counts <= len(COUNT_TABLES) * (3 + sections * lines)
+
+    def test_next_song_queries_grow_only_with_saved_tracks(self):
+        self._grow_corpus(2)
+        new_track = {"id": 1, "api_path": "/songs/1"}
+        for saved in (0, 3, 12):
+            with self.subTest(saved=saved):
+                tracks = [{"id": 500 + n, "api_path": f"/songs/{500 + n}"} for n in range(saved)]
+                for track in tracks:
+                    ExternalSource.objects.get_or_create(
+                        source=ExternalSource.SourceEnum.GENIUS,
+                        external_id=track["id"],
+                        endpoint=track["api_path"],
+                    )
+                client = MagicMock()
+                client.get_next_song.return_value = iter([*tracks, new_track])
+                client.fetch_entry.return_value = {"id": 1, "title": "New"}
+
+                # One existence check per track, and a rejection check for the new one.
+                with (
+                    patch.dict("os.environ", {"PARSE_API_KEY": "key"}),
+                    patch("bnt_parser.views.GeniusClient", return_value=client),
+                    self.assertNumQueries(saved + 2),
+                ):
+                    response = self.client.get("/parse/next-song/", HTTP_X_API_KEY="key")
+                assert response.status_code == 200
+                assert response.json()["track"] == new_track
+
+
+def _sequential_scans(plan: dict, tables: set[str]) -> list[str]:
+    """Return the tables of *tables* read by a sequential scan anywhere in *plan*."""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(_sequential_scans(child, tables))
+    return scans
+
+
+@skipUnless(
+    connection.vendor == "postgresql" and os.environ.get("QUERY_PLAN_CHECKS") == "True",
+    "Query plans are checked on Postgres with QUERY_PLAN_CHECKS=True",
+)
+@override_settings(SEARCH_VERSION_CHECK_SECONDS=60)
+class QueryPlanTestCase(TestCase):
+    """
+    No warm search or song lookup reads the word, line, join or external source
+    tables by a sequential scan when an index could serve it.
+
+    Sequential scans are switched off for each EXPLAIN, so the planner only picks
+    one where no index applies; on a small test corpus it would otherwise pick one
+    everywhere, as reading a few pages is cheaper than any index.
+    """
+
+    TABLES = {
+        model._meta.db_table
+        for model in (Word, Line, Word.line.through, Writer.songs.through, ExternalSource)
+    }
+
+    def setUp(self):
+        generate_corpus(
+            SyntheticLyrics(vocabulary=100, seed=3),
+            songs=6,
+            sections=4,
+            lines_per_section=3,
+            writers=3,
+            variants=5,
+        )
+        forget_corpus_version()
+        self.addCleanup(forget_corpus_version)
+
+    def _assert_no_sequential_scans(self, queries: CaptureQueriesContext) -> None:
+        with connection.cursor() as cursor:
+            # Lasts until the test's transaction is rolled back.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in queries.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                with self.subTest(sql=query["sql"][:200]):
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {query['sql']}")
+                    (plan,) = cursor.fetchone()[0]
+                    assert _sequential_scans(plan["Plan"], self.TABLES) == []
+
+    def test_searches_use_indexes(self):
+        for name, (params, _) in SEARCH_BUDGETS.items():
+            with self.subTest(search=name):
+                self.client.get("/search/word/", params)
+                with CaptureQueriesContext(connection) as queries:
+                    assert self.client.get("/search/word/", params).status_code == 200
+                self._assert_no_sequential_scans(queries)
+
+    def test_saved_track_lookup_uses_an_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            ExternalSourceTable().song_exists(
+                api=ExternalSource.SourceEnum.GENIUS, id=500, url="/songs/500"
+            )
+        self._assert_no_sequential_scans(queries)
@@ -4,5 +4,12 @@ from . import views
 
 urlpatterns = [
     path("word/", views.WordSearchView.as_view(), name="word-search"),
+    path("batch/", views.BatchSearchView.as_view(), name="batch-search"),
+    path("rhyme/", views.RhymeSearchView.as_view(), name="rhyme-search"),
+    path("export/", views.SearchExportView.as_view(), name="search-export"),
+    path("frequency/", views.WordFrequencyView.as_view(), name="word-frequency"),
+    path("neighbours/", views.WordNeighboursView.as_view(), name="word-neighbours"),
+    path("suggest/", views.WordSuggestView.as_view(), name="word-suggest"),
     path("writers/", views.WriterListView.as_view(), name="writer-list"),
+    path("cache-stats/", views.SearchCacheStatsView.as_view(), name="search-cache-stats"),
 ]
@@ -1,13 +1,58 @@
+import csv
+import json
 import os
-from collections import defaultdict
-
-from django.db.models import Q
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags, quote_etag
+from django.utils.text import slugify
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from bnt_parser.models import Line, Word, Writer
-from bnt_searcher.services.variant_service import get_variants
+from bnt_parser.models import (
+    WordFrequency,
+    WordPair,
+    WordWriterFrequency,
+    WordWriterPair,
+    Writer,
+)
+from bnt_parser.services.song_service import SongService
+from bnt_parser.utils.rhyme import rhyme_key
+from bnt_parser.utils.timing import span
+from bnt_searcher.services.corpus_version import corpus_version, pair_version
+from bnt_searcher.services.fuzzy_index import get_fuzzy_index, max_distance_for
+from bnt_searcher.services.postings_index import get_postings_index
+from bnt_searcher.services.response_cache import (
+    get_response_cache,
+    query_digest,
+    response_cache_key,
+)
+from bnt_searcher.services.search_service import (
+    EXPORT_FIELDS,
+    MIN_CONTAINS_LENGTH,
+    add_context,
+    contains_enabled,
+    count_batch_matches,
+    find_boolean_matches,
+    find_contains_matches,
+    find_full_text_matches,
+    find_matches,
+    find_phrase_matches,
+    find_rhyme_matches,
+    find_sound_alikes,
+    find_word_id,
+    find_word_ids,
+    full_text_enabled,
+)
+from bnt_searcher.services.suggest_index import SUGGEST_MAX_LIMIT, get_suggest_index
+from bnt_searcher.services.term_dictionary import WILDCARD, TooManyTerms, get_term_dictionary
+from bnt_searcher.services.variant_service import get_variants, get_variants_for
 
 
 def _format_word_text(text):
@@ -23,6 +68,54 @@ def _build_page_url(request, page):
     return request.build_absolute_uri(f"?{params.urlencode()}")
 
 
+def _build_cursor_url(request, cursor):
+    params = request.GET.copy()
+    params.pop("page", None)
+    params["cursor"] = cursor
+    return request.build_absolute_uri(f"?{params.urlencode()}")
+
+
+def _encode_cursor(song_id: int) -> str:
+    """Wrap the last song id of a page as an opaque cursor for the next page."""
+    return urlsafe_b64encode(json.dumps({"after": song_id}).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int | None:
+    """
+    Return the song id a cursor continues after, or None for the first page.
+
+    Raises ValueError for anything that is not a cursor this view issued.
+    """
+    if not cursor:
+        return None
+    try:
+        after = json.loads(urlsafe_b64decode(cursor.encode()))["after"]
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError(cursor) from exc
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise ValueError(cursor)
+    return after
+
+
+# Parameters holding search terms, which the view strips and lowercases.
+SEARCH_TERM_PARAMS = ("word", "phrase", "all", "any", "not")
+
+
+def _search_terms(request, name: str) -> list[str]:
+    """Return the non-blank terms given for a repeatable term parameter, normalised."""
+    return [term for term in (v.strip().lower() for v in request.GET.getlist(name)) if term]
+
+
+def _describe_boolean(all_terms, any_terms, not_terms) -> str:
+    """Spell a boolean query out for the response, e.g. "rain AND NOT sun"."""
+    parts = [_format_word_text(term) for term in all_terms]
+    if any_terms:
+        alternatives = " OR ".join(_format_word_text(term) for term in any_terms)
+        parts.append(f"({alternatives})" if all_terms and len(any_terms) > 1 else alternatives)
+    parts.extend(f"NOT {_format_word_text(term)}" for term in not_terms)
+    return " AND ".join(parts)
+
+
 def _empty_response(word_data, page, page_size):
     return {
         "data": {"word": word_data, "results": []},
@@ -30,6 +123,7 @@ def _empty_response(word_data, page, page_size):
             "total_songs": 0,
             "total_lines": 0,
             "writers_in_results": [],
+            "section_type_counts": {},
             "page": page,
             "page_size": page_size,
             "previous_page_url": None,
@@ -38,6 +132,269 @@ def _empty_response(word_data, page, page_size):
     }
 
 
+def _empty_cursor_response(word_data, page_size):
+    response = _empty_response(word_data, None, page_size)
+    response["meta"]["next_cursor"] = None
+    return response
+
+
+def _normalised_query(request) -> list:
+    """
+    Return the query parameters in a canonical form for cache keys.
+
+    Parameters are sorted by name, and search terms are normalised the way the view
+    reads them, so "?word=Love&page=2" and "?page=2&word=love" share an entry.
+    Repeated values keep their order: for single-valued parameters the view reads
+    the last one, so reordering them could change the search.
+    """
+    query = []
+    for name, values in sorted(request.GET.lists()):
+        if name in SEARCH_TERM_PARAMS:
+            values = [value.strip().lower() for value in values]
+        elif name == "contains":
+            values = [value.lower() for value in values]
+        query.append([name, values])
+    return query
+
+
+def _corpus_etag(request, *args, **kwargs) -> str:
+    """
+    ETag for a response that depends only on the corpus and the query parameters.
+
+    Computed from the corpus version rather than the response body, so a matching
+    If-None-Match is answered with 304 before the view runs any search. Primary
+    writers are included because they shape both endpoints and are set per deploy,
+    and the negotiated format because the JSON and browsable HTML bodies differ.
+    """
+    return query_digest(
+        corpus_version(),
+        request.get_host(),
+        _normalised_query(request),
+        PRIMARY_WRITERS,
+        request.accepted_renderer.format,
+    )
+
+
+def _pair_count_etag(request, *args, **kwargs) -> str:
+    """
+    ETag for a response read from the word pair counts: _corpus_etag, moved on also
+    by the pair version, as the count_word_pairs cron job counts more pairs.
+    """
+    return query_digest(_corpus_etag(request, *args, **kwargs), pair_version())
+
+
+def _etag_on_success(etag_func):
+    """
+    Django's etag decorator, but sending the ETag with 200 responses only.
+
+    The ETag is computed from the query rather than the response, so Django's
+    decorator would send it with a 400 as well, and answer the next request for
+    the same invalid query with a 304 for a response that never succeeded. Here
+    only an ETag listed in If-None-Match is honoured, never "*", and since those
+    are only ever sent with a 200, a 304 only stands in for a 200.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            tag = quote_etag(etag_func(request, *args, **kwargs))
+            # Compared weakly, as Django does for If-None-Match.
+            sent = {
+                etag.removeprefix("W/")
+                for etag in parse_etags(request.headers.get("If-None-Match", ""))
+            }
+            if tag in sent:
+                response = HttpResponseNotModified()
+                response.headers["ETag"] = tag
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", tag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _revalidate(response):
+    """
+    Let browsers and shared proxies store the response, but have them check its
+    ETag with us before every reuse, so no one is served results from an old corpus.
+    """
+    patch_cache_control(response, public=True, no_cache=True)
+    # The body is negotiated on Accept, so shared caches must key on it too.
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def _search_filters(request) -> tuple[list[str], list[str], list[str]]:
+    """Return the (section_types, primary_writers, co_writers) a search is narrowed to."""
+    return (
+        [t.upper() for t in request.GET.getlist("section_type")],
+        request.GET.getlist("primary_writer"),
+        request.GET.getlist("co_writer"),
+    )
+
+
+class SearchRequestError(ValueError):
+    """A search request that cannot be run; the message is the 400 response's detail."""
+
+
+def _find_search_matches(request, suggest: bool = True):
+    """
+    Run the search a request asks for and return (word_data, matches, ranked).
+
+    Shared by the search and export views. matches is None when nothing can match.
+    Without *suggest*, an unknown word gets no suggestions unless fuzzy=true is
+    to search them, for callers that do not return word_data.
+
+    :raises SearchRequestError: when the request does not describe a valid search.
+    """
+    search_term = request.GET.get("word", "").strip().lower()
+    # A phrase takes the place of the word: its words must appear consecutively
+    # in a line. It is split as lyrics are, so punctuation around words is dropped.
+    phrase = [forms[0] for forms in SongService.parse_tokens(request.GET.get("phrase", ""))]
+    # Boolean mode: every "all" term, at least one "any" term and no "not" term,
+    # within one line or, with scope=song, anywhere in one song. A "word" given
+    # alongside counts as one more "all" term, so "?word=rain&not=sun" reads as
+    # it looks.
+    all_terms = _search_terms(request, "all")
+    any_terms = _search_terms(request, "any")
+    not_terms = _search_terms(request, "not")
+    boolean = bool(all_terms or any_terms or not_terms)
+    if boolean and search_term:
+        all_terms = [search_term, *all_terms]
+    # Substring mode: the fragment is matched anywhere in the lyrics as typed,
+    # spaces and all, so it is lowercased but not stripped.
+    fragment = request.GET.get("contains", "").lower()
+    if not search_term and not phrase and not boolean and not fragment.strip():
+        raise SearchRequestError(
+            'One of the "word", "phrase", "all", "any" or "contains" parameters is required.'
+        )
+    if boolean and not phrase and not (all_terms or any_terms):
+        raise SearchRequestError('A boolean search needs at least one "all" or "any" term.')
+    scope = request.GET.get("scope", "line").lower()
+    if scope not in ("line", "song"):
+        raise SearchRequestError('"scope" must be "line" or "song".')
+
+    section_types, primary_writers, co_writers = _search_filters(request)
+    include_variants = request.GET.get("variants", "").lower() == "true"
+    phonetic = request.GET.get("phonetic", "").lower() == "true"
+    fuzzy = request.GET.get("fuzzy", "").lower() == "true"
+    # Relevance order needs full-text ranks, so it applies only on that engine.
+    full_text = full_text_enabled()
+    ranked = full_text and request.GET.get("sort", "").lower() == "relevance"
+
+    if phrase:
+        # Variants are not expanded inside a phrase; each word is matched as typed.
+        word_data = {
+            "id": None,
+            "text": " ".join(_format_word_text(text) for text in phrase),
+        }
+        if full_text:
+            matches = find_full_text_matches(
+                [" ".join(phrase)],
+                section_types,
+                primary_writers,
+                co_writers,
+                phrase=True,
+                ranked=ranked,
+            )
+        else:
+            matches = find_phrase_matches(phrase, section_types, primary_writers, co_writers)
+    elif boolean:
+        # As with phrases, variants are not expanded; each term is matched as typed.
+        word_data = {"id": None, "text": _describe_boolean(all_terms, any_terms, not_terms)}
+        matches = find_boolean_matches(
+            all_terms,
+            any_terms,
+            not_terms,
+            scope == "song",
+            section_types,
+            primary_writers,
+            co_writers,
+            get_postings_index(),
+        )
+    elif fragment.strip():
+        if not contains_enabled():
+            raise SearchRequestError("Substring search is only available on Postgres.")
+        if len(fragment) < MIN_CONTAINS_LENGTH:
+            raise SearchRequestError(f'"contains" needs at least {MIN_CONTAINS_LENGTH} characters.')
+        word_data = {"id": None, "text": fragment}
+        matches = find_contains_matches(fragment, section_types, primary_writers, co_writers)
+    elif WILDCARD in search_term:
+        # The pattern stands for every word it expands to; variants are not added.
+        try:
+            terms = get_term_dictionary().expand(search_term, settings.SEARCH_WILDCARD_MAX_TERMS)
+        except TooManyTerms as exc:
+            raise SearchRequestError(f"{exc} Add more letters to narrow the search.") from exc
+        except ValueError as exc:
+            raise SearchRequestError(
+                'A wildcard search takes one "*" alongside some letters.'
+            ) from exc
+
+        word_data = {"id": None, "text": search_term, "terms": terms}
+        matches = find_matches(
+            terms, section_types, primary_writers, co_writers, get_postings_index()
+        )
+    else:
+        if include_variants:
+            with span("variants"):
+                variant_texts = get_variants(search_term)
+            terms = [search_term] + variant_texts
+        else:
+            terms = [search_term]
+        if phonetic:
+            # Sound-alikes come from the stored keys, so no dictionary lookup is needed.
+            terms = list(dict.fromkeys([*terms, *find_sound_alikes(search_term)]))
+
+        index = None if full_text else get_postings_index()
+        with span("word"):
+            word_id = find_word_id(search_term, index)
+        word_data = {"id": word_id, "text": _format_word_text(search_term)}
+        if phonetic:
+            word_data["terms"] = terms
+        if full_text:
+            matches = find_full_text_matches(
+                terms, section_types, primary_writers, co_writers, ranked=ranked
+            )
+        else:
+            matches = find_matches(terms, section_types, primary_writers, co_writers, index)
+
+        if matches is None and (fuzzy or suggest):
+            # No such word: offer the nearest ones, or with fuzzy=true search them.
+            suggestions = get_fuzzy_index().suggest(search_term, max_distance_for(search_term))
+            if fuzzy and suggestions:
+                word_data["terms"] = suggestions
+                matches = find_matches(
+                    suggestions, section_types, primary_writers, co_writers, index
+                )
+            else:
+                word_data["suggestions"] = suggestions
+
+    return word_data, matches, ranked
+
+
+class SearchCacheStatsView(APIView):
+    """
+    GET: Report the search response cache's configuration and this worker's hit and
+    miss counts. Counts are per process, so each worker answers for itself.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        cache = get_response_cache()
+        if cache is None:
+            return Response({"backend": None})
+        return Response({**cache.describe(), **cache.stats.as_dict()})
+
+
 PRIMARY_WRITERS = [
     name.strip()
     for name in os.environ.get("GENIUS_WRITERS", "Robert Pollard,Taylor Swift").split(",")
@@ -48,146 +405,427 @@ PRIMARY_WRITERS = [
 class WriterListView(APIView):
     permission_classes = [AllowAny]
 
+    @method_decorator(_etag_on_success(_corpus_etag))
     def get(self, request):
         exclude_q = Q()
         for name in PRIMARY_WRITERS:
             exclude_q |= Q(name__iexact=name)
         names = Writer.objects.exclude(exclude_q).order_by("name").values_list("name", flat=True)
-        return Response({"writers": list(names)})
+        return _revalidate(Response({"writers": list(names)}))
+
+
+# The most lines of context a search may ask for either side of each match.
+MAX_CONTEXT_LINES = 5
 
 
 class WordSearchView(APIView):
     permission_classes = [AllowAny]
+    # Keeps this view's cached responses apart from those of views based on it.
+    cache_name = "word-search"
 
+    @method_decorator(_etag_on_success(_corpus_etag))
     def get(self, request):
-        search_term = request.GET.get("word", "").strip().lower()
-        if not search_term:
-            return Response({"detail": 'The "word" parameter is required.'}, status=400)
+        cache = get_response_cache()
+        if cache is None:
+            return _revalidate(self.search(request))
 
-        primary_writers = request.GET.getlist("primary_writer")
-        co_writers = request.GET.getlist("co_writer")
-        section_types = [t.upper() for t in request.GET.getlist("section_type")]
-        include_variants = request.GET.get("variants", "").lower() == "true"
+        key = response_cache_key(
+            self.cache_name, request.get_host(), _normalised_query(request), corpus_version()
+        )
+        data = cache.get(key)
+        if data is not None:
+            return _revalidate(Response(data))
+
+        response = self.search(request)
+        # Errors are cheap to recompute and not worth a cache slot.
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return _revalidate(response)
+
+    def search(self, request):
         try:
             page = max(1, int(request.GET.get("page", 1)))
             page_size = max(1, min(50, int(request.GET.get("page_size", 20))))
         except (ValueError, TypeError):
             return Response({"detail": '"page" and "page_size" must be integers.'}, status=400)
 
-        if include_variants:
-            variant_texts = get_variants(search_term)
-            all_terms = [search_term] + variant_texts
-        else:
-            all_terms = [search_term]
+        try:
+            context = max(0, min(MAX_CONTEXT_LINES, int(request.GET.get("context", 0))))
+        except ValueError:
+            return Response({"detail": '"context" must be an integer.'}, status=400)
 
-        word_obj = Word.objects.filter(text=search_term).first()
-        word_data = {
-            "id": word_obj.id if word_obj else None,
-            "text": _format_word_text(search_term),
-        }
+        # Any "cursor" parameter, even an empty one for the first page, selects
+        # cursor pagination in place of "page".
+        use_cursor = "cursor" in request.GET
+        try:
+            after = _decode_cursor(request.GET["cursor"]) if use_cursor else None
+        except ValueError:
+            return Response({"detail": 'The "cursor" parameter is not valid.'}, status=400)
 
-        matching_words = Word.objects.filter(text__in=all_terms)
-        if not matching_words.exists():
+        try:
+            with span("find"):
+                word_data, matches, ranked = self.find(request)
+        except SearchRequestError as exc:
+            return Response({"detail": str(exc)}, status=400)
+        if use_cursor and ranked:
+            return Response(
+                {"detail": '"sort=relevance" pages by "page", not by "cursor".'}, status=400
+            )
+
+        if matches is None:
+            if use_cursor:
+                return Response(_empty_cursor_response(word_data, page_size))
             return Response(_empty_response(word_data, page, page_size))
 
-        lines_qs = (
-            Line.objects.filter(words__in=matching_words)
-            .select_related("section", "section__song")
-            .prefetch_related("section__song__writers")
-            .order_by("section__song_id", "section__order", "order")
-        )
+        with span("count"):
+            total_songs, total_lines = matches.count()
+            meta = {
+                "total_songs": total_songs,
+                "total_lines": total_lines,
+                "writers_in_results": matches.writer_names(),
+                "section_type_counts": matches.section_type_counts(),
+                "page": page,
+                "page_size": page_size,
+            }
 
-        if section_types:
-            lines_qs = lines_qs.filter(section__type__in=section_types)
-
-        if primary_writers:
-            q = Q()
-            for pw in primary_writers:
-                q |= Q(section__song__writers__name__icontains=pw)
-            lines_qs = lines_qs.filter(q)
-
-        if co_writers:
-            q = Q()
-            for cw in co_writers:
-                q |= Q(section__song__writers__name__icontains=cw)
-            lines_qs = lines_qs.filter(q)
-
-        lines_qs = lines_qs.distinct()
-
-        # Group lines into song → section → lines, preserving order
-        song_order = []
-        song_map = {}
-        section_map = {}  # section_id → {'obj': Section, 'lines': [Line, ...]}
-        song_sections = defaultdict(list)  # song_id → [section_id, ...]
-
-        for line in lines_qs:
-            section = line.section
-            song = section.song
-            if song.id not in song_map:
-                song_order.append(song.id)
-                song_map[song.id] = song
-            if section.id not in section_map:
-                section_map[section.id] = {"obj": section, "lines": []}
-                song_sections[song.id].append(section.id)
-            section_map[section.id]["lines"].append(line)
-
-        total_songs = len(song_order)
-        total_lines = sum(len(s["lines"]) for s in section_map.values())
-
-        all_writers = set()
-        for song_id in song_order:
-            for writer in song_map[song_id].writers.all():
-                all_writers.add(writer.name)
-
-        # Paginate by song
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_song_ids = song_order[start:end]
-
-        results = []
-        for song_id in page_song_ids:
-            song = song_map[song_id]
-            sections_out = []
-            for section_id in song_sections[song_id]:
-                s = section_map[section_id]
-                section = s["obj"]
-                sections_out.append(
-                    {
-                        "id": section.id,
-                        "type": section.type.value,
-                        "order": section.order,
-                        "lines": [
-                            {"id": line.id, "order": line.order, "lyric": line.lyrics}
-                            for line in s["lines"]
-                        ],
-                    }
-                )
-            results.append(
+        if use_cursor:
+            with span("page"):
+                results, next_after = matches.page_after(after, page_size)
+            next_cursor = _encode_cursor(next_after) if next_after is not None else None
+            meta.update(
+                {
+                    "page": None,
+                    "previous_page_url": None,
+                    "next_page_url": _build_cursor_url(request, next_cursor)
+                    if next_cursor
+                    else None,
+                    "next_cursor": next_cursor,
+                }
+            )
+        else:
+            # Paginate by song
+            start = (page - 1) * page_size
+            end = start + page_size
+            with span("page"):
+                results = matches.page(start, end)
+            meta.update(
                 {
-                    "id": song_id,
-                    "title": song.title,
-                    "artist": song.artist,
-                    "writers": [{"id": w.id, "name": w.name} for w in song.writers.all()],
-                    "sections": sections_out,
+                    "previous_page_url": _build_page_url(request, page - 1) if page > 1 else None,
+                    "next_page_url": _build_page_url(request, page + 1)
+                    if end < total_songs
+                    else None,
                 }
             )
 
+        if context:
+            with span("context"):
+                add_context(results, context)
+
         return Response(
             {
                 "data": {
                     "word": word_data,
                     "results": results,
                 },
-                "meta": {
-                    "total_songs": total_songs,
-                    "total_lines": total_lines,
-                    "writers_in_results": sorted(all_writers),
-                    "page": page,
-                    "page_size": page_size,
-                    "previous_page_url": _build_page_url(request, page - 1) if page > 1 else None,
-                    "next_page_url": _build_page_url(request, page + 1)
-                    if end < total_songs
-                    else None,
-                },
+                "meta": meta,
+            }
+        )
+
+    def find(self, request):
+        """Return (word_data, matches, ranked) for the request, as _find_search_matches."""
+        return _find_search_matches(request)
+
+
+class RhymeSearchView(WordSearchView):
+    """
+    GET: Find the lines whose final word rhymes with word=, judged by spelling (see
+    bnt_parser.utils.rhyme), grouped and paged as WordSearchView groups them.
+
+    Each line's rhyme key is recorded when it is saved, so a search is an indexed
+    lookup of one key rather than a scan of every line's last word.
+    """
+
+    cache_name = "rhyme-search"
+
+    def find(self, request):
+        word = request.GET.get("word", "").strip().lower()
+        if not word:
+            raise SearchRequestError('"word" is required.')
+        rhyme = rhyme_key(word)
+        if not rhyme:
+            raise SearchRequestError(f'"{word}" has no vowel to rhyme on.')
+
+        word_data = {"id": None, "text": _format_word_text(word), "rhyme": rhyme}
+        return word_data, find_rhyme_matches(rhyme, *_search_filters(request)), False
+
+
+# The most words one batch search may take.
+BATCH_MAX_WORDS = 50
+
+
+class BatchSearchView(APIView):
+    """
+    GET: Run a word search for each word= given and report each one's totals, and
+    with results=true its first page of results too (page_size as for a search).
+
+    Takes the variants, section_type, primary_writer and co_writer parameters of
+    WordSearchView, and searches the words engine whichever SEARCH_ENGINE is set.
+    The words, their variants and every search's totals are each read in one go
+    rather than once per word; only first pages of results cost queries per word.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(_etag_on_success(_corpus_etag))
+    def get(self, request):
+        texts = list(dict.fromkeys(_search_terms(request, "word")))
+        if not texts:
+            return Response({"detail": 'At least one "word" is required.'}, status=400)
+        if len(texts) > BATCH_MAX_WORDS:
+            return Response(
+                {"detail": f"At most {BATCH_MAX_WORDS} words may be given."}, status=400
+            )
+        try:
+            page_size = max(1, min(50, int(request.GET.get("page_size", 20))))
+        except ValueError:
+            return Response({"detail": '"page_size" must be an integer.'}, status=400)
+
+        section_types, primary_writers, co_writers = _search_filters(request)
+        include_variants = request.GET.get("variants", "").lower() == "true"
+        include_results = request.GET.get("results", "").lower() == "true"
+
+        variants = get_variants_for(texts) if include_variants else {}
+        term_texts = {text: [text, *variants.get(text, [])] for text in texts}
+        index = get_postings_index()
+        word_ids = find_word_ids(texts, index)
+        totals = count_batch_matches(term_texts, section_types, primary_writers, co_writers, index)
+
+        searches = []
+        for text in texts:
+            total_songs, total_lines = totals[text]
+            search = {
+                "word": {"id": word_ids.get(text), "text": _format_word_text(text)},
+                "total_songs": total_songs,
+                "total_lines": total_lines,
             }
+            if include_results:
+                matches = None
+                if total_lines:
+                    matches = find_matches(
+                        term_texts[text], section_types, primary_writers, co_writers, index
+                    )
+                search["results"] = matches.page(0, page_size) if matches is not None else []
+            searches.append(search)
+
+        return _revalidate(Response({"data": searches}))
+
+
+# Lines read from the database per round trip while exporting.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """A file-like object that hands back what is written, for streaming csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = {**row, "writers": "; ".join(row["writers"])}
+        yield writer.writerow(row[field] for field in EXPORT_FIELDS)
+
+
+class SearchExportView(APIView):
+    """
+    GET: Stream every line matching a search as NDJSON (the default) or, with
+    output=csv, as CSV: one row per line, with its song, section and writers.
+
+    Takes the same search parameters as WordSearchView, but no pagination: every
+    match is sent, in search order. Lines are read through a server-side cursor a
+    chunk at a time and written out as they arrive, so memory stays flat however
+    many lines match.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(_etag_on_success(_corpus_etag))
+    def get(self, request):
+        output = request.GET.get("output", "ndjson").lower()
+        if output not in ("ndjson", "csv"):
+            return Response({"detail": '"output" must be "ndjson" or "csv".'}, status=400)
+
+        try:
+            word_data, matches, _ = _find_search_matches(request, suggest=False)
+        except SearchRequestError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        rows = matches.iter_rows(EXPORT_CHUNK_SIZE) if matches is not None else iter(())
+        if output == "csv":
+            response = StreamingHttpResponse(_csv_lines(rows), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(
+                _ndjson_lines(rows), content_type="application/x-ndjson"
+            )
+
+        filename = f"bobntay-{slugify(word_data['text']) or 'search'}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return _revalidate(response)
+
+
+# The most words one frequency request may ask about.
+FREQUENCY_MAX_WORDS = 50
+
+
+def _frequency_data(text: str, frequency: WordFrequency | None) -> dict:
+    if frequency is None:
+        return {
+            "text": text,
+            "lines": 0,
+            "songs": 0,
+            "writers": 0,
+            "by_writer": [],
+            "by_section_type": {},
+        }
+
+    by_writer = sorted(
+        frequency.by_writer.all(), key=lambda row: (-row.line_count, row.writer.name)
+    )
+    return {
+        "text": text,
+        "lines": frequency.line_count,
+        "songs": frequency.song_count,
+        "writers": frequency.writer_count,
+        "by_writer": [
+            {"writer": row.writer.name, "lines": row.line_count, "songs": row.song_count}
+            for row in by_writer
+        ],
+        "by_section_type": {
+            row.section_type.value: {"lines": row.line_count, "songs": row.song_count}
+            for row in frequency.by_section_type.all()
+        },
+    }
+
+
+class WordFrequencyView(APIView):
+    """
+    GET: Report how often each word= given is used: in how many lines, songs and
+    writers' songs, broken down by writer and by section type.
+
+    The counts are kept up to date as lyrics are saved, so this reads a few stored
+    rows per word rather than counting over the corpus. Unknown words count zero.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(_etag_on_success(_corpus_etag))
+    def get(self, request):
+        texts = list(dict.fromkeys(_search_terms(request, "word")))
+        if not texts:
+            return Response({"detail": 'At least one "word" is required.'}, status=400)
+        if len(texts) > FREQUENCY_MAX_WORDS:
+            return Response(
+                {"detail": f"At most {FREQUENCY_MAX_WORDS} words may be given."}, status=400
+            )
+
+        frequencies = {
+            frequency.text: frequency
+            for frequency in WordFrequency.objects.filter(text__in=texts).prefetch_related(
+                Prefetch("by_writer", WordWriterFrequency.objects.select_related("writer")),
+                "by_section_type",
+            )
+        }
+        return _revalidate(
+            Response({"words": [_frequency_data(text, frequencies.get(text)) for text in texts]})
+        )
+
+
+# The most neighbours one request may ask for.
+NEIGHBOURS_MAX_LIMIT = 100
+
+
+class WordNeighboursView(APIView):
+    """
+    GET: List the words most often sharing a line with word=, busiest first, with
+    how many lines each shares. limit= sets how many (25 by default), and writer=
+    counts only lines from that writer's songs.
+
+    Reads the co-occurrence counts kept up to date by the count_word_pairs cron job,
+    top rows first from an index, rather than joining the Word.line join table to
+    itself. Lines saved since its last run are not counted yet.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(_etag_on_success(_pair_count_etag))
+    def get(self, request):
+        text = request.GET.get("word", "").strip().lower()
+        if not text:
+            return Response({"detail": '"word" is required.'}, status=400)
+        try:
+            limit = max(1, min(NEIGHBOURS_MAX_LIMIT, int(request.GET.get("limit", 25))))
+        except ValueError:
+            return Response({"detail": '"limit" must be an integer.'}, status=400)
+
+        writer = request.GET.get("writer", "").strip()
+        if writer:
+            pairs = WordWriterPair.objects.filter(
+                frequency__frequency__text=text, frequency__writer__name__iexact=writer
+            )
+        else:
+            pairs = WordPair.objects.filter(frequency__text=text)
+        neighbours = pairs.order_by("-line_count", "neighbour").values_list(
+            "neighbour", "line_count"
+        )[:limit]
+
+        return _revalidate(
+            Response(
+                {
+                    "word": text,
+                    "writer": writer or None,
+                    "neighbours": [
+                        {"text": neighbour, "lines": lines} for neighbour, lines in neighbours
+                    ],
+                }
+            )
+        )
+
+
+class WordSuggestView(APIView):
+    """
+    GET: Suggest corpus words starting with q=, those used in the most lines first,
+    with how many lines use each. limit= sets how many (10 by default).
+
+    Answered from an in-memory index of the words and their line counts, so a
+    keystroke costs no query.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(_etag_on_success(_corpus_etag))
+    def get(self, request):
+        prefix = request.GET.get("q", "").strip().lower()
+        if not prefix:
+            return Response({"detail": '"q" is required.'}, status=400)
+        try:
+            limit = max(1, min(SUGGEST_MAX_LIMIT, int(request.GET.get("limit", 10))))
+        except ValueError:
+            return Response({"detail": '"limit" must be an integer.'}, status=400)
+
+        suggestions = get_suggest_index().suggest(prefix, limit)
+        return _revalidate(
+            Response(
+                {
+                    "q": prefix,
+                    "suggestions": [{"text": text, "lines": lines} for text, lines in suggestions],
+                }
+            )
         )
@@ -61,9 +61,12 @@ REST_FRAMEWORK = {
 CRONJOBS = [
     # Disabled: song ingestion is handled by the local-machine fetch script.
     # ('0 * * * *', 'bnt_parser.cron.add_song')
+    # Saving lyrics leaves their word pairs for this to count.
+    ("*/10 * * * *", "bnt_parser.cron.count_word_pairs"),
 ]
 
 MIDDLEWARE = [
+    "bnt_parser.utils.timing.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -157,6 +160,43 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5 MB
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Answer word searches from an in-memory postings index instead of the Word.line
+# join table. Each worker holds its own copy, built on first use or at startup.
+SEARCH_POSTINGS_INDEX = os.environ.get("SEARCH_POSTINGS_INDEX", "False") == "True"
+
+# How often a worker re-reads the corpus version to notice songs saved by other
+# workers. Search caches and indexes can lag a new song by up to this long.
+SEARCH_VERSION_CHECK_SECONDS = float(os.environ.get("SEARCH_VERSION_CHECK_SECONDS", "1"))
+
+# Cache word search responses: "lru" per worker, "django" in the Django cache named by
+# SEARCH_RESPONSE_CACHE_ALIAS (shared between workers if that cache is), or "" for off.
+SEARCH_RESPONSE_CACHE = os.environ.get("SEARCH_RESPONSE_CACHE", "")
+SEARCH_RESPONSE_CACHE_SIZE = int(os.environ.get("SEARCH_RESPONSE_CACHE_SIZE", "1024"))
+SEARCH_RESPONSE_CACHE_ALIAS = os.environ.get("SEARCH_RESPONSE_CACHE_ALIAS", "default")
+SEARCH_RESPONSE_CACHE_TIMEOUT = int(os.environ.get("SEARCH_RESPONSE_CACHE_TIMEOUT", "86400"))
+
+# Keep each search term's variant texts in memory, per worker, so a repeat variant
+# search runs no query. Saving a lookup clears this worker's cache; other workers'
+# entries expire after SEARCH_VARIANT_CACHE_SECONDS. A size of 0 turns the cache off.
+SEARCH_VARIANT_CACHE_SIZE = int(os.environ.get("SEARCH_VARIANT_CACHE_SIZE", "4096"))
+SEARCH_VARIANT_CACHE_SECONDS = float(os.environ.get("SEARCH_VARIANT_CACHE_SECONDS", "3600"))
+
+# The most words a wildcard search ("danc*", "*light") may expand to before it is
+# refused as too broad.
+SEARCH_WILDCARD_MAX_TERMS = int(os.environ.get("SEARCH_WILDCARD_MAX_TERMS", "200"))
+
+# Which engine answers word and phrase searches: "words" for the Word.line join table
+# (and the postings index, if on), or "postgres" for Postgres full-text search over
+# Line.search_vector. "postgres" falls back to "words" on any other database.
+SEARCH_ENGINE = os.environ.get("SEARCH_ENGINE", "words")
+# The Postgres text search configuration used to build and query search vectors.
+# Changing it means clearing and refilling the vectors with reindex_lyrics.
+SEARCH_FTS_CONFIG = os.environ.get("SEARCH_FTS_CONFIG", "english")
+
+# Time the stages of each request, reporting them in a Server-Timing header and one
+# JSON log line per request (logger bnt_parser.utils.timing). Off costs next to nothing.
+REQUEST_TIMING = os.environ.get("REQUEST_TIMING", "False") == "True"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -18,3 +18,11 @@ from django.core.wsgi import get_wsgi_application  # noqa: E402
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bobntay.settings")
 
 application = get_wsgi_application()
+
+# Built here rather than in AppConfig.ready(), which also runs for migrate and
+# other management commands that have no use for a search index.
+from bnt_searcher.services.fuzzy_index import warm_fuzzy_index  # noqa: E402
+from bnt_searcher.services.postings_index import warm_postings_index  # noqa: E402
+
+warm_postings_index()
+warm_fuzzy_index()